@@ -0,0 +1,155 @@
+"""
+Micro-benchmark for parsing repertory result pages
+
+Pages are generated for every source in DEFAULT_SOURCES that has a
+result parser and a page builder in PAGES, with 0 (the "no results"
+page), 1, 20 (one full page of results) and 100 rows of seeded titles
+and names in the site's result markup.
+
+For every page it times building the document tree with lxml and with
+BeautifulSoup, then the parser's lxml fast path (`PROSource.parse`)
+against its BeautifulSoup fallback, and checks that both return the
+expected rows. Results are written with the audit benchmarks' harness
+(packages/backend/benchmarks/harness.py), so they compare with the
+same tooling:
+
+    python -m benchmarks.extract_bench --repeat 200 --output extract.json
+"""
+import argparse
+import importlib.util
+import random
+from html import escape
+from pathlib import Path
+from typing import Callable, Dict, List
+
+from bs4 import BeautifulSoup
+from lxml import html
+
+from services.sources import DEFAULT_SOURCES, PROSource
+
+# The harness lives in the audit backend, whose `benchmarks` package
+# shares this one's name, so it is loaded from its file
+HARNESS_PATH = Path(__file__).resolve().parents[4] / 'packages' / 'backend' / 'benchmarks' / 'harness.py'
+_spec = importlib.util.spec_from_file_location('audit_benchmarks_harness', HARNESS_PATH)
+harness = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(harness)
+
+ROW_COUNTS = (0, 1, 20, 100)
+
+ASCAP_PAGE = '''<!DOCTYPE html>
+<html lang="en">
+<head><meta charset="utf-8"><title>ACE Repertory - Search Results</title></head>
+<body>
+<nav><ul><li><a href="/repertory">Search</a></li><li><a href="/help">Help</a></li></ul></nav>
+<main>
+<form action="/repertory"><input name="title" value="{query}"><input name="writer"></form>
+{body}
+</main>
+<footer><p>Repertory data is provided for informational purposes only.</p></footer>
+</body>
+</html>
+'''
+ASCAP_TABLE = '''<table class="results">
+<thead><tr><th>Title</th><th>Writers</th><th>Publishers</th><th>ISWC</th></tr></thead>
+<tbody>
+{rows}
+</tbody>
+</table>'''
+ASCAP_ROW = '<tr><td>{title}</td><td>{writers}</td><td>{publishers}</td><td>{iswc}</td></tr>'
+ASCAP_EMPTY = '<p class="no-results">No results were found for your search.</p>'
+
+
+def _name(rng: random.Random) -> str:
+    return f"{rng.choice(['Ada', 'Bo', 'Cy', 'Di', 'Ed'])} {rng.choice(['Lane', 'Moss', 'Reyes', 'Stone'])}"
+
+
+def ascap_page(rows: int, rng: random.Random) -> bytes:
+    results = [
+        {
+            'title': f"Song {rng.randrange(10_000)} & Co",
+            'writers': ', '.join(_name(rng) for _ in range(rng.randint(1, 3))),
+            'publishers': f"{_name(rng)} Music",
+            'iswc': f"T-{rng.randrange(10 ** 9):09d}-{rng.randrange(10)}",
+        }
+        for _ in range(rows)
+    ]
+    body = ASCAP_TABLE.format(rows='\n'.join(
+        ASCAP_ROW.format(**{key: escape(value) for key, value in result.items()})
+        for result in results
+    )) if results else ASCAP_EMPTY
+    return ASCAP_PAGE.format(query='song', body=body).encode('utf-8')
+
+
+# Result page builders by source key: (row count, rng) -> page bytes
+PAGES: Dict[str, Callable[[int, random.Random], bytes]] = {
+    'ascap': ascap_page,
+}
+
+
+def build_pages(seed: int, keys: List[str] = ()) -> List[Dict]:
+    pages = []
+    for source in DEFAULT_SOURCES:
+        if (keys and source.key not in keys) or not source.can_parse or source.key not in PAGES:
+            continue
+        for rows in ROW_COUNTS:
+            pages.append({
+                'source': source,
+                'rows': rows,
+                'content': PAGES[source.key](rows, random.Random(seed + rows)),
+            })
+    return pages
+
+
+def bench_page(suite, page: Dict, repeat: int) -> None:
+    source: PROSource = page['source']
+    content, rows = page['content'], page['rows']
+    params = {'source': source.key, 'rows': rows, 'bytes': len(content)}
+    label = f"{source.key}_{rows}"
+    parser = html.HTMLParser(encoding='utf-8')
+
+    suite.record(
+        f"tree_lxml_{label}", harness.measure(lambda: html.fromstring(content, parser=parser), repeat),
+        params=params, units={'pages': 1}
+    )
+    suite.record(
+        f"tree_soup_{label}", harness.measure(lambda: BeautifulSoup(content, 'lxml', from_encoding='utf-8'), repeat),
+        params=params, units={'pages': 1}
+    )
+
+    fast = source.parse(content, 'utf-8')
+    suite.record(
+        f"extract_lxml_{label}", harness.measure(lambda: source.parse(content, 'utf-8'), repeat),
+        params=params, units={'pages': 1},
+        extra={'rows': len(fast), 'all_rows_found': len(fast) == rows}
+    )
+    extractor = source.extractor
+    if extractor is not None:
+        def fallback():
+            return extractor._extract_soup(BeautifulSoup(content, 'lxml', from_encoding='utf-8'))
+
+        suite.record(
+            f"extract_soup_{label}", harness.measure(fallback, repeat),
+            params=params, units={'pages': 1},
+            extra={'rows': len(fast), 'same_as_lxml': fallback() == fast}
+        )
+
+
+def run(args: argparse.Namespace):
+    suite = harness.Suite('extract', args.seed)
+    for page in build_pages(args.seed, args.sources):
+        bench_page(suite, page, args.repeat)
+    return suite
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark result page extraction over generated pages')
+    parser.add_argument(
+        '--sources', type=lambda value: [key.strip() for key in value.split(',') if key.strip()],
+        help='comma-separated source keys; all sources with a parser by default'
+    )
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=100)
+    parser.add_argument('--output', help='write the JSON results here instead of stdout')
+    args = parser.parse_args()
+
+    run(args).write(args.output)
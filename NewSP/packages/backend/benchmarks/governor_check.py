@@ -0,0 +1,181 @@
+"""
+Checks of the per-host request governor against the fault-injecting stub
+
+Each check runs PROScanner searches against StubPROServer with a policy
+scaled down to fractions of a second, swapping the stub's faults to
+drive the governor:
+
+- rate_increase: healthy responses raise the request rate
+- rate_decrease_errors: 503 responses lower it
+- rate_decrease_slow: responses slower than the latency target lower it
+  without opening the circuit
+- circuit_trip: consecutive failures open the circuit, after which
+  searches are answered unknown without reaching the host
+- circuit_recovery: once the host is healthy again, the probe sent
+  after reset_timeout closes the circuit and searches succeed
+
+Exits non-zero when any check fails, so it can gate a CI job:
+
+    python -m benchmarks.governor_check --output governor.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+from dataclasses import replace
+from typing import Awaitable, Callable, Dict, List, Tuple
+
+from benchmarks.scan_bench import git_commit
+from benchmarks.stub_pro_server import Faults, StubPROServer, stub_sources
+from services.governor import HostGovernor, RequestPolicy
+from services.pro_scanner import PROScanner
+
+POLICY = RequestPolicy(
+    min_rate=1.0,
+    max_rate=100.0,
+    increase=1.0,
+    decrease=0.5,
+    latency_target=0.2,
+    decrease_cooldown=0.0,
+    max_attempts=1,
+    backoff_base=0.01,
+    failure_threshold=3,
+    reset_timeout=0.5
+)
+START_RATE = (20.0, 20)
+DOWN = Faults(error_rate=1.0, error_status=503)
+SLOW = Faults(slow_rate=1.0, slow_latency=0.3)
+
+CheckResult = Tuple[bool, Dict]
+
+
+def _scanner(stub: StubPROServer, policy: RequestPolicy = POLICY) -> PROScanner:
+    return PROScanner(
+        sources=stub_sources(stub.url, ['ascap']),
+        cache=None,
+        default_rate_limit=START_RATE,
+        request_policy=policy
+    )
+
+
+async def _governor(scanner: PROScanner) -> HostGovernor:
+    # Opened first: opening replaces the scanner's governors
+    await scanner.open()
+    return scanner._governor(scanner.sources.get('ascap'))
+
+
+async def _searches(scanner: PROScanner, count: int, label: str) -> List:
+    # Distinct titles, so no search joins another one in flight
+    return [await scanner.search('ascap', f"{label} {serial}") for serial in range(count)]
+
+
+def _requests(stub: StubPROServer) -> int:
+    return sum(stub.requests.values())
+
+
+async def check_rate_increase(stub: StubPROServer) -> CheckResult:
+    stub.faults = Faults()
+    async with _scanner(stub) as scanner:
+        governor = await _governor(scanner)
+        before = governor.rate
+        results = await _searches(scanner, 10, 'healthy')
+        after = governor.rate
+    ok = after > before and all(result is not None for result in results)
+    return ok, {'rate_before': before, 'rate_after': after}
+
+
+async def check_rate_decrease_errors(stub: StubPROServer) -> CheckResult:
+    stub.faults = DOWN
+    # A threshold the check stays under, so the rate is seen moving
+    # rather than the circuit cutting requests off
+    policy = replace(POLICY, failure_threshold=100)
+    async with _scanner(stub, policy) as scanner:
+        governor = await _governor(scanner)
+        before = governor.rate
+        results = await _searches(scanner, 3, 'errors')
+        after = governor.rate
+    ok = after < before and all(result is None for result in results)
+    return ok, {'rate_before': before, 'rate_after': after}
+
+
+async def check_rate_decrease_slow(stub: StubPROServer) -> CheckResult:
+    stub.faults = SLOW
+    async with _scanner(stub) as scanner:
+        governor = await _governor(scanner)
+        before = governor.rate
+        results = await _searches(scanner, 3, 'slow')
+        after = governor.rate
+        circuit_open = governor.breaker.is_open
+    ok = after < before and not circuit_open and all(result is not None for result in results)
+    return ok, {'rate_before': before, 'rate_after': after, 'circuit_open': circuit_open}
+
+
+async def check_circuit_trip(stub: StubPROServer) -> CheckResult:
+    stub.faults = DOWN
+    async with _scanner(stub) as scanner:
+        governor = await _governor(scanner)
+        await _searches(scanner, POLICY.failure_threshold, 'trip')
+        tripped = governor.breaker.is_open
+        sent = _requests(stub)
+        blocked = await _searches(scanner, 3, 'blocked')
+        leaked = _requests(stub) - sent
+    ok = tripped and leaked == 0 and all(result is None for result in blocked)
+    return ok, {'circuit_open': tripped, 'requests_while_open': leaked}
+
+
+async def check_circuit_recovery(stub: StubPROServer) -> CheckResult:
+    stub.faults = DOWN
+    async with _scanner(stub) as scanner:
+        governor = await _governor(scanner)
+        await _searches(scanner, POLICY.failure_threshold, 'outage')
+        tripped = governor.breaker.is_open
+
+        stub.faults = Faults()
+        # Still open until the reset timeout lets a probe through
+        early = await scanner.search('ascap', 'too early')
+        await asyncio.sleep(POLICY.reset_timeout)
+        probe = await scanner.search('ascap', 'probe')
+        recovered = not governor.breaker.is_open
+        after = await _searches(scanner, 3, 'recovered')
+    ok = tripped and early is None and probe is not None and recovered and all(
+        result is not None for result in after
+    )
+    return ok, {'circuit_opened': tripped, 'circuit_closed_after_probe': recovered}
+
+
+CHECKS: Dict[str, Callable[[StubPROServer], Awaitable[CheckResult]]] = {
+    'rate_increase': check_rate_increase,
+    'rate_decrease_errors': check_rate_decrease_errors,
+    'rate_decrease_slow': check_rate_decrease_slow,
+    'circuit_trip': check_circuit_trip,
+    'circuit_recovery': check_circuit_recovery,
+}
+
+
+async def run_checks(names: List[str]) -> List[Dict]:
+    results = []
+    with StubPROServer(seed=1) as stub:
+        for name in names:
+            ok, extra = await CHECKS[name](stub)
+            print(f"{name}: {'ok' if ok else 'FAILED'} {extra}", file=sys.stderr)
+            results.append({'name': name, 'passed': ok, 'extra': extra})
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check the request governor against a fault-injecting stub')
+    parser.add_argument('--only', action='append', choices=sorted(CHECKS), help='Check to run (repeatable)')
+    parser.add_argument('--output', help='write the JSON results here instead of stdout')
+    args = parser.parse_args()
+
+    # The checks fail searches on purpose; keep their logs out of the report
+    logging.disable(logging.ERROR)
+    results = asyncio.run(run_checks(args.only or list(CHECKS)))
+    text = json.dumps({'suite': 'governor', 'meta': {'commit': git_commit()}, 'results': results}, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    sys.exit(0 if all(result['passed'] for result in results) else 1)
@@ -0,0 +1,200 @@
+"""
+Load test for the scanner API
+
+Starts a stub PRO server and the API (`python -m api.app` in
+packages/backend, with this backend's `services` on its path) as a
+separate process pointed at it, then measures:
+
+- cold start: time until /api/health answers, and the first scan's latency
+- /api/scan-catalog latency percentiles and throughput under concurrency
+
+The API uses its production sources, so only those with a result parser
+send requests to the stub. Audit workers are off unless AUDITS_ENABLED
+is set, since they need a database.
+
+Results are printed as JSON (or written to --output). Run from the
+backend directory:
+
+    python -m benchmarks.load_test --requests 200 --concurrency 20 --workers 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.stub_pro_server import StubPROServer
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+# The API app, which serves scans and audits, lives in the audit backend
+API_DIR = BACKEND_DIR.parents[2] / 'packages' / 'backend'
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def make_catalog(rng: random.Random, size: int, distinct_titles: int) -> List[Dict]:
+    return [
+        {'title': f"Track {rng.randrange(distinct_titles)}", 'artist': f"Artist {rng.randrange(50)}"}
+        for _ in range(size)
+    ]
+
+
+def start_api(port: int, stub_url: str, args: argparse.Namespace) -> subprocess.Popen:
+    env = {
+        **os.environ,
+        'PORT': str(port),
+        'HOST': '127.0.0.1',
+        'WEB_CONCURRENCY': str(args.workers),
+        'SCAN_CONCURRENCY': str(args.scan_concurrency),
+        'PRO_URL_ASCAP': f"{stub_url}/ascap",
+        'PRO_URL_BMI': f"{stub_url}/bmi",
+        # The stub server is local, so don't let rate limits dominate
+        'PRO_RATE_LIMIT': '10000,10000',
+        'PRO_CACHE_PATH': args.cache_path or '',
+        'AUDITS_ENABLED': os.environ.get('AUDITS_ENABLED', '0'),
+        'PYTHONPATH': os.pathsep.join(filter(None, [str(BACKEND_DIR), os.environ.get('PYTHONPATH')])),
+    }
+    return subprocess.Popen(
+        [sys.executable, '-m', 'api.app'],
+        cwd=API_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+
+
+async def wait_healthy(client: httpx.AsyncClient, base_url: str, timeout: float) -> float:
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        try:
+            response = await client.get(f"{base_url}/api/health")
+            if response.status_code == 200:
+                return time.perf_counter() - started
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.02)
+    raise TimeoutError(f"API did not become healthy within {timeout}s")
+
+
+async def run_load(client: httpx.AsyncClient, base_url: str, args: argparse.Namespace) -> Dict:
+    rng = random.Random(args.seed)
+    catalogs = [make_catalog(rng, args.catalog_size, args.distinct_titles) for _ in range(args.requests)]
+    latencies: List[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(catalog: List[Dict]) -> None:
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.post(f"{base_url}/api/scan-catalog", json=catalog)
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+            except httpx.HTTPError:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(catalog) for catalog in catalogs))
+    elapsed = time.perf_counter() - started
+
+    return {
+        'requests': args.requests,
+        'errors': errors,
+        'elapsed_s': elapsed,
+        'requests_per_s': len(latencies) / elapsed if elapsed else 0.0,
+        'tracks_per_s': len(latencies) * args.catalog_size / elapsed if elapsed else 0.0,
+        'latency_s': {
+            'mean': statistics.fmean(latencies) if latencies else 0.0,
+            'p50': percentile(latencies, 50),
+            'p95': percentile(latencies, 95),
+            'p99': percentile(latencies, 99),
+            'max': max(latencies, default=0.0),
+        },
+    }
+
+
+async def main(args: argparse.Namespace) -> Dict:
+    base_url = f"http://127.0.0.1:{args.port}"
+    with StubPROServer(latency=args.stub_latency) as stub:
+        spawned = time.perf_counter()
+        process = start_api(args.port, stub.url, args)
+        try:
+            limits = httpx.Limits(max_connections=args.concurrency * 2)
+            async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+                await wait_healthy(client, base_url, args.timeout)
+                ready_s = time.perf_counter() - spawned
+
+                first_started = time.perf_counter()
+                response = await client.post(
+                    f"{base_url}/api/scan-catalog",
+                    json=make_catalog(random.Random(args.seed + 1), args.catalog_size, args.distinct_titles)
+                )
+                response.raise_for_status()
+                first_scan_s = time.perf_counter() - first_started
+
+                load = await run_load(client, base_url, args)
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=args.timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    return {
+        'config': {
+            'workers': args.workers,
+            'scan_concurrency': args.scan_concurrency,
+            'concurrency': args.concurrency,
+            'catalog_size': args.catalog_size,
+            'stub_latency_s': args.stub_latency,
+            'cache': bool(args.cache_path),
+            'seed': args.seed,
+        },
+        'cold_start': {
+            'ready_s': ready_s,
+            'first_scan_s': first_scan_s,
+        },
+        'load': load,
+    }
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Load test the scanner API against a stub PRO server')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--workers', type=int, default=1, help='uvicorn worker processes')
+    parser.add_argument('--scan-concurrency', type=int, default=10, help='tracks scanned at once per worker')
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--concurrency', type=int, default=10, help='requests in flight at once')
+    parser.add_argument('--catalog-size', type=int, default=10, help='tracks per request')
+    parser.add_argument('--distinct-titles', type=int, default=1000)
+    parser.add_argument('--stub-latency', type=float, default=0.02, help='stub response time in seconds')
+    parser.add_argument('--cache-path', default=None, help='enable the response cache at this path')
+    parser.add_argument('--timeout', type=float, default=60.0)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write the JSON results here instead of stdout')
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    results = asyncio.run(main(args))
+    text = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + '\n')
+    else:
+        print(text)
@@ -0,0 +1,126 @@
+"""
+Benchmark for PROScanner.batch_scan_catalog against the stub PRO server
+
+Scans seeded catalogs in-process, with the response cache off so every
+lookup reaches the stub, and writes results in the same JSON format as
+the audit benchmarks (packages/backend/benchmarks), so the two can be
+compared across commits with the same tooling:
+
+    python -m benchmarks.scan_bench --tracks 500 --stub-latency 0.02 --output scan.json
+"""
+import argparse
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from benchmarks.stub_pro_server import Faults, StubPROServer, stub_sources
+from services.pro_scanner import PROScanner
+
+
+def make_catalog(rng: random.Random, size: int, missing_rate: float) -> List[Dict]:
+    return [
+        {
+            'title': f"Track {serial}" + (' missing' if rng.random() < missing_rate else ''),
+            'artist': f"Artist {rng.randrange(200)}"
+        }
+        for serial in range(size)
+    ]
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args: argparse.Namespace) -> Dict:
+    catalog = make_catalog(random.Random(args.seed), args.tracks, args.missing_rate)
+    samples = []
+    faults = Faults(error_rate=args.error_rate, error_status=args.error_status, retry_after=args.retry_after)
+    with StubPROServer(latency=args.stub_latency, faults=faults, seed=args.seed) as stub:
+        for _ in range(args.repeat):
+            # batch_scan_catalog closes the scanner, so use a new one per run
+            scanner = PROScanner(
+                sources=stub_sources(stub.url, args.sources),
+                track_deadline=args.track_deadline,
+                max_concurrency=args.concurrency,
+                cache=None,
+                default_rate_limit=(args.rate_limit, args.rate_limit)
+            )
+            started = time.perf_counter()
+            report = scanner.batch_scan_catalog(catalog)
+            samples.append(time.perf_counter() - started)
+
+    median = statistics.median(samples)
+    return {
+        'suite': 'scan',
+        'meta': {
+            'commit': git_commit(),
+            'python': sys.version.split()[0],
+            'platform': platform.platform(),
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'seed': args.seed,
+        },
+        'results': [{
+            'name': 'batch_scan_catalog',
+            'params': {
+                'tracks': args.tracks,
+                'sources': list(args.sources),
+                'concurrency': args.concurrency,
+                'stub_latency_s': args.stub_latency,
+                'missing_rate': args.missing_rate,
+                'error_rate': args.error_rate,
+                'error_status': args.error_status,
+            },
+            'repeat': len(samples),
+            'seconds': {
+                'min': min(samples),
+                'median': median,
+                'mean': statistics.fmean(samples),
+                'max': max(samples),
+            },
+            'throughput': {'tracks_per_s': args.tracks / median if median else 0.0},
+            'extra': {
+                'issues_found': report['issues_found'],
+                'tracks_incomplete': report['tracks_incomplete'],
+            },
+        }],
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark batch_scan_catalog against a stub PRO server')
+    parser.add_argument('--tracks', type=int, default=200)
+    parser.add_argument(
+        '--sources', default='ascap,bmi', type=lambda value: [key.strip() for key in value.split(',') if key.strip()],
+        help='comma-separated PRO sources to search, all served by the stub'
+    )
+    parser.add_argument('--track-deadline', type=float, default=20.0, help='seconds allowed per track')
+    parser.add_argument('--concurrency', type=int, default=10, help='tracks scanned at once')
+    parser.add_argument('--stub-latency', type=float, default=0.02, help='stub response time in seconds')
+    parser.add_argument('--missing-rate', type=float, default=0.1, help='share of titles the stub does not find')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of stub requests that fail')
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--retry-after', type=float, default=None, help='Retry-After seconds on stub errors')
+    parser.add_argument('--rate-limit', type=float, default=10000.0, help='requests per second per host')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='write the JSON results here instead of stdout')
+    args = parser.parse_args()
+
+    text = json.dumps(run(args), indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
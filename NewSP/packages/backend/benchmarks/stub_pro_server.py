@@ -0,0 +1,180 @@
+"""
+Local stand-in for the PRO repertory sites, for benchmarks and load tests
+
+Every GET returns a one-row ASCAP-style results table for the searched
+title after `latency` seconds. Titles containing "missing" get an empty
+page, so "not found" paths can be exercised too.
+
+Faults can be injected to exercise retries, rate adaptation and the
+circuit breaker: a share of requests can fail with an error status
+(optionally with Retry-After) or answer slowly, and `faults` can be
+swapped while the server runs, e.g. to take it "down" and back up.
+
+    python -m benchmarks.stub_pro_server --port 9100 --latency 0.05 --error-rate 0.2
+"""
+import argparse
+import copy
+import random
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from html import escape
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Iterable, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from services.extractors import ASCAP_EXTRACTOR
+from services.sources import DEFAULT_SOURCES, PROSource, SourceRegistry
+
+RESULT_PAGE = (
+    '<html><body><table class="results"><tbody>'
+    '<tr><td>{title}</td><td>Writer</td><td>Publisher</td><td>T-000.000.000-0</td></tr>'
+    '</tbody></table></body></html>'
+)
+EMPTY_PAGE = '<html><body><p>No results</p></body></html>'
+
+
+def stub_sources(url: str, keys: Iterable[str]) -> SourceRegistry:
+    """Sources for `keys` served by the stub at `url`, each reading the
+    stub's ASCAP-style pages; the production sources are left untouched"""
+    sources = SourceRegistry()
+    for key in keys:
+        source = copy.copy(DEFAULT_SOURCES.get(key) or PROSource(key, key.upper()))
+        source.url = f"{url}/{key}"
+        source.extractor = ASCAP_EXTRACTOR
+        sources.register(source)
+    return sources
+
+
+@dataclass(frozen=True)
+class Faults:
+    # Share of requests answered with `error_status`
+    error_rate: float = 0.0
+    error_status: int = 503
+    # Sent with error responses when set
+    retry_after: Optional[float] = None
+    # Share of requests delayed by an extra `slow_latency` seconds
+    slow_rate: float = 0.0
+    slow_latency: float = 0.0
+
+
+class StubPROHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    latency = 0.0
+
+    def do_GET(self) -> None:
+        stub: 'StubPROServer' = self.server.stub
+        path = urlsplit(self.path).path
+        query = parse_qs(urlsplit(self.path).query)
+        title = (query.get('title') or query.get('Main_Search') or [''])[0]
+        faults = stub.faults
+        failed, slow = stub.roll(faults)
+
+        delay = self.latency + (faults.slow_latency if slow else 0.0)
+        if delay:
+            time.sleep(delay)
+        if failed:
+            stub.count(path, str(faults.error_status))
+            self._send(faults.error_status, b'', faults.retry_after)
+            return
+
+        stub.count(path, 'ok')
+        page = EMPTY_PAGE if 'missing' in title.lower() else RESULT_PAGE.format(title=escape(title))
+        self._send(200, page.encode('utf-8'))
+
+    def _send(self, status: int, body: bytes, retry_after: Optional[float] = None) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        if retry_after is not None:
+            self.send_header('Retry-After', f"{retry_after:g}")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    # Scans open many connections at once; the default backlog of 5
+    # makes the extra connects wait for SYN retries
+    request_queue_size = 256
+
+
+class StubPROServer:
+    """Threaded stub server; use as a context manager or call start/stop
+
+    `requests` counts served requests by (path, outcome), where outcome
+    is 'ok' or the injected error status.
+    """
+
+    def __init__(
+        self,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        latency: float = 0.0,
+        faults: Optional[Faults] = None,
+        seed: int = 1
+    ):
+        handler = type('Handler', (StubPROHandler,), {'latency': latency})
+        self._server = _Server((host, port), handler)
+        self._server.stub = self
+        self._thread: Optional[threading.Thread] = None
+        self.faults = faults or Faults()
+        self.requests: Counter = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def roll(self, faults: Faults) -> Tuple[bool, bool]:
+        """Decide whether the next request fails and whether it is slow"""
+        with self._lock:
+            return self._rng.random() < faults.error_rate, self._rng.random() < faults.slow_rate
+
+    def count(self, path: str, outcome: str) -> None:
+        with self._lock:
+            self.requests[path, outcome] += 1
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'StubPROServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'StubPROServer':
+        return self.start()
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9100)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds per response')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests that fail')
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--retry-after', type=float, default=None, help='Retry-After seconds on errors')
+    parser.add_argument('--slow-rate', type=float, default=0.0, help='share of requests answered slowly')
+    parser.add_argument('--slow-latency', type=float, default=3.0, help='extra seconds for slow requests')
+    args = parser.parse_args()
+
+    server = StubPROServer(args.host, args.port, args.latency, Faults(
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        retry_after=args.retry_after,
+        slow_rate=args.slow_rate,
+        slow_latency=args.slow_latency
+    ))
+    print(f"Stub PRO server on {server.url}")
+    server._server.serve_forever()
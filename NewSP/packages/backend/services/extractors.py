@@ -0,0 +1,79 @@
+from typing import Dict, List, Optional, Sequence
+import logging
+
+from bs4 import BeautifulSoup
+from lxml import etree, html
+
+logger = logging.getLogger(__name__)
+
+
+class ResultExtractor:
+    """
+    Turns a repertory result page into a list of result dicts
+
+    Pages are parsed straight from the response bytes with lxml and
+    read with precompiled XPath. If the fast path raises, the page is
+    parsed again with BeautifulSoup so one malformed page does not lose
+    a result.
+    """
+
+    def extract(self, content: bytes, encoding: Optional[str] = None) -> List[Dict]:
+        if not content.strip():
+            return []
+        try:
+            return self._extract_lxml(content, encoding)
+        except Exception as e:
+            logger.warning(f"{type(self).__name__} lxml extraction failed, falling back: {e}")
+            return self._extract_soup(BeautifulSoup(content, 'lxml', from_encoding=encoding))
+
+    def _extract_lxml(self, content: bytes, encoding: Optional[str]) -> List[Dict]:
+        raise NotImplementedError
+
+    def _extract_soup(self, soup: BeautifulSoup) -> List[Dict]:
+        raise NotImplementedError
+
+    @staticmethod
+    def _parse(content: bytes, encoding: Optional[str]) -> etree._Element:
+        parser = html.HTMLParser(encoding=encoding) if encoding else None
+        return html.fromstring(content, parser=parser)
+
+
+class TableExtractor(ResultExtractor):
+    """
+    Extracts rows of a results table, mapping cells to `columns` by position
+    """
+
+    def __init__(self, table_class: str, columns: Sequence[str]):
+        self.table_class = table_class
+        self.columns = tuple(columns)
+        # Same rows as the CSS selector `table.<class> tbody tr`
+        self._rows = etree.XPath(
+            f"//table[contains(concat(' ', normalize-space(@class), ' '), ' {table_class} ')]//tbody//tr"
+        )
+        self._cells = etree.XPath('.//td')
+
+    def _extract_lxml(self, content: bytes, encoding: Optional[str]) -> List[Dict]:
+        results = []
+        for row in self._rows(self._parse(content, encoding)):
+            cells = self._cells(row)
+            if len(cells) >= len(self.columns):
+                results.append({
+                    name: cell.text_content().strip()
+                    for name, cell in zip(self.columns, cells)
+                })
+        return results
+
+    def _extract_soup(self, soup: BeautifulSoup) -> List[Dict]:
+        results = []
+        for row in soup.select(f'table.{self.table_class} tbody tr'):
+            cells = row.find_all('td')
+            if len(cells) >= len(self.columns):
+                results.append({
+                    name: cell.text.strip()
+                    for name, cell in zip(self.columns, cells)
+                })
+        return results
+
+
+# Extract data based on ASCAP's HTML structure
+ASCAP_EXTRACTOR = TableExtractor('results', ('title', 'writers', 'publishers', 'iswc'))
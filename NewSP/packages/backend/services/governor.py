@@ -0,0 +1,168 @@
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+import httpx
+
+try:
+    from services.rate_limit import TokenBucket
+except ImportError:
+    from rate_limit import TokenBucket
+
+# Statuses that mean "try again later" rather than "no such page"
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+class PROUnavailable(Exception):
+    """A PRO host could not answer; its results are unknown, not empty"""
+
+
+@dataclass(frozen=True)
+class RequestPolicy:
+    """How requests to one PRO host are paced, retried and cut off"""
+    # Additive increase per healthy response (requests/s) and
+    # multiplicative decrease on overload, within [min_rate, max_rate]
+    min_rate: float = 0.2
+    max_rate: float = 10.0
+    increase: float = 0.1
+    decrease: float = 0.5
+    # A response slower than this counts as overload
+    latency_target: float = 2.0
+    # At most one decrease per this many seconds, so a burst of failed
+    # responses to requests sent at the old rate only backs off once
+    decrease_cooldown: float = 1.0
+    # Attempts per request, with full-jitter exponential backoff between
+    # them; a Retry-After longer than backoff_max is not waited for
+    max_attempts: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 30.0
+    # Consecutive failed attempts that open the circuit, and how long it
+    # stays open before a probe request is let through
+    failure_threshold: int = 5
+    reset_timeout: float = 30.0
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Parse a Retry-After header given in seconds or as an HTTP date"""
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class CircuitBreaker:
+    """
+    Stops sending requests to a host that keeps failing
+
+    Opens after `failure_threshold` consecutive failures. While open,
+    `allow()` is False except for one probe per `reset_timeout`; the
+    probe's success closes the circuit and its failure keeps it open.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self._opened_at: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    @property
+    def blocking(self) -> bool:
+        """Open and not yet due for a probe; unlike allow(), takes no probe"""
+        return self._opened_at is not None and time.monotonic() - self._opened_at < self.reset_timeout
+
+    def allow(self) -> bool:
+        if self._opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self._opened_at >= self.reset_timeout:
+            # Let this request probe; the next one waits another timeout
+            self._opened_at = now
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.failure_threshold and self._opened_at is None:
+            self._opened_at = time.monotonic()
+
+
+class HostGovernor:
+    """
+    Paces requests to one host: a token bucket whose rate is adjusted
+    AIMD-style from response outcomes, plus retry backoff and a circuit
+    breaker. Callers run the request loop (see PROScanner._get) and
+    report each attempt back here.
+    """
+
+    def __init__(self, rate: float, burst: int, policy: RequestPolicy):
+        self.policy = policy
+        self.min_rate = min(policy.min_rate, rate)
+        # Never slower to start than the configured rate allows
+        self.max_rate = max(policy.max_rate, rate)
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(policy.failure_threshold, policy.reset_timeout)
+        self._last_decrease = 0.0
+
+    @property
+    def rate(self) -> float:
+        return self.bucket.rate
+
+    async def acquire(self) -> bool:
+        """Wait for a request slot; False when the circuit is open, including
+        when it opens while this request is queued"""
+        if not await self.bucket.acquire(abort=lambda: self.breaker.blocking):
+            return False
+        return self.breaker.allow()
+
+    def record_success(self, latency: float) -> None:
+        self.breaker.record_success()
+        if latency > self.policy.latency_target:
+            self._back_off()
+        else:
+            self.bucket.set_rate(min(self.max_rate, self.rate + self.policy.increase))
+
+    def record_failure(self, overloaded: bool = True) -> None:
+        """A failed attempt; `overloaded` also lowers the rate"""
+        self.breaker.record_failure()
+        if overloaded:
+            self._back_off()
+
+    def _back_off(self) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.policy.decrease_cooldown:
+            return
+        self._last_decrease = now
+        self.bucket.set_rate(max(self.min_rate, self.rate * self.policy.decrease))
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> Optional[float]:
+        """Seconds to wait before retry number `attempt` (from 1), or None
+        when the request should not be retried"""
+        if attempt >= self.policy.max_attempts or self.breaker.is_open:
+            return None
+        delay = random.uniform(0, min(self.policy.backoff_max, self.policy.backoff_base * 2 ** (attempt - 1)))
+        if retry_after is not None:
+            if retry_after > self.policy.backoff_max:
+                return None
+            delay = max(delay, retry_after)
+        return delay
@@ -0,0 +1,248 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+CacheKey = Tuple[str, str, str]
+
+
+def normalize_query(text: Optional[str]) -> str:
+    """Casefold and collapse whitespace so trivially different queries share an entry"""
+    return ' '.join((text or '').split()).casefold()
+
+
+class PROResponseCache:
+    """
+    Persistent cache of repertory search results
+
+    Entries are keyed on (PRO, normalized title, normalized artist) and
+    stored in SQLite. Found results live for `ttl` seconds and "not
+    found" results for the shorter `negative_ttl`. Once the table holds
+    more than `max_entries` rows, the least recently used ones are
+    evicted. The most recent lookups are also kept in memory, so a
+    repeat lookup in the same process skips the database.
+
+    Everything but `peek` touches SQLite, so async callers run it in a
+    thread. Access times are buffered and written `touch_batch` at a
+    time rather than on every hit, and the table size is read back from
+    the database every `size_check_interval` writes, so processes
+    sharing the file agree on it.
+    """
+
+    def __init__(
+        self,
+        path: str = 'pro_cache.db',
+        ttl: float = 7 * 24 * 3600,
+        negative_ttl: float = 24 * 3600,
+        max_entries: int = 500_000,
+        memory_entries: int = 10_000,
+        touch_batch: int = 256,
+        size_check_interval: int = 100
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max(1, max_entries)
+        self.memory_entries = max(0, memory_entries)
+        self.touch_batch = max(1, touch_batch)
+        self.size_check_interval = max(1, size_check_interval)
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._memory: 'OrderedDict[CacheKey, Tuple[float, List[Dict]]]' = OrderedDict()
+        # Access times not yet written to last_access
+        self._touched: Dict[CacheKey, float] = {}
+        self._writes = 0
+        # The connection and the in-memory entries are locked separately,
+        # so memory hits never wait behind a database write
+        self._lock = threading.Lock()
+        self._memory_lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS pro_responses (
+                    pro TEXT NOT NULL,
+                    title TEXT NOT NULL,
+                    artist TEXT NOT NULL,
+                    results TEXT NOT NULL,
+                    expires_at REAL NOT NULL,
+                    last_access REAL NOT NULL,
+                    PRIMARY KEY (pro, title, artist)
+                )
+            ''')
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS pro_responses_last_access ON pro_responses (last_access)'
+            )
+
+    @staticmethod
+    def key(pro: str, title: Optional[str], artist: Optional[str]) -> CacheKey:
+        return (pro.lower(), normalize_query(title), normalize_query(artist))
+
+    def peek(self, pro: str, title: Optional[str], artist: Optional[str]) -> Optional[List[Dict]]:
+        """Results from the in-memory entries only; never waits on the
+        database, so it is safe to call on the event loop"""
+        return self._from_memory(self.key(pro, title, artist), time.time())
+
+    def get(self, pro: str, title: Optional[str], artist: Optional[str]) -> Optional[List[Dict]]:
+        """Cached results, or None on a miss (an empty list is a cached "not found")"""
+        key = self.key(pro, title, artist)
+        now = time.time()
+        results = self._from_memory(key, now)
+        if results is not None:
+            return results
+
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT results, expires_at FROM pro_responses WHERE pro = ? AND title = ? AND artist = ?',
+                key
+            ).fetchone()
+            if row is not None and row[1] <= now:
+                with self._conn:
+                    self._conn.execute(
+                        'DELETE FROM pro_responses WHERE pro = ? AND title = ? AND artist = ?', key
+                    )
+                row = None
+            if row is not None and self._touch(key, now) >= self.touch_batch:
+                with self._conn:
+                    self._flush_touches()
+
+        if row is None:
+            with self._memory_lock:
+                self._memory.pop(key, None)
+                self._touched.pop(key, None)
+                self.misses += 1
+            return None
+        results = json.loads(row[0])
+        with self._memory_lock:
+            self._remember(key, row[1], results)
+            return self._hit(results)
+
+    def put(self, pro: str, title: Optional[str], artist: Optional[str], results: List[Dict]) -> None:
+        """Store results; an empty list is cached with the negative TTL"""
+        key = self.key(pro, title, artist)
+        now = time.time()
+        expires_at = now + (self.ttl if results else self.negative_ttl)
+
+        with self._lock:
+            with self._conn:
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO pro_responses VALUES (?, ?, ?, ?, ?, ?)',
+                    (*key, json.dumps(results), expires_at, now)
+                )
+                self._writes += 1
+                if (self._writes - 1) % self.size_check_interval == 0:
+                    # Flushed first so eviction sees recent hits
+                    self._flush_touches()
+                    size = self._count()
+                    if size > self.max_entries:
+                        self._evict(size - self.max_entries)
+        with self._memory_lock:
+            self._touched.pop(key, None)
+            self._remember(key, expires_at, results)
+
+    def warm(self, limit: int) -> int:
+        """Load the most recently used unexpired entries into memory"""
+        limit = min(limit, self.memory_entries)
+        if limit <= 0:
+            return 0
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT pro, title, artist, results, expires_at FROM pro_responses '
+                'WHERE expires_at > ? ORDER BY last_access DESC LIMIT ?',
+                (time.time(), limit)
+            ).fetchall()
+        with self._memory_lock:
+            # Oldest first, so the most recent end up at the LRU's fresh end
+            for pro, title, artist, results, expires_at in reversed(rows):
+                self._remember((pro, title, artist), expires_at, json.loads(results))
+        return len(rows)
+
+    def stats(self) -> Dict[str, int]:
+        """Counters for this process; `entries` is the shared table's size"""
+        with self._lock:
+            entries = self._count()
+        return {
+            'hits': self.hits,
+            'negative_hits': self.negative_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': entries,
+        }
+
+    def flush(self) -> None:
+        """Write buffered access times"""
+        with self._lock, self._conn:
+            self._flush_touches()
+
+    def clear(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute('DELETE FROM pro_responses')
+        with self._memory_lock:
+            self._memory.clear()
+            self._touched.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            with self._conn:
+                self._flush_touches()
+            self._conn.close()
+
+    def _from_memory(self, key: CacheKey, now: float) -> Optional[List[Dict]]:
+        with self._memory_lock:
+            entry = self._memory.get(key)
+            if entry is None or entry[0] <= now:
+                return None
+            self._memory.move_to_end(key)
+            self._touched[key] = now
+            return self._hit(entry[1])
+
+    def _touch(self, key: CacheKey, now: float) -> int:
+        """Buffer an access time; returns how many are buffered"""
+        with self._memory_lock:
+            self._touched[key] = now
+            return len(self._touched)
+
+    def _flush_touches(self) -> None:
+        # Caller holds the database lock and an open transaction
+        with self._memory_lock:
+            touched, self._touched = self._touched, {}
+        if touched:
+            self._conn.executemany(
+                'UPDATE pro_responses SET last_access = MAX(last_access, ?) '
+                'WHERE pro = ? AND title = ? AND artist = ?',
+                [(when, *key) for key, when in touched.items()]
+            )
+
+    def _count(self) -> int:
+        return self._conn.execute('SELECT COUNT(*) FROM pro_responses').fetchone()[0]
+
+    def _hit(self, results: List[Dict]) -> List[Dict]:
+        self.hits += 1
+        if not results:
+            self.negative_hits += 1
+        return results
+
+    def _remember(self, key: CacheKey, expires_at: float, results: List[Dict]) -> None:
+        if not self.memory_entries:
+            return
+        self._memory[key] = (expires_at, results)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self, count: int) -> None:
+        # Caller holds the database lock and an open transaction
+        victims = self._conn.execute(
+            'SELECT pro, title, artist FROM pro_responses ORDER BY last_access LIMIT ?', (count,)
+        ).fetchall()
+        self._conn.executemany(
+            'DELETE FROM pro_responses WHERE pro = ? AND title = ? AND artist = ?', victims
+        )
+        with self._memory_lock:
+            for victim in victims:
+                self._memory.pop(tuple(victim), None)
+            self.evictions += len(victims)
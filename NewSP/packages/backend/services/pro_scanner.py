@@ -1,158 +1,494 @@
-import requests
-from bs4 import BeautifulSoup
-import time
+import asyncio
+import httpx
 import random
-from typing import List, Dict, Optional
+import time
+from typing import AsyncIterator, List, Dict, Optional, Set, Tuple, Union
+from urllib.parse import urlsplit
 import logging
 
+try:
+    from services.governor import RETRYABLE_STATUS, HostGovernor, PROUnavailable, RequestPolicy, retry_after_seconds
+    from services.metrics import REGISTRY
+    from services.pro_cache import PROResponseCache, normalize_query
+    from services.single_flight import SingleFlight
+    from services.sources import DEFAULT_SOURCES, PROSource, SourceRegistry
+except ImportError:
+    from governor import RETRYABLE_STATUS, HostGovernor, PROUnavailable, RequestPolicy, retry_after_seconds
+    from metrics import REGISTRY
+    from pro_cache import PROResponseCache, normalize_query
+    from single_flight import SingleFlight
+    from sources import DEFAULT_SOURCES, PROSource, SourceRegistry
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+PRO_REQUEST_SECONDS = REGISTRY.histogram(
+    'pro_request_seconds', 'PRO repertory request latency, by outcome', ['pro', 'outcome']
+)
+PRO_RESPONSE_BYTES = REGISTRY.counter('pro_response_bytes_total', 'Bytes received from PRO repertories', ['pro'])
+PRO_RETRIES = REGISTRY.counter('pro_request_retries_total', 'Retried PRO repertory requests', ['pro'])
+PRO_PARSE_SECONDS = REGISTRY.histogram('pro_parse_seconds', 'Time spent parsing PRO result pages', ['pro'])
+PRO_CACHE_LOOKUPS = REGISTRY.counter('pro_cache_lookups_total', 'Response cache lookups, by result', ['pro', 'result'])
+PRO_REQUEST_RATE = REGISTRY.gauge('pro_request_rate', 'Current adaptive request rate per PRO host', ['host'])
+PRO_CIRCUIT_OPEN = REGISTRY.gauge('pro_circuit_open', '1 while requests to a PRO host are cut off', ['host'])
+PRO_UNAVAILABLE = REGISTRY.counter('pro_unavailable_total', 'PRO searches whose results are unknown', ['pro'])
+PRO_DEADLINE_EXCEEDED = REGISTRY.counter(
+    'pro_deadline_exceeded_total', 'PRO searches cut off by the per-track deadline', ['pro']
+)
+SCANS_CANCELLED = REGISTRY.counter(
+    'scan_tracks_cancelled_total', 'Track scans cancelled because a shutdown drain timed out'
+)
+PRO_COALESCED = REGISTRY.counter(
+    'pro_coalesced_lookups_total', 'PRO searches that joined an identical in-flight search', ['pro']
+)
+
 class PROScanner:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
+    # Starting requests per second and burst size per PRO host; the rate
+    # then adapts to how the host responds (see RequestPolicy)
+    DEFAULT_RATE_LIMIT = (1.0, 2)
+
+    def __init__(
+        self,
+        urls: Optional[Dict[str, str]] = None,
+        max_concurrency: int = 10,
+        rate_limits: Optional[Dict[str, Tuple[float, int]]] = None,
+        timeout: float = 10.0,
+        cache: Union[PROResponseCache, str, None] = 'pro_cache.db',
+        max_connections: Optional[int] = None,
+        max_keepalive: Optional[int] = None,
+        default_rate_limit: Optional[Tuple[float, int]] = None,
+        request_policy: Optional[RequestPolicy] = None,
+        sources: Optional[SourceRegistry] = None,
+        track_deadline: Optional[float] = 20.0
+    ):
+        """
+        urls: override repertory endpoints by PRO key (e.g. a local stub
+            server); also enables sources that have no default endpoint
+        max_concurrency: tracks scanned at once
+        rate_limits: (requests per second, burst) per host
+        cache: response cache, or a path to open one at; None disables caching
+        max_connections / max_keepalive: HTTP pool size (defaults scale
+            with max_concurrency and the number of sources)
+        default_rate_limit: used for hosts missing from rate_limits
+        request_policy: rate adaptation, retry and circuit-breaker settings
+            for sources that don't set their own
+        sources: PRO sources to search (DEFAULT_SOURCES by default); every
+            source with a URL is searched for each track
+        track_deadline: seconds to wait for all sources of one track;
+            sources still searching after that are reported unknown
+        """
+        self.sources = (sources or DEFAULT_SOURCES).configure(urls or {})
+        self.track_deadline = track_deadline
+        self.max_concurrency = max(1, max_concurrency)
+        self.rate_limits = rate_limits or {}
+        self.default_rate_limit = default_rate_limit or self.DEFAULT_RATE_LIMIT
+        self.request_policy = request_policy or RequestPolicy()
+        # Each track in flight searches every enabled source at once
+        self.max_connections = max_connections or self.max_concurrency * max(1, len(self.sources.enabled()))
+        self.max_keepalive = max_keepalive or self.max_concurrency
+        self.timeout = timeout
+        self.cache = PROResponseCache(cache) if isinstance(cache, str) else cache
+        self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
-    
-    def search_ascap(self, title: str, artist: Optional[str] = None) -> List[Dict]:
+        }
+        self._client: Optional[httpx.AsyncClient] = None
+        self._governors: Dict[str, HostGovernor] = {}
+        # Identical searches in flight at once share one request
+        self._flights = SingleFlight()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Tracks being scanned right now, and catalog scan tasks with those
+        # still waiting for a slot under max_concurrency, for drain()
+        self._active = 0
+        self._idle: Optional[asyncio.Event] = None
+        self._scans: Set[asyncio.Task] = set()
+        self._waiting: Set[asyncio.Task] = set()
+
+    async def open(self, warm_cache: int = 0) -> None:
+        """Create the connection pool up front and optionally preload
+        the `warm_cache` most recently used cache entries into memory"""
+        self._ensure_open()
+        if warm_cache and self.cache is not None:
+            await asyncio.to_thread(self.cache.warm, warm_cache)
+
+    async def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait for track scans to finish, including catalog tracks still
+        waiting for a scan slot. On timeout the rest are cancelled, counted
+        in scan_tracks_cancelled_total and logged, and False is returned."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        scans = {task for task in self._scans if not task.done()}
+        if scans:
+            _, scans = await asyncio.wait(scans, timeout=timeout)
+        if not scans and self._active:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                await asyncio.wait_for(self._idle.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+        if not scans:
+            if not self._active:
+                return True
+            # Tracks scanned with scan_track directly; their callers own them
+            logger.warning(f"Scan drain timed out with {self._active} track scan(s) still running")
+            return False
+
+        queued = len(scans & self._waiting)
+        running = len(scans) - queued
+        for task in scans:
+            task.cancel()
+        SCANS_CANCELLED.inc(len(scans))
+        logger.warning(f"Scan drain timed out: cancelled {running} running and {queued} queued track scan(s)")
+        return False
+
+    async def __aenter__(self) -> 'PROScanner':
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client"""
+        if self._client is not None:
+            await self._client.aclose()
+        self._client = None
+        self._governors = {}
+        self._flights = SingleFlight()
+        self._loop = None
+
+    def _ensure_open(self) -> None:
+        # Client and limiters are bound to the event loop that created them
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._client is not None:
+            return
+        self._loop = loop
+        self._governors = {}
+        self._flights = SingleFlight()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._scans = set()
+        self._waiting = set()
+        self._client = httpx.AsyncClient(
+            headers=self.headers,
+            timeout=self.timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive
+            )
+        )
+
+    def _governor(self, source: PROSource) -> HostGovernor:
+        # Sources on the same host share one governor, created with the
+        # settings of the first source seen there
+        host = urlsplit(source.url).netloc
+        if host not in self._governors:
+            rate, burst = self.rate_limits.get(host) or source.rate_limit or self.default_rate_limit
+            self._governors[host] = HostGovernor(rate, burst, source.policy or self.request_policy)
+        return self._governors[host]
+
+    async def _get(self, source: PROSource, params: Dict) -> httpx.Response:
+        """GET through the shared client, paced and retried per host.
+
+        Timeouts, connection errors and 429/5xx responses are retried
+        with backoff and slow the host down. Raises PROUnavailable once
+        retries run out or the host's circuit is open, so callers can
+        tell "unknown" from "not found".
         """
-        Search ASCAP Repertory for a track using lxml parser
+        self._ensure_open()
+        pro, url = source.key, source.url
+        governor = self._governor(source)
+        host = urlsplit(url).netloc
+        attempt = 0
+        while True:
+            if not await governor.acquire():
+                raise PROUnavailable(f"{host} is failing; circuit open")
+            attempt += 1
+            retry_after = None
+            started = time.perf_counter()
+            try:
+                response = await self._client.get(url, params=params)
+            except httpx.TransportError as e:
+                governor.record_failure()
+                error = repr(e)
+            else:
+                if response.status_code not in RETRYABLE_STATUS:
+                    elapsed = time.perf_counter() - started
+                    if response.is_error:
+                        # Other 4xx mean the request itself is wrong; not retried
+                        PRO_REQUEST_SECONDS.labels(pro=pro, outcome='error').observe(elapsed)
+                        response.raise_for_status()
+                    governor.record_success(elapsed)
+                    PRO_REQUEST_SECONDS.labels(pro=pro, outcome='ok').observe(elapsed)
+                    PRO_RESPONSE_BYTES.labels(pro=pro).inc(len(response.content))
+                    self._observe_governor(host, governor)
+                    return response
+                governor.record_failure()
+                retry_after = retry_after_seconds(response)
+                error = f"HTTP {response.status_code}"
+
+            PRO_REQUEST_SECONDS.labels(pro=pro, outcome='error').observe(time.perf_counter() - started)
+            self._observe_governor(host, governor)
+            delay = governor.backoff(attempt, retry_after)
+            if delay is None:
+                raise PROUnavailable(f"{host}: {error} after {attempt} attempt(s)")
+            PRO_RETRIES.labels(pro=pro).inc()
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    def _observe_governor(host: str, governor: HostGovernor) -> None:
+        PRO_REQUEST_RATE.labels(host=host).set(governor.rate)
+        PRO_CIRCUIT_OPEN.labels(host=host).set(1 if governor.breaker.is_open else 0)
+
+    async def _extract(self, source: PROSource, response: httpx.Response) -> List[Dict]:
+        """Parse a result page in a worker thread so large pages don't
+        stall the event loop"""
+        with PRO_PARSE_SECONDS.labels(pro=source.key).time():
+            return await asyncio.to_thread(
+                source.parse, response.content, response.charset_encoding
+            )
+
+    async def _cached(self, pro: str, title: str, artist: Optional[str]) -> Optional[List[Dict]]:
+        """Cached results for a search, or None when it has to hit the network"""
+        if self.cache is None:
+            return None
+        # Memory hits are answered inline; only SQLite lookups go to a thread
+        results = self.cache.peek(pro, title, artist)
+        if results is None:
+            results = await asyncio.to_thread(self.cache.get, pro, title, artist)
+        PRO_CACHE_LOOKUPS.labels(pro=pro, result='miss' if results is None else 'hit').inc()
+        return results
+
+    async def search(self, pro: str, title: str, artist: Optional[str] = None) -> Optional[List[Dict]]:
         """
-        url = "https://www.ascap.com/repertory"
-        params = {'title': title}
-        if artist:
-            params['writer'] = artist
-        
+        Search one PRO source for a track; None when it could not be
+        searched (unknown, as opposed to not found). Cached results are
+        used when fresh, and identical searches (same PRO and normalized
+        title/artist) already in flight are joined rather than repeated.
+        """
+        source = self.sources.get(pro)
+        if source is None or not source.url:
+            raise ValueError(f"PRO source not enabled: {pro}")
+        if not source.can_parse:
+            # Its pages can't be read, so neither cached nor fresh results
+            # would say whether the track is registered there
+            PRO_UNAVAILABLE.labels(pro=pro).inc()
+            return None
+
+        cached = await self._cached(pro, title, artist)
+        if cached is not None:
+            return cached
+
+        self._ensure_open()
+        results, shared = await self._flights.do(
+            PROResponseCache.key(pro, title, artist),
+            lambda: self._fetch(source, title, artist)
+        )
+        if shared:
+            PRO_COALESCED.labels(pro=pro).inc()
+        return results
+
+    async def _fetch(self, source: PROSource, title: str, artist: Optional[str]) -> Optional[List[Dict]]:
         try:
-            # Respect rate limits (critical for PRO sites)
-            time.sleep(random.uniform(1, 3))
-            
-            response = self.session.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            # Use lxml parser for speed - works great with Python 3.14
-            soup = BeautifulSoup(response.text, 'lxml')
-            
-            # Your parsing logic here
-            results = []
-            # Example: find all rows in results table
-            rows = soup.select('table.results tbody tr')
-            for row in rows:
-                # Extract data based on ASCAP's HTML structure
-                cells = row.find_all('td')
-                if len(cells) >= 4:
-                    results.append({
-                        'title': cells[0].text.strip(),
-                        'writers': cells[1].text.strip(),
-                        'publishers': cells[2].text.strip(),
-                        'iswc': cells[3].text.strip()
-                    })
-                
-            logger.info(f"ASCAP search found {len(results)} results for {title}")
+            response = await self._get(source, source.search_params(title, artist))
+
+            # Parse the raw bytes with lxml; no str decode or soup tree
+            results = await self._extract(source, response)
+
+            logger.info(f"{source.name} search found {len(results)} results for {title}")
+            await self._store(source.key, title, artist, results)
             return results
-            
+
         except Exception as e:
-            logger.error(f"ASCAP search failed: {e}")
-            return []
-    
-    def search_bmi(self, title: str, artist: Optional[str] = None) -> List[Dict]:
+            logger.error(f"{source.name} search failed: {e}")
+            PRO_UNAVAILABLE.labels(pro=source.key).inc()
+            return None
+
+    async def _store(self, pro: str, title: str, artist: Optional[str], results: List[Dict]) -> None:
+        # Only completed searches are cached; failures fall through to
+        # the except blocks and are retried next time
+        if self.cache is not None:
+            await asyncio.to_thread(self.cache.put, pro, title, artist, results)
+
+    async def cache_stats(self) -> Dict[str, int]:
+        """Hit/miss counters of the response cache"""
+        return await asyncio.to_thread(self.cache.stats) if self.cache is not None else {}
+
+    async def search_ascap(self, title: str, artist: Optional[str] = None) -> Optional[List[Dict]]:
         """
-        Search BMI Repertoire
+        Search ASCAP Repertory for a track using lxml parser
         """
-        url = "https://repertoire.bmi.com/Search/Search"
-        params = {
-            'Main_Search': title,
-            'Sub_Search': 'song',
-            'View_Count': 20,
-            'Page_Number': 1
-        }
-        
-        try:
-            time.sleep(random.uniform(1, 3))
-            response = self.session.get(url, params=params, timeout=10)
-            response.raise_for_status()
-            
-            soup = BeautifulSoup(response.text, 'lxml')
-            # BMI-specific parsing logic here
-            results = []
-            # ... your BMI parsing code ...
-            
-            return results
-            
-        except Exception as e:
-            logger.error(f"BMI search failed: {e}")
-            return []
+        return await self.search('ascap', title, artist)
+
+    async def search_bmi(self, title: str, artist: Optional[str] = None) -> Optional[List[Dict]]:
+        """
+        Search BMI Repertoire; None (unknown) unless a 'bmi' source has
+        been registered, since there is no default BMI result parser
+        """
+        if 'bmi' not in self.sources:
+            return None
+        return await self.search('bmi', title, artist)
     
     def batch_scan_catalog(self, tracks: List[Dict]) -> Dict:
         """
-        Scan multiple tracks and generate audit report
+        Scan multiple tracks and generate audit report (blocking wrapper
+        around scan_catalog for callers without an event loop)
+        """
+        async def run() -> Dict:
+            try:
+                return await self.scan_catalog(tracks)
+            finally:
+                await self.aclose()
+
+        return asyncio.run(run())
+
+    async def scan_catalog(self, tracks: List[Dict]) -> Dict:
+        """
+        Scan multiple tracks concurrently and generate audit report
+        """
+        scan_results: List[Optional[Dict]] = [None] * len(tracks)
+        async for position, result in self.iter_scan_catalog(tracks):
+            scan_results[position] = result
+        return self._build_report(tracks, scan_results)
+
+    async def iter_scan_catalog(self, tracks: List[Dict]) -> AsyncIterator[Tuple[int, Dict]]:
+        """
+        Scan tracks concurrently, yielding (catalog position, result) as
+        each track finishes. Tracks with the same normalized title and
+        artist are scanned once and yielded together. Closing the
+        iterator early cancels the remaining lookups.
+        """
+        self._ensure_open()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        positions: Dict[Tuple[str, str], List[int]] = {}
+        for position, track in enumerate(tracks):
+            key = (normalize_query(track.get('title')), normalize_query(track.get('artist')))
+            positions.setdefault(key, []).append(position)
+
+        async def scan(group: List[int]) -> Tuple[List[int], Dict]:
+            async with semaphore:
+                self._waiting.discard(asyncio.current_task())
+                return group, await self.scan_track(tracks[group[0]])
+
+        pending = [asyncio.create_task(scan(group)) for group in positions.values()]
+        self._scans.update(pending)
+        self._waiting.update(pending)
+        for task in pending:
+            task.add_done_callback(self._scans.discard)
+            task.add_done_callback(self._waiting.discard)
+        try:
+            for next_done in asyncio.as_completed(pending):
+                group, result = await next_done
+                yield group[0], result
+                for position in group[1:]:
+                    yield position, {**result, 'track': tracks[position], 'issues': list(result['issues'])}
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def scan_track(self, track: Dict) -> Dict:
+        """
+        Search all enabled PRO sources for one track and analyze the findings
+        """
+        logger.info(f"Scanning {track.get('title', 'Unknown')}...")
+        self._ensure_open()
+
+        # Search across all PROs at once; wall-clock time is that of the
+        # slowest source, capped by the track deadline
+        sources = self.sources.enabled()
+        self._active += 1
+        self._idle.clear()
+        try:
+            searches = {
+                source.key: asyncio.create_task(self.search(source.key, track.get('title', ''), track.get('artist')))
+                for source in sources
+            }
+            try:
+                if searches:
+                    await asyncio.wait(searches.values(), timeout=self.track_deadline)
+            finally:
+                for task in searches.values():
+                    task.cancel()
+        finally:
+            self._active -= 1
+            if not self._active:
+                self._idle.set()
+
+        # None where a source could not be searched in time
+        results: Dict[str, Optional[List[Dict]]] = {}
+        for key, task in searches.items():
+            if task.done() and not task.cancelled():
+                results[key] = task.result()
+            else:
+                PRO_DEADLINE_EXCEEDED.labels(pro=key).inc()
+                results[key] = None
+
+        # Analyze findings
+        issues = self._analyze_results(track, results)
+
+        return {
+            'track': track,
+            'issues': issues,
+            'found_in': {
+                key: len(found) > 0 if found is not None else None
+                for key, found in results.items()
+            }
+        }
+
+    def _build_report(self, tracks: List[Dict], scan_results: List[Dict]) -> Dict:
+        return {
+            **self.summarize(scan_results),
+            'detailed_results': list(scan_results)
+        }
+
+    def summarize(self, scan_results: List[Dict]) -> Dict:
+        """
+        Report totals for a set of track results
         """
-        scan_results = []
         total_issues = 0
         estimated_missing = 0
-        
-        for track in tracks:
-            logger.info(f"Scanning {track.get('title', 'Unknown')}...")
-            
-            # Search across all PROs
-            ascap_results = self.search_ascap(
-                track.get('title', ''), 
-                track.get('artist')
-            )
-            bmi_results = self.search_bmi(
-                track.get('title', ''),
-                track.get('artist')
-            )
-            
-            # Analyze findings
-            issues = self._analyze_results(track, ascap_results, bmi_results)
-            
-            scan_results.append({
-                'track': track,
-                'issues': issues,
-                'found_in': {
-                    'ascap': len(ascap_results) > 0,
-                    'bmi': len(bmi_results) > 0
-                }
-            })
-            
-            total_issues += len(issues)
+        incomplete = 0
+
+        for result in scan_results:
+            if None in result['found_in'].values():
+                incomplete += 1
+            total_issues += len(result['issues'])
             # Simple estimation logic (replace with real calculations later)
-            estimated_missing += len(issues) * random.randint(500, 2000)
-        
+            estimated_missing += len(result['issues']) * random.randint(500, 2000)
+
         return {
-            'tracks_scanned': len(tracks),
+            'tracks_scanned': len(scan_results),
             'issues_found': total_issues,
             'estimated_missing': estimated_missing,
-            'detailed_results': scan_results
+            # Tracks with at least one PRO that could not be searched
+            'tracks_incomplete': incomplete
         }
     
-    def _analyze_results(self, track: Dict, ascap: List, bmi: List) -> List[Dict]:
-        """Compare internal data with PRO results to find gaps"""
+    def _analyze_results(self, track: Dict, results: Dict[str, Optional[List]]) -> List[Dict]:
+        """Compare internal data with PRO results to find gaps
+
+        `results` maps source keys to their results. A source whose
+        results are None could not be searched, so nothing is reported
+        missing from it, and the track only counts as unregistered when
+        every source was searched.
+        """
         issues = []
         
         # Check if track is missing from PROs
-        if not ascap and not bmi:
+        if results and all(found == [] for found in results.values()):
             issues.append({
                 'type': 'missing_registration',
                 'message': 'Track not found in any PRO database',
                 'severity': 'high'
             })
-        elif not ascap:
-            issues.append({
-                'type': 'missing_pro',
-                'pro': 'ASCAP',
-                'message': 'Track missing from ASCAP',
-                'severity': 'medium'
-            })
-        elif not bmi:
-            issues.append({
-                'type': 'missing_pro',
-                'pro': 'BMI',
-                'message': 'Track missing from BMI',
-                'severity': 'medium'
-            })
+        else:
+            for key, found in results.items():
+                if found == []:
+                    name = self.sources.get(key).name
+                    issues.append({
+                        'type': 'missing_pro',
+                        'pro': name,
+                        'message': f'Track missing from {name}',
+                        'severity': 'medium'
+                    })
         
         # Add split comparison logic here when you have internal split data
         
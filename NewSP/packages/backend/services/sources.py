@@ -0,0 +1,138 @@
+import copy
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from services.extractors import ASCAP_EXTRACTOR, ResultExtractor
+    from services.governor import RequestPolicy
+except ImportError:
+    from extractors import ASCAP_EXTRACTOR, ResultExtractor
+    from governor import RequestPolicy
+
+
+class PROSource:
+    """
+    One society's repertory: where and how to search it, how to read its
+    result pages, and how fast it may be queried
+
+    Subclass and override `search_params` / `parse` for repertories that
+    don't fit the query-string-plus-table shape. A source without a URL
+    is known but not queried until one is configured, and a source
+    without a parser is reported unknown rather than "not found".
+    """
+
+    def __init__(
+        self,
+        key: str,
+        name: str,
+        url: Optional[str] = None,
+        title_param: str = 'title',
+        artist_param: Optional[str] = None,
+        extra_params: Optional[Dict] = None,
+        extractor: Optional[ResultExtractor] = None,
+        rate_limit: Optional[Tuple[float, int]] = None,
+        policy: Optional[RequestPolicy] = None
+    ):
+        """
+        key: lowercase id used in found_in, metrics and the cache
+        name: display name used in issues (e.g. 'ASCAP')
+        extractor: result page parser; without one (and no `parse`
+            override) the source's results are always unknown
+        rate_limit: starting (requests per second, burst) for this source's
+            host, unless the scanner configures that host explicitly
+        policy: rate adaptation, retry and circuit-breaker settings; the
+            scanner's policy when None
+        """
+        self.key = key
+        self.name = name
+        self.url = url
+        self.title_param = title_param
+        self.artist_param = artist_param
+        self.extra_params = dict(extra_params or {})
+        self.extractor = extractor
+        self.rate_limit = rate_limit
+        self.policy = policy
+
+    def search_params(self, title: str, artist: Optional[str]) -> Dict:
+        params = {self.title_param: title, **self.extra_params}
+        if artist and self.artist_param:
+            params[self.artist_param] = artist
+        return params
+
+    @property
+    def can_parse(self) -> bool:
+        return self.extractor is not None or type(self).parse is not PROSource.parse
+
+    def parse(self, content: bytes, encoding: Optional[str]) -> List[Dict]:
+        if self.extractor is None:
+            raise NotImplementedError(f"No result parser for {self.name}")
+        return self.extractor.extract(content, encoding)
+
+    def with_url(self, url: str) -> 'PROSource':
+        source = copy.copy(self)
+        source.url = url
+        return source
+
+
+class SourceRegistry:
+    """
+    PRO sources by key
+
+    Only sources with a URL are enabled; `configure` points sources at
+    new URLs (a mirror, a stub server, or a society's endpoint once its
+    integration is written).
+    """
+
+    def __init__(self, sources: Iterable[PROSource] = ()):
+        self._sources: Dict[str, PROSource] = {}
+        for source in sources:
+            self.register(source)
+
+    def register(self, source: PROSource) -> None:
+        self._sources[source.key] = source
+
+    def get(self, key: str) -> Optional[PROSource]:
+        return self._sources.get(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._sources
+
+    def __iter__(self) -> Iterator[PROSource]:
+        return iter(self._sources.values())
+
+    def configure(self, urls: Dict[str, str]) -> 'SourceRegistry':
+        """A copy with the given sources' URLs replaced; unknown keys get a
+        source with no parser, so their results stay unknown until one is
+        registered"""
+        registry = SourceRegistry(self)
+        for key, url in urls.items():
+            source = registry.get(key) or PROSource(key, key.upper())
+            registry.register(source.with_url(url))
+        return registry
+
+    def select(self, keys: Iterable[str]) -> 'SourceRegistry':
+        """A copy with only the given sources"""
+        return SourceRegistry(self._sources[key] for key in keys if key in self._sources)
+
+    def enabled(self) -> List[PROSource]:
+        return [source for source in self._sources.values() if source.url]
+
+
+ASCAP = PROSource(
+    'ascap', 'ASCAP',
+    url="https://www.ascap.com/repertory",
+    artist_param='writer',
+    extractor=ASCAP_EXTRACTOR
+)
+# BMI's search endpoint; there is no result parser for its pages yet, so
+# it is not a default source. Register it once it has an extractor.
+BMI = PROSource(
+    'bmi', 'BMI',
+    url="https://repertoire.bmi.com/Search/Search",
+    title_param='Main_Search',
+    extra_params={'Sub_Search': 'song', 'View_Count': 20, 'Page_Number': 1}
+)
+
+# Only sources whose result pages can be read; others (BMI, or the
+# societies in the audit service's PRO enum configured with e.g.
+# PRO_URL_PRS=...) would only ever report unknown
+DEFAULT_SOURCES = SourceRegistry((ASCAP,))
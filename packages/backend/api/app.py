@@ -1,37 +1,206 @@
-import sys
+# Run from the backend directory, with the scanner's `services` package
+# (NewSP/packages/backend) on the path:
+#   PYTHONPATH=../../NewSP/packages/backend python -m api.app
+# or, with several worker processes:
+#   PYTHONPATH=../../NewSP/packages/backend uvicorn api.app:app --workers 4
 import os
-from pathlib import Path
+import json
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
-# Add the backend directory to Python path
-backend_dir = Path(__file__).parent.parent
-sys.path.append(str(backend_dir))
-
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from api.lifecycle import AuditRuntime, AuditSettings
+from api.metrics import REGISTRY as AUDIT_REGISTRY
+from services.metrics import PROMETHEUS_CONTENT_TYPE, REGISTRY
 from services.pro_scanner import PROScanner
+from services.sources import DEFAULT_SOURCES
 import uvicorn
 
-app = FastAPI()
+
+def _env_rate(name: str) -> Optional[Tuple[float, int]]:
+    # "<requests per second>,<burst>"
+    value = os.environ.get(name)
+    if not value:
+        return None
+    rate, _, burst = value.partition(',')
+    return float(rate), int(burst or 1)
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Server configuration, read from the environment"""
+    host: str = '0.0.0.0'
+    port: int = 8000
+    workers: int = 1
+    cors_origins: Tuple[str, ...] = ("http://localhost:3002",)
+    # Tracks scanned at once per worker, and the HTTP pool behind them
+    scan_concurrency: int = 10
+    http_max_connections: Optional[int] = None
+    http_max_keepalive: Optional[int] = None
+    http_timeout: float = 10.0
+    pro_rate_limit: Optional[Tuple[float, int]] = None
+    pro_urls: Dict[str, str] = field(default_factory=dict)
+    # PRO sources to search; all sources with a URL when empty
+    pro_sources: Tuple[str, ...] = ()
+    # Seconds to wait for every PRO to answer for one track
+    track_deadline: float = 20.0
+    cache_path: Optional[str] = 'pro_cache.db'
+    # Cache entries loaded into memory at startup
+    cache_warm_entries: int = 5000
+    # Seconds to let in-flight scans finish on shutdown
+    drain_timeout: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> 'Settings':
+        env = os.environ
+        optional_int = lambda name: int(env[name]) if env.get(name) else None
+        return cls(
+            host=env.get('HOST', cls.host),
+            port=int(env.get('PORT', cls.port)),
+            workers=int(env.get('WEB_CONCURRENCY', cls.workers)),
+            cors_origins=tuple(
+                origin.strip()
+                for origin in env.get('CORS_ORIGINS', ','.join(cls.cors_origins)).split(',')
+                if origin.strip()
+            ),
+            scan_concurrency=int(env.get('SCAN_CONCURRENCY', cls.scan_concurrency)),
+            http_max_connections=optional_int('HTTP_MAX_CONNECTIONS'),
+            http_max_keepalive=optional_int('HTTP_MAX_KEEPALIVE'),
+            http_timeout=float(env.get('HTTP_TIMEOUT', cls.http_timeout)),
+            pro_rate_limit=_env_rate('PRO_RATE_LIMIT'),
+            # e.g. PRO_URL_ASCAP=http://127.0.0.1:9000/ascap; also enables
+            # societies without a default endpoint (PRO_URL_PRS=...)
+            pro_urls={
+                name[len('PRO_URL_'):].lower(): value
+                for name, value in env.items()
+                if name.startswith('PRO_URL_') and value
+            },
+            pro_sources=tuple(
+                key.strip().lower()
+                for key in env.get('PRO_SOURCES', '').split(',')
+                if key.strip()
+            ),
+            track_deadline=float(env.get('TRACK_DEADLINE', cls.track_deadline)),
+            cache_path=env.get('PRO_CACHE_PATH', cls.cache_path) or None,
+            cache_warm_entries=int(env.get('PRO_CACHE_WARM', cls.cache_warm_entries)),
+            drain_timeout=float(env.get('DRAIN_TIMEOUT', cls.drain_timeout)),
+        )
+
+
+settings = Settings.from_env()
+audit_settings = AuditSettings.from_env()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    sources = DEFAULT_SOURCES.configure(settings.pro_urls)
+    if settings.pro_sources:
+        sources = sources.select(settings.pro_sources)
+    # One scanner, and so one connection pool and cache handle, per worker
+    scanner = PROScanner(
+        sources=sources,
+        track_deadline=settings.track_deadline,
+        max_concurrency=settings.scan_concurrency,
+        timeout=settings.http_timeout,
+        cache=settings.cache_path,
+        max_connections=settings.http_max_connections,
+        max_keepalive=settings.http_max_keepalive,
+        default_rate_limit=settings.pro_rate_limit
+    )
+    await scanner.open(warm_cache=settings.cache_warm_entries)
+    app.state.scanner = scanner
+    # The worker's Prisma pool, warmed track index and audit workers;
+    # audits left unfinished by another worker or a restart resume here
+    runtime = AuditRuntime(audit_settings) if audit_settings.enabled else None
+    app.state.audits = None
+    try:
+        if runtime is not None:
+            await runtime.start()
+            app.state.audits = runtime.audits
+        yield
+    finally:
+        await scanner.drain(settings.drain_timeout)
+        await scanner.aclose()
+        if scanner.cache is not None:
+            scanner.cache.close()
+        if runtime is not None:
+            await runtime.stop()
+
+
+app = FastAPI(lifespan=lifespan)
 
 # Allow frontend to call this API
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["http://localhost:3002"],
+    allow_origins=list(settings.cors_origins),
     allow_methods=["*"],
     allow_headers=["*"],
 )
 
-scanner = PROScanner()
+STREAM_MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'sse': 'text/event-stream',
+}
+
+def _frame(kind: str, payload: Dict, stream: str) -> bytes:
+    if stream == 'sse':
+        return f"event: {kind}\ndata: {json.dumps(payload)}\n\n".encode()
+    return (json.dumps({'type': kind, **payload}) + '\n').encode()
+
+async def _scan_frames(scanner: PROScanner, tracks: List[Dict], stream: str) -> AsyncIterator[bytes]:
+    """One frame per track as it completes, then a summary frame"""
+    results = []
+    async for position, result in scanner.iter_scan_catalog(tracks):
+        results.append(result)
+        yield _frame('result', {'index': position, 'result': result}, stream)
+    yield _frame('summary', scanner.summarize(results), stream)
 
 @app.post("/api/scan-catalog")
-async def scan_catalog(tracks: list):
-    """Scan a catalog of tracks across PROs"""
-    results = scanner.batch_scan_catalog(tracks)
-    return results
+async def scan_catalog(request: Request, tracks: List[Dict], stream: Optional[str] = None):
+    """Scan a catalog of tracks across PROs
+
+    With ?stream=ndjson or ?stream=sse, each track's result is sent as
+    soon as it completes, followed by a summary frame.
+    """
+    scanner: PROScanner = request.app.state.scanner
+    if stream is None:
+        results = await scanner.scan_catalog(tracks)
+        return results
+
+    if stream not in STREAM_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported stream format: {stream}")
+    return StreamingResponse(
+        _scan_frames(scanner, tracks, stream),
+        media_type=STREAM_MEDIA_TYPES[stream],
+        headers={'Cache-Control': 'no-cache'}
+    )
+
+CACHE_ENTRIES = REGISTRY.gauge('pro_cache_entries', 'Entries in the PRO response cache')
+CACHE_EVICTIONS = REGISTRY.gauge('pro_cache_evictions', 'PRO response cache evictions since startup')
+
+@app.get("/api/metrics")
+async def metrics(request: Request):
+    """Prometheus metrics for this worker process"""
+    stats = await request.app.state.scanner.cache_stats()
+    if stats:
+        CACHE_ENTRIES.set(stats['entries'])
+        CACHE_EVICTIONS.set(stats['evictions'])
+    # Scanner metrics live in services.metrics, audit metrics in api.metrics
+    return PlainTextResponse(REGISTRY.render() + AUDIT_REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
 
 @app.get("/api/health")
 async def health():
     return {"status": "healthy", "service": "PRO Scanner"}
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # An import string lets uvicorn start several worker processes
+    uvicorn.run(
+        "api.app:app",
+        host=settings.host,
+        port=settings.port,
+        workers=settings.workers,
+        timeout_graceful_shutdown=int(settings.drain_timeout)
+    )
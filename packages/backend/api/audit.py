@@ -1,19 +1,35 @@
 # audit.py
 import asyncio
 from datetime import datetime, timedelta
-from typing import List, Optional, Dict, Any, Tuple
+from typing import List, Optional, Dict, Any, Tuple, Union, Iterable, Iterator, AsyncIterable, AsyncIterator, BinaryIO, Sequence, Deque, Set
 from enum import Enum
 import csv
 import io
+import itertools
 import json
 import hashlib
-from dataclasses import dataclass
+import logging
+import os
+import time
+from collections import deque
 from decimal import Decimal
 
 from prisma import Prisma
-from prisma.models import Audit, TrackMatch, Track, User
+from prisma.models import Audit, TrackMatch, User
 from prisma.types import AuditCreateInput, TrackMatchCreateInput
 
+from api.audit_export import EXPORT_MEDIA_TYPES, encode_export, export_file_name, export_media_type
+from api.audit_jobs import AuditCheckpoint, AuditJob, AuditJobQueue, JobStatus
+from api.matching import FUZZY_THRESHOLD, STAGE_SECONDS, MatchType, ParallelMatcher, RecordMatches, fuzzy_match_possible, match_record, match_records, observe_timings
+from api.metrics import REGISTRY
+from api.pro_formats import CompiledColumns, ParseReject, get_format
+from api.profiling import SamplingProfiler, profile_path
+from api.records import PRO, OffsetLineReader, RoyaltyRecord, RoyaltyRecordBatch
+from api.similarity import BatchScorer
+from api.track_index import TrackIndex
+
+logger = logging.getLogger(__name__)
+
 # Enums matching Prisma schema
 class AuditStatus(str, Enum):
     PROCESSING = "PROCESSING"
@@ -21,227 +37,644 @@ class AuditStatus(str, Enum):
     FAILED = "FAILED"
     CANCELLED = "CANCELLED"
 
-class MatchType(str, Enum):
-    EXACT = "EXACT"
-    FUZZY = "FUZZY"
-    MANUAL = "MANUAL"
-    ISRC = "ISRC"
-    TITLE_ARTIST = "TITLE_ARTIST"
-
-class PRO(str, Enum):
-    ASCAP = "ASCAP"
-    BMI = "BMI"
-    PRS = "PRS"
-    SOCAN = "SOCAN"
-    GEMA = "GEMA"
-    SACEM = "SACEM"
-    JASRAC = "JASRAC"
-    APRA = "APRA"
-    OTHER = "OTHER"
-
-@dataclass
-class RoyaltyRecord:
-    """Represents a royalty record from external source"""
-    isrc: Optional[str]
-    title: str
-    artist: str
-    pro: PRO
-    amount: float
-    period: str
-    plays: Optional[int] = None
-    raw_data: Optional[Dict[str, Any]] = None
+# Records can be passed in memory, as a lazy iterator, or as an async
+# stream of batches (see AuditService.stream_royalty_file)
+RoyaltyRecords = Union[Iterable[RoyaltyRecord], AsyncIterable[Sequence[RoyaltyRecord]]]
+
+# (track id, match type) results reused from an earlier audit
+PriorMatches = List[Tuple[Optional[str], Optional[str]]]
+
+AUDITS_FINISHED = REGISTRY.counter('audits_finished_total', 'Audits finished, by final status', ['status'])
+AUDIT_RECORDS = REGISTRY.counter(
+    'audit_records_total',
+    'Royalty records processed, by outcome (matched/unmatched) and source (fresh/carried)',
+    ['outcome', 'source']
+)
+AUDIT_PARSE_REJECTS = REGISTRY.counter('audit_parse_rejects_total', 'Statement rows that could not be parsed')
 
 class AuditService:
-    def __init__(self, db: Prisma):
+    # TrackMatch rows written per transaction while processing an audit
+    TRACK_MATCH_BATCH_SIZE = 1000
+    # Tracks fetched per page when loading the track index
+    TRACK_SCAN_PAGE_SIZE = 5000
+    # TrackMatch rows fetched per page when exporting an audit
+    EXPORT_PAGE_SIZE = 2000
+    # (outcome, source) labels of AUDIT_RECORDS
+    _RECORD_OUTCOMES = (
+        ('matched', 'fresh'), ('matched', 'carried'),
+        ('unmatched', 'fresh'), ('unmatched', 'carried')
+    )
+    # Records sent to a matching worker per task
+    MATCH_SHARD_SIZE = 2000
+
+    def __init__(
+        self,
+        db: Prisma,
+        batch_size: int = TRACK_MATCH_BATCH_SIZE,
+        match_workers: int = 0,
+        match_shard_size: int = MATCH_SHARD_SIZE,
+        job_store: str = 'audit_jobs.db',
+        max_concurrent_audits: int = 2,
+        incremental: bool = True,
+        profile_dir: str = 'profiles'
+    ):
         self.db = db
+        self.batch_size = max(1, batch_size)
+        # Above zero, records are matched in this many worker processes
+        # instead of on the event loop
+        self.match_workers = max(0, match_workers)
+        self.match_shard_size = max(1, match_shard_size)
+        # Audits to run under the sampling profiler (see profile_audit)
+        self.profile_dir = profile_dir
+        self._profile_audits: Set[str] = set()
+        self.profiles: Dict[str, str] = {}
+        # Reuse the user's previous results for records that were already
+        # audited (see _process_audit)
+        self.incremental = incremental
+        self._track_index: Optional[TrackIndex] = None
+        # (track count, latest updatedAt) the index was last brought up to date with
+        self._catalog_state: Optional[Tuple[int, Optional[datetime]]] = None
+        self._track_index_lock = asyncio.Lock()
+        self.jobs = AuditJobQueue(self._run_job, job_store, max_concurrent_audits)
 
     async def create_audit(
         self,
         user_id: str,
         file_name: str,
-        records: List[RoyaltyRecord]
+        records: RoyaltyRecords,
+        pro: Optional[PRO] = None
     ) -> Audit:
-        """Create a new audit and process records"""
-        
-        # Create audit record
-        audit = await self.db.audit.create({
+        """Create a new audit and queue its records for processing.
+
+        In-memory records are not persisted with the job, so use
+        `create_audit_from_file` for audits that must survive a restart.
+        A list of records identical to one the user already audited
+        returns the earlier audit instead.
+
+        `pro` is the society the statement came from; for a list of
+        records all from one PRO it is taken from the records. Results
+        are only carried over from earlier audits when it is known.
+        """
+        file_hash = None
+        if isinstance(records, (list, tuple)):
+            file_hash = self._hash_records(records)
+            if pro is None:
+                pros = {record.pro for record in records}
+                pro = pros.pop() if len(pros) == 1 else None
+            existing = await self._find_audit_by_hash(user_id, file_hash)
+            if existing:
+                return existing
+
+        audit = await self._create_audit_record(
+            user_id,
+            file_name,
+            len(records) if isinstance(records, (list, tuple)) else 0,
+            file_hash
+        )
+        await self._submit_job(AuditJob(
+            audit_id=audit.id,
+            user_id=user_id,
+            pro=PRO(pro).value if pro else None,
+            records=records
+        ))
+        return audit
+
+    async def create_audit_from_file(
+        self,
+        user_id: str,
+        source_path: str,
+        pro: PRO,
+        file_name: Optional[str] = None
+    ) -> Audit:
+        """Create an audit for a statement on disk and queue it.
+
+        The file is streamed when the job runs, and an interrupted job
+        resumes from its last checkpoint after a restart. Re-uploading a
+        file the user already audited returns the earlier audit instead.
+        """
+        file_name = file_name or os.path.basename(source_path)
+        file_hash = await asyncio.to_thread(self._hash_file, source_path)
+        existing = await self._find_audit_by_hash(user_id, file_hash)
+        if existing:
+            return existing
+
+        audit = await self._create_audit_record(user_id, file_name, 0, file_hash)
+        await self._submit_job(AuditJob(
+            audit_id=audit.id,
+            user_id=user_id,
+            source_path=os.path.abspath(source_path),
+            file_type=file_name,
+            pro=PRO(pro).value
+        ))
+        return audit
+
+    async def _create_audit_record(
+        self,
+        user_id: str,
+        file_name: str,
+        tracks_scanned: int,
+        file_hash: Optional[str] = None
+    ) -> Audit:
+        # Streamed input is counted while processing
+        return await self.db.audit.create({
             'user_id': user_id,
             'file_name': file_name,
+            'file_hash': file_hash,
             'status': AuditStatus.PROCESSING,
-            'tracks_scanned': len(records),
+            'tracks_scanned': tracks_scanned,
             'tracks': {
                 'create': []  # Will be populated during processing
             }
         })
-        
+
+    async def _find_audit_by_hash(self, user_id: str, file_hash: str) -> Optional[Audit]:
+        """The user's most recent completed audit of identical input"""
+        return await self.db.audit.find_first(
+            where={
+                'user_id': user_id,
+                'file_hash': file_hash,
+                'status': AuditStatus.COMPLETED.value
+            },
+            order={'created_at': 'desc'}
+        )
+
+    async def _find_base_audit(
+        self,
+        audit_id: str,
+        user_id: str,
+        pro: PRO,
+        track_index_version: str
+    ) -> Optional[Audit]:
+        """The user's most recent completed audit of the same PRO, preferring
+        one of the same statement file, whose results are still valid.
+
+        Its matches were made against the catalog as it was then, so it
+        only qualifies if the track index is unchanged since
+        (`track_index_version`); otherwise carried-over results could
+        miss tracks added since or point at changed ones.
+        """
+        audit = await self.db.audit.find_unique(where={'id': audit_id})
+        where: Dict[str, Any] = {
+            'user_id': user_id,
+            'status': AuditStatus.COMPLETED.value,
+            'id': {'not': audit_id},
+            'track_index_version': track_index_version,
+            # Fingerprints include the PRO, so other PROs' audits carry nothing
+            'tracks': {'some': {'pro': PRO(pro).value}}
+        }
+        if audit is not None:
+            same_statement = await self.db.audit.find_first(
+                where={**where, 'file_name': audit.file_name},
+                order={'created_at': 'desc'}
+            )
+            if same_statement is not None:
+                return same_statement
+        return await self.db.audit.find_first(where=where, order={'created_at': 'desc'})
+
+    @staticmethod
+    def _hash_file(path: str, chunk_size: int = 1 << 20) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def _hash_records(records: Sequence[RoyaltyRecord]) -> str:
+        digest = hashlib.sha256()
+        for record in records:
+            digest.update(record.fingerprint().encode('ascii'))
+        return digest.hexdigest()
+
+    async def _submit_job(self, job: AuditJob) -> None:
         try:
-            # Process records asynchronously
-            asyncio.create_task(self._process_audit(audit.id, records))
-            return audit
+            await self.jobs.submit(job)
         except Exception as e:
-            # Update audit status to failed if initial processing fails
-            await self.db.audit.update(
-                where={'id': audit.id},
-                data={
-                    'status': AuditStatus.FAILED,
-                    'completed_at': datetime.now()
-                }
-            )
+            # Update audit status to failed if the job cannot be queued
+            await self._set_audit_status(job.audit_id, AuditStatus.FAILED)
             raise e
 
+    async def start_jobs(self) -> List[AuditJob]:
+        """Start the audit workers and resume audits left unfinished by a restart"""
+        return await self.jobs.start()
+
+    async def shutdown(self, drain: bool = True) -> None:
+        """Stop the audit workers, letting running audits finish when `drain`"""
+        await self.jobs.stop(drain=drain)
+
+    async def cancel_audit(self, audit_id: str, user_id: str) -> bool:
+        """Cancel a queued or running audit owned by the user"""
+        audit = await self.db.audit.find_first(
+            where={
+                'id': audit_id,
+                'user_id': user_id
+            }
+        )
+        if not audit:
+            return False
+
+        state = await self.jobs.cancel(audit_id)
+        if state == JobStatus.CANCELLED:
+            await self._set_audit_status(audit_id, AuditStatus.CANCELLED)
+        # A running audit marks itself CANCELLED after its current batch
+        return state is not None
+
+    async def _set_audit_status(self, audit_id: str, status: AuditStatus) -> None:
+        await self.db.audit.update(
+            where={'id': audit_id},
+            data={
+                'status': status,
+                'completed_at': datetime.now()
+            }
+        )
+
+    def profile_audit(self, audit_id: str) -> None:
+        """Sample the audit's stacks while it runs.
+
+        The folded-stack profile is written under `profile_dir` when the
+        audit finishes, and its path stored in `profiles[audit_id]`.
+        """
+        self._profile_audits.add(audit_id)
+
+    async def _run_job(self, job: AuditJob) -> JobStatus:
+        """Job queue entry point"""
+        if job.audit_id not in self._profile_audits:
+            return await self._run_job_unprofiled(job)
+
+        self._profile_audits.discard(job.audit_id)
+        profiler = SamplingProfiler().start()
+        try:
+            return await self._run_job_unprofiled(job)
+        finally:
+            await asyncio.to_thread(profiler.stop)
+            self.profiles[job.audit_id] = await asyncio.to_thread(
+                profiler.dump, profile_path(self.profile_dir, f"audit_{job.audit_id}")
+            )
+
+    async def _run_job_unprofiled(self, job: AuditJob) -> JobStatus:
+        if job.records is not None:
+            records = job.records
+        elif job.resumable:
+            records = self.stream_royalty_file(job.source_path, job.file_type, PRO(job.pro))
+        else:
+            # In-memory input does not survive a restart
+            await self._set_audit_status(job.audit_id, AuditStatus.FAILED)
+            return JobStatus.FAILED
+
+        # Each audit matches against the catalog as it is now
+        index = await self.refresh_track_index()
+        base_audit = None
+        if self.incremental and job.pro:
+            base_audit = await self._find_base_audit(job.audit_id, job.user_id, PRO(job.pro), index.version)
+
+        status = await self._process_audit(
+            job.audit_id,
+            records,
+            job,
+            base_audit_id=base_audit.id if base_audit else None
+        )
+        return JobStatus(status.value)
+
     async def _process_audit(
         self,
         audit_id: str,
-        records: List[RoyaltyRecord]
-    ) -> None:
-        """Process audit records in background"""
+        records: RoyaltyRecords,
+        job: Optional[AuditJob] = None,
+        base_audit_id: Optional[str] = None
+    ) -> AuditStatus:
+        """Process audit records in background.
+
+        With a job, processing resumes after the job's checkpoint, saves a
+        new checkpoint after each committed chunk and stops early when the
+        job is cancelled. The checkpoint is stored apart from the
+        TrackMatch rows, so rows carry their chunk number and those of
+        chunks after the checkpoint, written before a crash, are deleted
+        before resuming. With a base audit, records whose fingerprint is
+        already in it are not matched again; its results are copied.
+        """
         try:
-            matches_found = 0
-            total_amount = 0.0
-            track_matches = []
-
-            for record in records:
-                # Find matching tracks in database
-                matched_tracks = await self._find_matching_tracks(record)
-                
-                if matched_tracks:
-                    # Create track matches for each found track
-                    for track, match_type in matched_tracks:
-                        track_match = await self.db.trackmatch.create({
+            progress = AuditCheckpoint(**vars(job.checkpoint)) if job else AuditCheckpoint()
+            pending: List[TrackMatchCreateInput] = []
+            if job and job.resumable:
+                await self.db.trackmatch.delete_many(
+                    where={'audit_id': audit_id, 'chunk': {'gt': progress.chunks_done}}
+                )
+            index = await self.get_track_index()
+            # Later audits only reuse these results while the index is unchanged
+            track_index_version = index.version
+            records = self._skip_records(records, progress.records_done)
+            carried: Deque[Tuple[Sequence[RoyaltyRecord], List[str], Dict[str, PriorMatches]]] = deque()
+            fresh_batches = self._split_carried(records, base_audit_id, carried)
+
+            # Matches come back in record order from either matching path,
+            # one result per batch of fresh records
+            async for _, fresh_matches in self._match_batches(index, fresh_batches):
+                batch, fingerprints, prior = carried.popleft()
+                if job and job.cancel_requested:
+                    break
+
+                fresh = iter(fresh_matches)
+                outcomes = {key: 0 for key in self._RECORD_OUTCOMES}
+                for record, fingerprint in zip(batch, fingerprints):
+                    progress.records_done += 1
+                    progress.total_amount += record.amount
+
+                    source = 'carried' if fingerprint in prior else 'fresh'
+                    if fingerprint in prior:
+                        matched_tracks = [
+                            (track_id, match_type)
+                            for track_id, match_type in prior[fingerprint]
+                            if track_id
+                        ]
+                        unmatched_type = prior[fingerprint][0][1] if not matched_tracks else None
+                    else:
+                        matched_tracks = [(track.id, match_type.value) for track, match_type in next(fresh)]
+                        unmatched_type = MatchType.FUZZY.value if self._fuzzy_match_possible(record) else None
+
+                    if matched_tracks:
+                        # Queue a track match for each found track
+                        for track_id, match_type in matched_tracks:
+                            pending.append({
+                                'audit_id': audit_id,
+                                'track_id': track_id,
+                                'isrc': record.isrc,
+                                'title': record.title,
+                                'artist': record.artist,
+                                'pro': record.pro.value,
+                                'match_type': match_type,
+                                'amount_found': record.amount,
+                                'fingerprint': fingerprint,
+                                'chunk': progress.chunks_done + 1
+                            })
+                            progress.matches_found += 1
+                        progress.matched_amount += record.amount
+                        outcomes[('matched', source)] += 1
+                    else:
+                        outcomes[('unmatched', source)] += 1
+                        # Queue unmatched record
+                        pending.append({
                             'audit_id': audit_id,
-                            'track_id': track.id,
                             'isrc': record.isrc,
                             'title': record.title,
                             'artist': record.artist,
                             'pro': record.pro.value,
-                            'match_type': match_type.value,
-                            'amount_found': record.amount
+                            'match_type': unmatched_type,
+                            'amount_found': record.amount,
+                            'fingerprint': fingerprint,
+                            'chunk': progress.chunks_done + 1
                         })
-                        track_matches.append(track_match)
-                        matches_found += 1
-                        total_amount += record.amount
-                else:
-                    # Create unmatched record
-                    track_match = await self.db.trackmatch.create({
-                        'audit_id': audit_id,
-                        'isrc': record.isrc,
-                        'title': record.title,
-                        'artist': record.artist,
-                        'pro': record.pro.value,
-                        'match_type': MatchType.FUZZY.value if self._fuzzy_match_possible(record) else None,
-                        'amount_found': record.amount
-                    })
-                    track_matches.append(track_match)
+
+                    if len(pending) >= self.batch_size:
+                        await self._write_track_matches(pending)
+                        pending = []
+                        progress.chunks_done += 1
+                        if job:
+                            await job.save_checkpoint(AuditCheckpoint(**vars(progress)))
+
+                for (outcome, source), count in outcomes.items():
+                    if count:
+                        AUDIT_RECORDS.labels(outcome=outcome, source=source).inc(count)
+
+            if pending:
+                await self._write_track_matches(pending)
+
+            status = AuditStatus.CANCELLED if job and job.cancel_requested else AuditStatus.COMPLETED
 
             # Update audit with results
             await self.db.audit.update(
                 where={'id': audit_id},
                 data={
-                    'matches_found': matches_found,
-                    'missing_amount': total_amount - sum(m.amount_found for m in track_matches if m.track_id),
-                    'status': AuditStatus.COMPLETED,
+                    'tracks_scanned': progress.records_done,
+                    'matches_found': progress.matches_found,
+                    'missing_amount': progress.total_amount - progress.matched_amount,
+                    'status': status,
+                    'track_index_version': track_index_version,
                     'completed_at': datetime.now()
                 }
             )
+            AUDITS_FINISHED.labels(status=status.value).inc()
+            return status
 
         except Exception as e:
             # Log error and update audit status
-            print(f"Audit processing failed: {str(e)}")
-            await self.db.audit.update(
-                where={'id': audit_id},
-                data={
-                    'status': AuditStatus.FAILED,
-                    'completed_at': datetime.now()
-                }
-            )
+            logger.exception(f"Audit {audit_id} processing failed: {e}")
+            AUDITS_FINISHED.labels(status=AuditStatus.FAILED.value).inc()
+            await self._set_audit_status(audit_id, AuditStatus.FAILED)
+            return AuditStatus.FAILED
+
+    async def _split_carried(
+        self,
+        records: RoyaltyRecords,
+        base_audit_id: Optional[str],
+        carried: Deque[Tuple[Sequence[RoyaltyRecord], List[str], Dict[str, PriorMatches]]]
+    ) -> AsyncIterator[List[RoyaltyRecord]]:
+        """Yield the records of each batch that still need matching.
+
+        The whole batch, its fingerprints and the base audit's results
+        for the fingerprints it already contains are appended to
+        `carried`, in the same order the batches are yielded.
+        """
+        async for batch in self._record_batches(records):
+            fingerprints = [record.fingerprint() for record in batch]
+            prior = await self._prior_matches(base_audit_id, fingerprints) if base_audit_id else {}
+            carried.append((batch, fingerprints, prior))
+            yield [record for record, fingerprint in zip(batch, fingerprints) if fingerprint not in prior]
+
+    async def _prior_matches(
+        self,
+        base_audit_id: str,
+        fingerprints: List[str]
+    ) -> Dict[str, PriorMatches]:
+        """The base audit's (track id, match type) results per fingerprint"""
+        rows = await self.db.trackmatch.find_many(
+            where={
+                'audit_id': base_audit_id,
+                'fingerprint': {'in': list(set(fingerprints))}
+            }
+        )
+        prior: Dict[str, PriorMatches] = {}
+        for row in rows:
+            results = prior.setdefault(row.fingerprint, [])
+            # Repeated records in the base statement share a fingerprint
+            result = (row.track_id, row.match_type)
+            if result not in results:
+                results.append(result)
+        return prior
+
+    async def _write_track_matches(
+        self,
+        rows: List[TrackMatchCreateInput]
+    ) -> None:
+        """Write a chunk of TrackMatch rows in a single transaction"""
+        with STAGE_SECONDS.labels(stage='db_write').time():
+            async with self.db.batch_() as batcher:
+                for row in rows:
+                    batcher.trackmatch.create(row)
+
+    async def _record_batches(
+        self,
+        records: RoyaltyRecords
+    ) -> AsyncIterator[Sequence[RoyaltyRecord]]:
+        """Yield records in batches of at most `batch_size`"""
+        if hasattr(records, '__aiter__'):
+            async for batch in records:
+                yield batch
+            return
+
+        if isinstance(records, (list, tuple)):
+            for start in range(0, len(records), self.batch_size):
+                yield list(records[start:start + self.batch_size])
+            return
+
+        # Lazy iterators may be reading a file, so pull them off the event loop
+        iterator = iter(records)
+        while True:
+            batch = await asyncio.to_thread(self._take, iterator, self.batch_size)
+            if not batch:
+                return
+            yield batch
+
+    async def _match_batches(
+        self,
+        index: TrackIndex,
+        records: RoyaltyRecords
+    ) -> AsyncIterator[Tuple[Sequence[RoyaltyRecord], List[RecordMatches]]]:
+        """Yield each record batch with the matches for its records"""
+        batches = self._record_batches(records)
+
+        if not self.match_workers:
+            scorer = BatchScorer(index, FUZZY_THRESHOLD)
+            async for batch in batches:
+                keys = [(record.isrc, record.title, record.artist) for record in batch]
+                timings: Dict[str, float] = {}
+                matches = match_records(index, keys, scorer, timings)
+                observe_timings(timings)
+                yield batch, matches
+            return
+
+        matcher = ParallelMatcher(index, self.match_workers, self.match_shard_size)
+        try:
+            async for item in matcher.match_batches(batches):
+                yield item
+        finally:
+            await asyncio.to_thread(matcher.close)
+
+    async def _skip_records(
+        self,
+        records: RoyaltyRecords,
+        count: int
+    ) -> AsyncIterator[Sequence[RoyaltyRecord]]:
+        """Drop the first `count` records, e.g. those done before a checkpoint"""
+        async for batch in self._record_batches(records):
+            if count >= len(batch):
+                count -= len(batch)
+                continue
+            if count:
+                batch = list(batch)[count:]
+                count = 0
+            yield batch
+
+    @staticmethod
+    def _take(iterator: Iterator[RoyaltyRecord], count: int) -> List[RoyaltyRecord]:
+        return list(itertools.islice(iterator, count))
+
+    async def get_track_index(self) -> TrackIndex:
+        """Return the catalog index, loading it on first use"""
+        if self._track_index is None:
+            async with self._track_index_lock:
+                if self._track_index is None:
+                    # Read before the scan, so changes made during it are
+                    # picked up by the next refresh
+                    self._catalog_state = await self._read_catalog_state()
+                    self._track_index = await self._load_track_index()
+        return self._track_index
+
+    async def refresh_track_index(self) -> TrackIndex:
+        """Bring the cached index up to date with the Track table.
+
+        Compares the table's track count and latest `updatedAt` with
+        those seen at the last load or refresh. When either moved, the
+        tracks updated since are re-read and patched into the index; if
+        the count still disagrees afterwards (tracks were deleted), the
+        index is rebuilt with a full scan.
+        """
+        index = await self.get_track_index()
+        async with self._track_index_lock:
+            state = await self._read_catalog_state()
+            if state == self._catalog_state:
+                return self._track_index
+
+            count, updated_at = state
+            seen_updated_at = self._catalog_state[1] if self._catalog_state else None
+            if seen_updated_at is not None:
+                changed = await self.db.track.find_many(where={'updatedAt': {'gte': seen_updated_at}})
+                for track in changed:
+                    index.add(track)
+            if seen_updated_at is None or len(index) != count:
+                index = await self._load_track_index()
+
+            self._track_index = index
+            self._catalog_state = state
+            return index
+
+    async def _read_catalog_state(self) -> Tuple[int, Optional[datetime]]:
+        """(track count, latest updatedAt): changes whenever a track is
+        added, updated or deleted"""
+        count = await self.db.track.count()
+        latest = await self.db.track.find_first(order={'updatedAt': 'desc'})
+        return count, latest.updatedAt if latest else None
+
+    async def _load_track_index(self) -> TrackIndex:
+        """Build the track index with a single paginated scan of the Track table"""
+        index = TrackIndex()
+        cursor: Optional[str] = None
+
+        while True:
+            page_args: Dict[str, Any] = {
+                'take': self.TRACK_SCAN_PAGE_SIZE,
+                'order': {'id': 'asc'}
+            }
+            if cursor:
+                page_args['cursor'] = {'id': cursor}
+                page_args['skip'] = 1
+
+            page = await self.db.track.find_many(**page_args)
+            for track in page:
+                index.add(track)
+
+            if len(page) < self.TRACK_SCAN_PAGE_SIZE:
+                return index
+            cursor = page[-1].id
 
     async def _find_matching_tracks(
         self, 
         record: RoyaltyRecord
-    ) -> List[Tuple[Track, MatchType]]:
-        """Find matching tracks in database"""
-        matches = []
-
-        # 1. Try exact ISRC match first
-        if record.isrc:
-            track = await self.db.track.find_first(
-                where={'isrc': record.isrc}
-            )
-            if track:
-                matches.append((track, MatchType.ISRC))
-
-        # 2. Try title + artist exact match
-        if not matches:
-            tracks = await self.db.track.find_many(
-                where={
-                    'title': record.title,
-                    'artist': record.artist
-                }
-            )
-            for track in tracks:
-                matches.append((track, MatchType.EXACT))
+    ) -> RecordMatches:
+        """Find matching tracks in the catalog"""
+        return self._match_record(await self.get_track_index(), record)
 
-        # 3. Try fuzzy matching if no exact matches
-        if not matches and self._fuzzy_match_possible(record):
-            tracks = await self._fuzzy_match_tracks(record)
-            for track in tracks:
-                matches.append((track, MatchType.FUZZY))
-
-        return matches
+    def _match_record(
+        self,
+        index: TrackIndex,
+        record: RoyaltyRecord
+    ) -> RecordMatches:
+        """Match a record against the index: ISRC, then exact title/artist, then fuzzy"""
+        return match_record(index, record.isrc, record.title, record.artist)
 
     def _fuzzy_match_possible(self, record: RoyaltyRecord) -> bool:
         """Check if fuzzy matching is possible for this record"""
-        return bool(record.title and record.artist)
-
-    async def _fuzzy_match_tracks(
-        self,
-        record: RoyaltyRecord,
-        threshold: float = 0.8
-    ) -> List[Track]:
-        """Perform fuzzy matching on tracks"""
-        # This is a simplified version - you might want to use
-        # more sophisticated fuzzy matching algorithms
-        all_tracks = await self.db.track.find_many(
-            where={
-                'OR': [
-                    {'title': {'contains': record.title}},
-                    {'artist': {'contains': record.artist}}
-                ]
-            }
-        )
-        
-        matches = []
-        for track in all_tracks:
-            similarity = self._calculate_similarity(
-                f"{track.title} {track.artist}",
-                f"{record.title} {record.artist}"
-            )
-            if similarity >= threshold:
-                matches.append(track)
-        
-        return matches
-
-    def _calculate_similarity(self, str1: str, str2: str) -> float:
-        """Calculate similarity between two strings"""
-        # Simple implementation - you might want to use
-        # libraries like fuzzywuzzy or rapidfuzz
-        set1 = set(str1.lower().split())
-        set2 = set(str2.lower().split())
-        
-        if not set1 or not set2:
-            return 0.0
-            
-        intersection = set1.intersection(set2)
-        union = set1.union(set2)
-        
-        return len(intersection) / len(union)
+        return fuzzy_match_possible(record.title, record.artist)
 
     async def get_audit_summary(self, audit_id: str) -> Dict[str, Any]:
-        """Get summary statistics for an audit"""
+        """Get summary statistics for an audit.
+
+        Counts come from grouped queries over TrackMatch, so the cost
+        depends on the number of groups rather than the audit size. While
+        the audit is still running they reflect every committed chunk.
+        """
         audit = await self.db.audit.find_unique(
             where={'id': audit_id},
             include={
-                'tracks': True,
                 'user': True
             }
         )
@@ -250,25 +683,50 @@ class AuditService:
             raise ValueError(f"Audit {audit_id} not found")
         
         # Calculate statistics
-        matched_tracks = [t for t in audit.tracks if t.track_id]
-        unmatched_tracks = [t for t in audit.tracks if not t.track_id]
+        total_count = await self.db.trackmatch.count(where={'audit_id': audit_id})
+        unmatched_count = await self.db.trackmatch.count(
+            where={
+                'audit_id': audit_id,
+                'track_id': None
+            }
+        )
         
         by_match_type = {}
-        for track in audit.tracks:
-            if track.match_type:
-                by_match_type[track.match_type] = by_match_type.get(track.match_type, 0) + 1
+        for group in await self.db.trackmatch.group_by(
+            by=['match_type'],
+            where={'audit_id': audit_id},
+            count=True
+        ):
+            if group['match_type']:
+                by_match_type[group['match_type']] = group['_count']['_all']
         
         by_pro = {}
-        for track in audit.tracks:
-            by_pro[track.pro] = by_pro.get(track.pro, 0) + 1
+        for group in await self.db.trackmatch.group_by(
+            by=['pro'],
+            where={'audit_id': audit_id},
+            count=True
+        ):
+            by_pro[group['pro']] = group['_count']['_all']
+        
+        tracks_scanned = audit.tracks_scanned
+        matches_found = audit.matches_found
+        missing_amount = audit.missing_amount
+        
+        # Running audits only write their totals at the end, so report
+        # the job's last checkpoint instead
+        progress = self.jobs.progress(audit_id)
+        if progress is not None:
+            tracks_scanned = max(tracks_scanned, progress.records_done)
+            matches_found = progress.matches_found
+            missing_amount = progress.total_amount - progress.matched_amount
         
         return {
             'id': audit.id,
             'file_name': audit.file_name,
             'status': audit.status,
-            'tracks_scanned': audit.tracks_scanned,
-            'matches_found': audit.matches_found,
-            'missing_amount': audit.missing_amount,
+            'tracks_scanned': tracks_scanned,
+            'matches_found': matches_found,
+            'missing_amount': missing_amount,
             'created_at': audit.created_at.isoformat(),
             'completed_at': audit.completed_at.isoformat() if audit.completed_at else None,
             'user': {
@@ -277,11 +735,15 @@ class AuditService:
                 'name': audit.user.name
             },
             'statistics': {
-                'match_rate': (audit.matches_found / audit.tracks_scanned * 100) if audit.tracks_scanned > 0 else 0,
-                'matched_count': len(matched_tracks),
-                'unmatched_count': len(unmatched_tracks),
+                'match_rate': (matches_found / tracks_scanned * 100) if tracks_scanned > 0 else 0,
+                'matched_count': total_count - unmatched_count,
+                'unmatched_count': unmatched_count,
                 'by_match_type': by_match_type,
                 'by_pro': by_pro
+            },
+            'progress': {
+                'running': progress is not None,
+                'records_processed': progress.records_done if progress is not None else tracks_scanned
             }
         }
 
@@ -290,130 +752,196 @@ class AuditService:
         audit_id: str,
         format: str = 'csv'
     ) -> Tuple[str, str]:
-        """Export audit results in specified format"""
-        audit = await self.db.audit.find_unique(
-            where={'id': audit_id},
-            include={
-                'tracks': {
-                    'include': {
-                        'track': True
-                    }
-                }
-            }
-        )
-        
+        """Export audit results in specified format.
+
+        Builds the whole file in memory; prefer `stream_audit_results`
+        for large audits.
+        """
+        if format.lower() == 'parquet':
+            raise ValueError("Parquet exports are binary; use stream_audit_results")
+        file_name, _, chunks = await self.stream_audit_results(audit_id, format)
+        return file_name, b''.join([chunk async for chunk in chunks]).decode('utf-8')
+
+    async def stream_audit_results(
+        self,
+        audit_id: str,
+        format: str = 'csv',
+        compress: bool = False
+    ) -> Tuple[str, str, AsyncIterator[bytes]]:
+        """Export audit results as a stream of encoded chunks.
+
+        Returns (file name, media type, chunks); the chunks can be passed
+        straight to a StreamingResponse. Matches are read a page at a
+        time, so memory use does not grow with the audit. Rows come out
+        in `id` order; ids are time-ordered cuids, so that is the order
+        the matches were written, i.e. statement order.
+        """
+        format = format.lower()
+        if format not in EXPORT_MEDIA_TYPES:
+            raise ValueError(f"Unsupported format: {format}")
+
+        audit = await self.db.audit.find_unique(where={'id': audit_id})
         if not audit:
             raise ValueError(f"Audit {audit_id} not found")
-        
-        if format.lower() == 'csv':
-            return await self._export_csv(audit)
-        elif format.lower() == 'json':
-            return await self._export_json(audit)
-        else:
-            raise ValueError(f"Unsupported format: {format}")
 
-    async def _export_csv(self, audit: Audit) -> Tuple[str, str]:
-        """Export audit results as CSV"""
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write headers
-        writer.writerow([
-            'ISRC', 'Title', 'Artist', 'PRO', 'Amount', 
-            'Match Type', 'Matched Track ID', 'Matched Track Title'
-        ])
-        
-        # Write data
-        for match in audit.tracks:
-            writer.writerow([
-                match.isrc or '',
-                match.title,
-                match.artist,
-                match.pro,
-                match.amount_found,
-                match.match_type or 'UNMATCHED',
-                match.track_id or '',
-                match.track.title if match.track else ''
-            ])
-        
-        return f"audit_{audit.id}.csv", output.getvalue()
+        chunks = encode_export(audit, self.iter_track_matches(audit_id), format, compress)
+        return (
+            export_file_name(audit.id, format, compress),
+            export_media_type(format, compress),
+            chunks
+        )
 
-    async def _export_json(self, audit: Audit) -> Tuple[str, str]:
-        """Export audit results as JSON"""
-        data = {
-            'audit_id': audit.id,
-            'file_name': audit.file_name,
-            'created_at': audit.created_at.isoformat(),
-            'completed_at': audit.completed_at.isoformat() if audit.completed_at else None,
-            'status': audit.status,
-            'summary': {
-                'tracks_scanned': audit.tracks_scanned,
-                'matches_found': audit.matches_found,
-                'missing_amount': audit.missing_amount
-            },
-            'matches': []
-        }
-        
-        for match in audit.tracks:
-            match_data = {
-                'isrc': match.isrc,
-                'title': match.title,
-                'artist': match.artist,
-                'pro': match.pro,
-                'amount': match.amount_found,
-                'match_type': match.match_type,
-                'timestamp': match.timestamp.isoformat()
-            }
-            
-            if match.track:
-                match_data['matched_track'] = {
-                    'id': match.track.id,
-                    'title': match.track.title,
-                    'artist': match.track.artist,
-                    'isrc': match.track.isrc
-                }
-            
-            data['matches'].append(match_data)
-        
-        return f"audit_{audit.id}.json", json.dumps(data, indent=2)
+    async def iter_track_matches(
+        self,
+        audit_id: str,
+        page_size: Optional[int] = None
+    ) -> AsyncIterator[List[TrackMatch]]:
+        """Yield an audit's matches in pages, with their matched tracks"""
+        cursor: Optional[str] = None
+        while True:
+            page, cursor = await self.get_audit_tracks(
+                audit_id,
+                limit=page_size or self.EXPORT_PAGE_SIZE,
+                cursor=cursor
+            )
+            if page:
+                yield page
+            if cursor is None:
+                return
 
     async def parse_royalty_file(
         self,
         file_content: str,
         file_type: str,
-        pro: PRO
+        pro: PRO,
+        rejects: Optional[List[ParseReject]] = None
     ) -> List[RoyaltyRecord]:
-        """Parse royalty file from PRO/distributor"""
+        """Parse royalty file from PRO/distributor.
+
+        Rows that cannot be parsed are skipped and, when `rejects` is
+        given, appended to it.
+        """
         records = []
         
         if file_type.endswith('.csv'):
-            reader = csv.DictReader(io.StringIO(file_content))
-            for row in reader:
-                # Adjust field names based on PRO format
-                record = self._parse_csv_row(row, pro)
-                if record:
-                    records.append(record)
+            lines = io.StringIO(file_content)
+            for batch in self._iter_csv_batches(lines, pro, self.batch_size, rejects=rejects):
+                records.extend(batch)
         
         return records
 
-    def _parse_csv_row(self, row: Dict[str, str], pro: PRO) -> Optional[RoyaltyRecord]:
-        """Parse CSV row based on PRO format"""
+    def iter_royalty_batches(
+        self,
+        source: Union[str, os.PathLike, BinaryIO],
+        file_type: str,
+        pro: PRO,
+        batch_size: Optional[int] = None,
+        encoding: str = 'utf-8-sig',
+        rejects: Optional[List[ParseReject]] = None
+    ) -> Iterator[RoyaltyRecordBatch]:
+        """Lazily parse a royalty file from a path or binary stream into columnar batches.
+
+        The source is read line by line, so memory use does not grow with
+        the file size. For path sources each row keeps its byte offset so
+        the raw line can be re-read on demand.
+        """
+        if not file_type.endswith('.csv'):
+            return
+
+        owns_stream = isinstance(source, (str, os.PathLike))
+        stream = open(source, 'rb') if owns_stream else source
+        lines = OffsetLineReader(stream, encoding)
         try:
-            # This is a simplified example - you'll need to adjust
-            # based on actual PRO file formats
-            return RoyaltyRecord(
-                isrc=row.get('ISRC') or row.get('isrc'),
-                title=row.get('Title') or row.get('Song Title') or row.get('track_title', ''),
-                artist=row.get('Artist') or row.get('Writer') or row.get('artist_name', ''),
-                pro=pro,
-                amount=float(row.get('Amount') or row.get('Royalty') or row.get('earnings', 0)),
-                period=row.get('Period') or row.get('Statement Period') or '',
-                plays=int(row.get('Plays') or row.get('Streams') or 0) if row.get('Plays') else None,
-                raw_data=row
+            yield from self._iter_csv_batches(
+                lines,
+                pro,
+                batch_size or self.batch_size,
+                source=source if owns_stream else None,
+                offsets=lines,
+                rejects=rejects
             )
-        except (ValueError, KeyError) as e:
-            print(f"Error parsing row: {e}")
-            return None
+        finally:
+            # Leave a caller-provided stream open
+            if owns_stream:
+                stream.close()
+
+    def iter_royalty_file(
+        self,
+        source: Union[str, os.PathLike, BinaryIO],
+        file_type: str,
+        pro: PRO,
+        rejects: Optional[List[ParseReject]] = None
+    ) -> Iterator[RoyaltyRecord]:
+        """Lazily parse a royalty file, yielding one record at a time"""
+        for batch in self.iter_royalty_batches(source, file_type, pro, rejects=rejects):
+            yield from batch
+
+    async def stream_royalty_file(
+        self,
+        source: Union[str, os.PathLike, BinaryIO],
+        file_type: str,
+        pro: PRO,
+        batch_size: Optional[int] = None,
+        rejects: Optional[List[ParseReject]] = None
+    ) -> AsyncIterator[RoyaltyRecordBatch]:
+        """Parse a royalty file off the event loop, yielding columnar batches"""
+        batches = self.iter_royalty_batches(source, file_type, pro, batch_size, rejects=rejects)
+        try:
+            while True:
+                batch = await asyncio.to_thread(next, batches, None)
+                if batch is None:
+                    return
+                yield batch
+        finally:
+            batches.close()
+
+    def _iter_csv_batches(
+        self,
+        lines: Iterable[str],
+        pro: PRO,
+        batch_size: int,
+        source: Optional[Union[str, os.PathLike]] = None,
+        offsets: Optional[OffsetLineReader] = None,
+        rejects: Optional[List[ParseReject]] = None
+    ) -> Iterator[RoyaltyRecordBatch]:
+        """Parse CSV rows into batches of at most `batch_size` records.
+
+        The header is resolved once against the PRO's column profile, so
+        each row is read by position with no per-field name lookups.
+        """
+        reader = csv.reader(lines)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = CompiledColumns(get_format(pro), header)
+        batch = RoyaltyRecordBatch(source)
+        parse_seconds = STAGE_SECONDS.labels(stage='parse')
+        started = time.perf_counter()
+
+        while True:
+            offset = offsets.offset if offsets is not None else None
+            row = next(reader, None)
+            if row is None:
+                break
+            if not row:
+                continue
+
+            error = columns.append_row(row, pro, batch, offset)
+            if error is not None:
+                AUDIT_PARSE_REJECTS.inc()
+                if rejects is not None:
+                    rejects.append(ParseReject(reader.line_num, error, offset, row))
+                continue
+
+            if len(batch) >= batch_size:
+                parse_seconds.observe(time.perf_counter() - started)
+                yield batch
+                batch = RoyaltyRecordBatch(source)
+                started = time.perf_counter()
+
+        if batch:
+            parse_seconds.observe(time.perf_counter() - started)
+            yield batch
 
     async def get_user_audits(
         self,
@@ -437,6 +965,80 @@ class AuditService:
             }
         )
 
+    async def list_user_audits(
+        self,
+        user_id: str,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        status: Optional[AuditStatus] = None
+    ) -> Tuple[List[Audit], Optional[str]]:
+        """List audits for a specific user, newest first.
+
+        Returns a page of audit headers (counts included, matches not)
+        and the cursor for the next page, or None on the last page. Pages
+        are keyed on (created_at, id), so deep pages cost the same as the
+        first. Use `get_audit_tracks` for an audit's matches.
+        """
+        where: Dict[str, Any] = {'user_id': user_id}
+        if status:
+            where['status'] = status.value
+        if cursor:
+            created_at, audit_id = self._decode_audit_cursor(cursor)
+            where['OR'] = [
+                {'created_at': {'lt': created_at}},
+                {'created_at': created_at, 'id': {'lt': audit_id}}
+            ]
+        
+        audits = await self.db.audit.find_many(
+            where=where,
+            take=limit,
+            order=[{'created_at': 'desc'}, {'id': 'desc'}]
+        )
+        
+        next_cursor = None
+        if len(audits) == limit and audits:
+            last = audits[-1]
+            next_cursor = f"{last.created_at.isoformat()}|{last.id}"
+        return audits, next_cursor
+
+    @staticmethod
+    def _decode_audit_cursor(cursor: str) -> Tuple[datetime, str]:
+        try:
+            created_at, audit_id = cursor.rsplit('|', 1)
+            return datetime.fromisoformat(created_at), audit_id
+        except ValueError:
+            raise ValueError(f"Invalid audit cursor: {cursor}")
+
+    async def get_audit_tracks(
+        self,
+        audit_id: str,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+        unmatched_only: bool = False
+    ) -> Tuple[List[TrackMatch], Optional[str]]:
+        """Get one page of an audit's matches with their matched tracks.
+
+        Returns the page and the cursor for the next one, or None on the
+        last page.
+        """
+        where: Dict[str, Any] = {'audit_id': audit_id}
+        if unmatched_only:
+            where['track_id'] = None
+        
+        page_args: Dict[str, Any] = {
+            'where': where,
+            'include': {'track': True},
+            'take': limit,
+            'order': {'id': 'asc'}
+        }
+        if cursor:
+            page_args['cursor'] = {'id': cursor}
+            page_args['skip'] = 1
+        
+        page = await self.db.trackmatch.find_many(**page_args)
+        next_cursor = page[-1].id if page and len(page) == limit else None
+        return page, next_cursor
+
     async def delete_audit(self, audit_id: str, user_id: str) -> bool:
         """Delete an audit and its associated matches"""
         # Verify ownership
@@ -450,6 +1052,11 @@ class AuditService:
         if not audit:
             return False
         
+        # Stop any queued or running job, and let a running one finish
+        # its current batch, before removing its audit
+        if await self.jobs.cancel(audit_id) == JobStatus.RUNNING:
+            await self.jobs.wait_stopped(audit_id)
+        
         # Delete audit (cascades to TrackMatch due to relation)
         await self.db.audit.delete(
             where={'id': audit_id}
@@ -460,73 +1067,83 @@ class AuditService:
     async def get_missing_royalties_summary(
         self,
         user_id: str,
-        days: int = 90
+        days: int = 90,
+        limit: int = 20
     ) -> Dict[str, Any]:
-        """Get summary of missing royalties from recent audits"""
+        """Get summary of missing royalties from recent audits.
+
+        Totals are aggregated in the database and only the `limit`
+        largest unmatched rows are fetched.
+        """
         cutoff_date = datetime.now() - timedelta(days=days)
         
-        # Get all completed audits for user
-        audits = await self.db.audit.find_many(
-            where={
-                'user_id': user_id,
-                'status': AuditStatus.COMPLETED.value,
-                'created_at': {'gte': cutoff_date}
-            },
-            include={
-                'tracks': {
-                    'where': {
-                        'track_id': None  # Unmatched tracks
-                    }
-                }
-            }
+        audit_filter = {
+            'user_id': user_id,
+            'status': AuditStatus.COMPLETED.value,
+            'created_at': {'gte': cutoff_date}
+        }
+        unmatched_filter = {
+            'track_id': None,  # Unmatched tracks
+            'audit': {'is': audit_filter}
+        }
+        
+        totals = await self.db.audit.group_by(
+            by=['user_id'],
+            where=audit_filter,
+            sum={'missing_amount': True}
         )
+        total_missing = (totals[0]['_sum']['missing_amount'] or 0) if totals else 0
         
-        total_missing = 0
         by_pro = {}
-        unmatched_tracks = []
+        unmatched_count = 0
+        for group in await self.db.trackmatch.group_by(
+            by=['pro'],
+            where=unmatched_filter,
+            sum={'amount_found': True},
+            count=True
+        ):
+            by_pro[group['pro']] = group['_sum']['amount_found'] or 0
+            unmatched_count += group['_count']['_all']
         
-        for audit in audits:
-            total_missing += audit.missing_amount
-            for match in audit.tracks:
-                if not match.track_id:  # Unmatched
-                    by_pro[match.pro] = by_pro.get(match.pro, 0) + match.amount_found
-                    unmatched_tracks.append({
-                        'title': match.title,
-                        'artist': match.artist,
-                        'pro': match.pro,
-                        'amount': match.amount_found,
-                        'audit_date': audit.created_at.isoformat()
-                    })
+        largest = await self.db.trackmatch.find_many(
+            where=unmatched_filter,
+            include={'audit': True},
+            order={'amount_found': 'desc'},
+            take=limit
+        )
         
         return {
             'period_days': days,
             'total_missing': total_missing,
             'by_pro': by_pro,
-            'unmatched_count': len(unmatched_tracks),
-            'unmatched_tracks': unmatched_tracks[:20]  # Top 20
+            'unmatched_count': unmatched_count,
+            'unmatched_tracks': [
+                {
+                    'title': match.title,
+                    'artist': match.artist,
+                    'pro': match.pro,
+                    'amount': match.amount_found,
+                    'audit_date': match.audit.created_at.isoformat()
+                }
+                for match in largest
+            ]
         }
 
 # Example usage
 async def main():
-    db = Prisma()
-    await db.connect()
+    from api.lifecycle import AuditRuntime
     
-    audit_service = AuditService(db)
-    
-    # Parse a royalty file
-    with open('royalties.csv', 'r') as f:
-        content = f.read()
-        records = await audit_service.parse_royalty_file(
-            content,
-            'royalties.csv',
-            PRO.ASCAP
-        )
-    
-    # Create audit
-    audit = await audit_service.create_audit(
+    # Connects, warms the track index and resumes anything left over
+    # from a previous run
+    async with AuditRuntime() as runtime:
+        await run_example(runtime.audits)
+
+async def run_example(audit_service: AuditService):
+    # Create audit; the file is streamed when its job runs
+    audit = await audit_service.create_audit_from_file(
         user_id='user_id_here',
-        file_name='royalties.csv',
-        records=records
+        source_path='royalties.csv',
+        pro=PRO.ASCAP
     )
     
     # Wait for processing to complete (in real app, you'd poll or use webhooks)
@@ -537,11 +1154,10 @@ async def main():
     print(json.dumps(summary, indent=2))
     
     # Export results
-    filename, data = await audit_service.export_audit_results(audit.id, 'csv')
-    with open(filename, 'w') as f:
-        f.write(data)
-    
-    await db.disconnect()
+    filename, _, chunks = await audit_service.stream_audit_results(audit.id, 'csv')
+    with open(filename, 'wb') as f:
+        async for chunk in chunks:
+            f.write(chunk)
 
 if __name__ == '__main__':
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,223 @@
+# audit_export.py
+import csv
+import io
+import json
+import zlib
+from typing import Any, AsyncIterator, Dict, List, Sequence
+
+from prisma.models import Audit, TrackMatch
+
+# Export formats and the media type each one is served with
+EXPORT_MEDIA_TYPES = {
+    'csv': 'text/csv',
+    'json': 'application/json',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+CSV_HEADERS = [
+    'ISRC', 'Title', 'Artist', 'PRO', 'Amount',
+    'Match Type', 'Matched Track ID', 'Matched Track Title'
+]
+
+TrackMatchPages = AsyncIterator[Sequence[TrackMatch]]
+
+
+def export_file_name(audit_id: str, format: str, compress: bool = False) -> str:
+    return f"audit_{audit_id}.{format}" + ('.gz' if compress else '')
+
+
+def _match_to_dict(match: TrackMatch) -> Dict[str, Any]:
+    match_data = {
+        'isrc': match.isrc,
+        'title': match.title,
+        'artist': match.artist,
+        'pro': match.pro,
+        'amount': match.amount_found,
+        'match_type': match.match_type,
+        'timestamp': match.timestamp.isoformat()
+    }
+    if match.track:
+        match_data['matched_track'] = {
+            'id': match.track.id,
+            'title': match.track.title,
+            'artist': match.track.artist,
+            'isrc': match.track.isrc
+        }
+    return match_data
+
+
+async def encode_csv(audit: Audit, pages: TrackMatchPages) -> AsyncIterator[bytes]:
+    """CSV rows, one chunk per page of matches"""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(CSV_HEADERS)
+
+    async for page in pages:
+        for match in page:
+            writer.writerow([
+                match.isrc or '',
+                match.title,
+                match.artist,
+                match.pro,
+                match.amount_found,
+                match.match_type or 'UNMATCHED',
+                match.track_id or '',
+                match.track.title if match.track else ''
+            ])
+        yield output.getvalue().encode('utf-8')
+        output.seek(0)
+        output.truncate()
+
+    if output.tell():
+        yield output.getvalue().encode('utf-8')
+
+
+async def encode_json(audit: Audit, pages: TrackMatchPages) -> AsyncIterator[bytes]:
+    """The same document the buffered export produced, written incrementally"""
+    header = {
+        'audit_id': audit.id,
+        'file_name': audit.file_name,
+        'created_at': audit.created_at.isoformat(),
+        'completed_at': audit.completed_at.isoformat() if audit.completed_at else None,
+        'status': audit.status,
+        'summary': {
+            'tracks_scanned': audit.tracks_scanned,
+            'matches_found': audit.matches_found,
+            'missing_amount': audit.missing_amount
+        }
+    }
+    # Open the document with every field but the match list
+    opening = json.dumps(header, indent=2)[:-2]
+    yield (opening + ',\n  "matches": [').encode('utf-8')
+
+    first = True
+    async for page in pages:
+        parts = []
+        for match in page:
+            item = json.dumps(_match_to_dict(match), indent=2).replace('\n', '\n    ')
+            parts.append(('\n    ' if first else ',\n    ') + item)
+            first = False
+        if parts:
+            yield ''.join(parts).encode('utf-8')
+
+    yield ('\n  ]\n}' if not first else ']\n}').encode('utf-8')
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands written bytes back to the caller.
+
+    Parquet records byte offsets in its footer, so `tell` keeps counting
+    across drains.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_schema():
+    import pyarrow as pa
+    return pa.schema([
+        ('isrc', pa.string()),
+        ('title', pa.string()),
+        ('artist', pa.string()),
+        ('pro', pa.string()),
+        ('amount', pa.float64()),
+        ('match_type', pa.string()),
+        ('timestamp', pa.timestamp('us', tz='UTC')),
+        ('track_id', pa.string()),
+        ('track_title', pa.string()),
+        ('track_artist', pa.string()),
+        ('track_isrc', pa.string()),
+    ])
+
+
+async def encode_parquet(audit: Audit, pages: TrackMatchPages) -> AsyncIterator[bytes]:
+    """Parquet file with one row group per page of matches.
+
+    Needs the optional `pyarrow` package.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ValueError("Parquet export requires pyarrow to be installed") from e
+
+    schema = _parquet_schema()
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression='zstd')
+    try:
+        async for page in pages:
+            if not page:
+                continue
+            columns = {
+                'isrc': [m.isrc for m in page],
+                'title': [m.title for m in page],
+                'artist': [m.artist for m in page],
+                'pro': [str(m.pro) for m in page],
+                'amount': [m.amount_found for m in page],
+                'match_type': [str(m.match_type) if m.match_type else None for m in page],
+                'timestamp': [m.timestamp for m in page],
+                'track_id': [m.track_id for m in page],
+                'track_title': [m.track.title if m.track else None for m in page],
+                'track_artist': [m.track.artist if m.track else None for m in page],
+                'track_isrc': [m.track.isrc if m.track else None for m in page],
+            }
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+ENCODERS = {
+    'csv': encode_csv,
+    'json': encode_json,
+    'parquet': encode_parquet,
+}
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """Gzip a chunk stream without buffering it"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def encode_export(
+    audit: Audit,
+    pages: TrackMatchPages,
+    format: str,
+    compress: bool = False
+) -> AsyncIterator[bytes]:
+    encoder = ENCODERS.get(format)
+    if encoder is None:
+        raise ValueError(f"Unsupported format: {format}")
+    chunks = encoder(audit, pages)
+    return gzip_chunks(chunks) if compress else chunks
+
+
+def export_media_type(format: str, compress: bool = False) -> str:
+    return 'application/gzip' if compress else EXPORT_MEDIA_TYPES[format]
@@ -0,0 +1,439 @@
+# audit_jobs.py
+import asyncio
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from enum import Enum
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+
+class JobStatus(str, Enum):
+    QUEUED = "QUEUED"
+    RUNNING = "RUNNING"
+    COMPLETED = "COMPLETED"
+    FAILED = "FAILED"
+    CANCELLED = "CANCELLED"
+
+
+@dataclass
+class AuditCheckpoint:
+    """Progress of an audit as of its last committed TrackMatch chunk"""
+    records_done: int = 0
+    matches_found: int = 0
+    total_amount: float = 0.0
+    matched_amount: float = 0.0
+    # TrackMatch chunks committed; rows are tagged with their chunk number
+    chunks_done: int = 0
+
+
+@dataclass
+class AuditJob:
+    """A queued audit.
+
+    Jobs with a `source_path` can be resumed from their checkpoint after
+    a restart. Jobs built from in-memory `records` are only kept for the
+    life of the process.
+    """
+    audit_id: str
+    user_id: str
+    source_path: Optional[str] = None
+    file_type: str = '.csv'
+    # Statement's PRO; None for in-memory records from several PROs
+    pro: Optional[str] = None
+    checkpoint: AuditCheckpoint = field(default_factory=AuditCheckpoint)
+    records: Any = field(default=None, repr=False)
+    cancel_requested: bool = False
+    _store: Optional['AuditJobStore'] = field(default=None, repr=False)
+
+    @property
+    def resumable(self) -> bool:
+        return self.source_path is not None
+
+    async def save_checkpoint(self, checkpoint: AuditCheckpoint) -> None:
+        """Record progress once a chunk of results has been committed"""
+        self.checkpoint = checkpoint
+        if self._store is not None:
+            if await asyncio.to_thread(self._store.save_checkpoint, self.audit_id, checkpoint):
+                # Cancelled from another process (see AuditJobStore.request_cancel)
+                self.cancel_requested = True
+
+
+class AuditJobStore:
+    """SQLite table of audit jobs and their checkpoints.
+
+    Several processes can share one store. Each unfinished job is leased
+    to one owner at a time: the owner renews its leases while it runs,
+    and jobs whose lease has expired (their owner stopped or died) are
+    claimed by the next process that asks, in a single transaction, so
+    no job is run twice.
+    """
+
+    # Added after the first release; created on older stores at open
+    _COLUMNS = {
+        'owner': 'TEXT',
+        'lease_expires': 'REAL',
+        'cancel_requested': 'INTEGER NOT NULL DEFAULT 0',
+        'chunks_done': 'INTEGER NOT NULL DEFAULT 0',
+    }
+
+    def __init__(self, path: str):
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS audit_jobs (
+                    audit_id TEXT PRIMARY KEY,
+                    user_id TEXT NOT NULL,
+                    source_path TEXT,
+                    file_type TEXT NOT NULL,
+                    pro TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    records_done INTEGER NOT NULL DEFAULT 0,
+                    matches_found INTEGER NOT NULL DEFAULT 0,
+                    total_amount REAL NOT NULL DEFAULT 0,
+                    matched_amount REAL NOT NULL DEFAULT 0,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                )
+            ''')
+            existing = {row[1] for row in self._conn.execute('PRAGMA table_info(audit_jobs)')}
+            for column, definition in self._COLUMNS.items():
+                if column not in existing:
+                    self._conn.execute(f'ALTER TABLE audit_jobs ADD COLUMN {column} {definition}')
+
+    def add(self, job: AuditJob, owner: str, lease_seconds: float) -> None:
+        """Store a new queued job, leased to the process queueing it"""
+        now = datetime.now().isoformat()
+        with self._lock, self._conn:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO audit_jobs '
+                '(audit_id, user_id, source_path, file_type, pro, status, owner, lease_expires, '
+                'created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (job.audit_id, job.user_id, job.source_path, job.file_type, job.pro or '',
+                 JobStatus.QUEUED.value, owner, time.time() + lease_seconds, now, now)
+            )
+
+    def claim(self, owner: str, lease_seconds: float) -> List[AuditJob]:
+        """Lease unfinished jobs that no live process owns to `owner`.
+
+        Covers jobs left by a stopped or crashed process. The select and
+        update run in one write transaction, so two processes claiming at
+        once never get the same job.
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute('BEGIN IMMEDIATE')
+            rows = self._conn.execute(
+                'SELECT audit_id, user_id, source_path, file_type, pro, records_done, '
+                'matches_found, total_amount, matched_amount, chunks_done, cancel_requested FROM audit_jobs '
+                'WHERE status IN (?, ?) AND (owner IS NULL OR lease_expires IS NULL OR lease_expires < ?) '
+                'ORDER BY created_at',
+                (JobStatus.QUEUED.value, JobStatus.RUNNING.value, now)
+            ).fetchall()
+            self._conn.executemany(
+                'UPDATE audit_jobs SET owner = ?, lease_expires = ? WHERE audit_id = ?',
+                [(owner, now + lease_seconds, row[0]) for row in rows]
+            )
+        return [
+            AuditJob(
+                audit_id=row[0],
+                user_id=row[1],
+                source_path=row[2],
+                file_type=row[3],
+                pro=row[4] or None,
+                checkpoint=AuditCheckpoint(*row[5:10]),
+                cancel_requested=bool(row[10]),
+                _store=self
+            )
+            for row in rows
+        ]
+
+    def renew(self, owner: str, lease_seconds: float) -> None:
+        """Extend the leases on every unfinished job `owner` holds"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                'UPDATE audit_jobs SET lease_expires = ? WHERE owner = ? AND status IN (?, ?)',
+                (time.time() + lease_seconds, owner, JobStatus.QUEUED.value, JobStatus.RUNNING.value)
+            )
+
+    def release(self, owner: str) -> None:
+        """Give up `owner`'s unfinished jobs, so any process can resume them"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                'UPDATE audit_jobs SET owner = NULL, lease_expires = NULL WHERE owner = ? AND status IN (?, ?)',
+                (owner, JobStatus.QUEUED.value, JobStatus.RUNNING.value)
+            )
+
+    def mark_running(self, audit_id: str, owner: str) -> bool:
+        """Move a job `owner` still holds to RUNNING; False if the lease was
+        lost or the job was cancelled meanwhile"""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                'UPDATE audit_jobs SET status = ?, updated_at = ? '
+                'WHERE audit_id = ? AND owner = ? AND status IN (?, ?)',
+                (JobStatus.RUNNING.value, datetime.now().isoformat(), audit_id, owner,
+                 JobStatus.QUEUED.value, JobStatus.RUNNING.value)
+            )
+        return cursor.rowcount == 1
+
+    def request_cancel(self, audit_id: str) -> Optional[JobStatus]:
+        """Cancel a job held by any process.
+
+        A queued job is cancelled outright (CANCELLED); a running one is
+        flagged and stops at its next checkpoint (RUNNING). None when the
+        job is unknown or already finished.
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                'UPDATE audit_jobs SET status = ?, updated_at = ? WHERE audit_id = ? AND status = ?',
+                (JobStatus.CANCELLED.value, datetime.now().isoformat(), audit_id, JobStatus.QUEUED.value)
+            )
+            if cursor.rowcount:
+                return JobStatus.CANCELLED
+            cursor = self._conn.execute(
+                'UPDATE audit_jobs SET cancel_requested = 1 WHERE audit_id = ? AND status = ?',
+                (audit_id, JobStatus.RUNNING.value)
+            )
+        return JobStatus.RUNNING if cursor.rowcount else None
+
+    def status(self, audit_id: str) -> Optional[JobStatus]:
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT status FROM audit_jobs WHERE audit_id = ?', (audit_id,)
+            ).fetchone()
+        return JobStatus(row[0]) if row else None
+
+    def set_status(self, audit_id: str, status: JobStatus) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                'UPDATE audit_jobs SET status = ?, updated_at = ? WHERE audit_id = ?',
+                (status.value, datetime.now().isoformat(), audit_id)
+            )
+
+    def save_checkpoint(self, audit_id: str, checkpoint: AuditCheckpoint) -> bool:
+        """Store progress; returns whether the job has been asked to cancel"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                'UPDATE audit_jobs SET records_done = ?, matches_found = ?, total_amount = ?, '
+                'matched_amount = ?, chunks_done = ?, updated_at = ? WHERE audit_id = ?',
+                (checkpoint.records_done, checkpoint.matches_found, checkpoint.total_amount,
+                 checkpoint.matched_amount, checkpoint.chunks_done, datetime.now().isoformat(), audit_id)
+            )
+            row = self._conn.execute(
+                'SELECT cancel_requested FROM audit_jobs WHERE audit_id = ?', (audit_id,)
+            ).fetchone()
+        return bool(row and row[0])
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class AuditJobQueue:
+    """Bounded, per-user fair scheduler for audit jobs.
+
+    At most `max_workers` audits run at once. Waiting jobs are kept in
+    one FIFO per user and workers take from users in round-robin order,
+    so one user's large upload cannot starve everyone else. Job state and
+    checkpoints are stored in SQLite, which several processes may share:
+    each queue holds leases on its jobs (see AuditJobStore) and picks up
+    jobs whose owner stopped or died, on `start` and then every
+    `lease_seconds / 3`.
+    """
+
+    def __init__(
+        self,
+        run_job: Callable[[AuditJob], Awaitable[JobStatus]],
+        store_path: str = 'audit_jobs.db',
+        max_workers: int = 2,
+        lease_seconds: float = 60.0
+    ):
+        self.run_job = run_job
+        self.max_workers = max(1, max_workers)
+        self.lease_seconds = lease_seconds
+        self.store = AuditJobStore(store_path)
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._queues: 'OrderedDict[str, Deque[AuditJob]]' = OrderedDict()
+        self._running: Dict[str, AuditJob] = {}
+        # Set when the running job of that id has stopped
+        self._stopped: Dict[str, asyncio.Event] = {}
+        self._workers: Set[asyncio.Task] = set()
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._ready: Optional[asyncio.Condition] = None
+        self._closing = False
+
+    @property
+    def started(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self) -> List[AuditJob]:
+        """Start the workers and claim unfinished jobs no other process
+        holds; returns those jobs"""
+        if self.started:
+            return []
+        self._closing = False
+        self._ready = asyncio.Condition()
+
+        recovered = await self._claim()
+        for _ in range(self.max_workers):
+            task = asyncio.create_task(self._worker())
+            self._workers.add(task)
+            task.add_done_callback(self._workers.discard)
+        self._heartbeat = asyncio.create_task(self._renew_leases())
+        return recovered
+
+    async def _claim(self) -> List[AuditJob]:
+        claimed = await asyncio.to_thread(self.store.claim, self.owner, self.lease_seconds)
+        if claimed:
+            async with self._ready:
+                for job in claimed:
+                    self._queues.setdefault(job.user_id, deque()).append(job)
+                self._ready.notify_all()
+        return claimed
+
+    async def _renew_leases(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                await asyncio.to_thread(self.store.renew, self.owner, self.lease_seconds)
+                await self._claim()
+            except sqlite3.Error as e:
+                logger.warning(f"Could not renew audit job leases: {e}")
+
+    async def submit(self, job: AuditJob) -> None:
+        """Persist a job and queue it behind the user's earlier jobs"""
+        if not self.started:
+            await self.start()
+        job._store = self.store
+        await asyncio.to_thread(self.store.add, job, self.owner, self.lease_seconds)
+        async with self._ready:
+            self._queues.setdefault(job.user_id, deque()).append(job)
+            self._ready.notify()
+
+    async def cancel(self, audit_id: str) -> Optional[JobStatus]:
+        """Cancel a job.
+
+        Queued jobs are dropped immediately (returns CANCELLED); running
+        jobs are flagged and stop after their current batch (returns
+        RUNNING), including jobs held by another process sharing the
+        store. Returns None for unknown or finished jobs.
+        """
+        if audit_id in self._running:
+            self._running[audit_id].cancel_requested = True
+            return JobStatus.RUNNING
+
+        if self._ready is not None:
+            async with self._ready:
+                for user_id, jobs in list(self._queues.items()):
+                    for job in jobs:
+                        if job.audit_id == audit_id:
+                            jobs.remove(job)
+                            if not jobs:
+                                del self._queues[user_id]
+                            await asyncio.to_thread(self.store.set_status, audit_id, JobStatus.CANCELLED)
+                            return JobStatus.CANCELLED
+        return await asyncio.to_thread(self.store.request_cancel, audit_id)
+
+    async def wait_stopped(self, audit_id: str, poll_interval: float = 0.5) -> None:
+        """Wait until the job is no longer running, here or in another
+        process sharing the store"""
+        stopped = self._stopped.get(audit_id)
+        if stopped is not None:
+            await stopped.wait()
+            return
+        while await asyncio.to_thread(self.store.status, audit_id) == JobStatus.RUNNING:
+            await asyncio.sleep(poll_interval)
+
+    def progress(self, audit_id: str) -> Optional[AuditCheckpoint]:
+        """Last checkpoint of a running job, or None if it is not running"""
+        job = self._running.get(audit_id)
+        return job.checkpoint if job is not None else None
+
+    def queued_count(self, user_id: Optional[str] = None) -> int:
+        if user_id is not None:
+            return len(self._queues.get(user_id, ()))
+        return sum(len(jobs) for jobs in self._queues.values())
+
+    async def stop(self, drain: bool = True) -> None:
+        """Stop the workers.
+
+        With `drain`, running jobs finish first; otherwise they are
+        interrupted and resume from their checkpoint on the next start.
+        Queued jobs stay in the store either way, and their leases are
+        released so another process can take them over at once.
+        """
+        if not self.started:
+            return
+        self._closing = True
+        async with self._ready:
+            self._ready.notify_all()
+
+        workers = list(self._workers)
+        if not drain:
+            for task in workers:
+                task.cancel()
+        try:
+            await asyncio.gather(*workers, return_exceptions=True)
+        finally:
+            # Also when a timed-out drain cancels this, so a restarted
+            # process need not wait out the leases
+            if self._heartbeat is not None:
+                self._heartbeat.cancel()
+                self._heartbeat = None
+            queued = sum(len(jobs) for jobs in self._queues.values())
+            if queued:
+                logger.info(f"Stopped with {queued} queued audit(s) left in the job store to resume")
+            self._queues.clear()
+            await asyncio.to_thread(self.store.release, self.owner)
+
+    def _take_next(self) -> Optional[AuditJob]:
+        # Round-robin over users: serve the first user, then move them last
+        for user_id in list(self._queues):
+            jobs = self._queues[user_id]
+            job = jobs.popleft()
+            if jobs:
+                self._queues.move_to_end(user_id)
+            else:
+                del self._queues[user_id]
+            return job
+        return None
+
+    async def _worker(self) -> None:
+        while True:
+            async with self._ready:
+                await self._ready.wait_for(lambda: self._closing or bool(self._queues))
+                if self._closing:
+                    return
+                job = self._take_next()
+            if job is None:
+                continue
+
+            if not await asyncio.to_thread(self.store.mark_running, job.audit_id, self.owner):
+                # Cancelled, or taken over after this process lost its lease
+                continue
+
+            self._running[job.audit_id] = job
+            stopped = self._stopped[job.audit_id] = asyncio.Event()
+            try:
+                status = await self.run_job(job)
+                await asyncio.to_thread(self.store.set_status, job.audit_id, status)
+            except asyncio.CancelledError:
+                # Left RUNNING in the store so it resumes on the next start
+                raise
+            except Exception as e:
+                logger.exception(f"Audit job {job.audit_id} failed: {e}")
+                await asyncio.to_thread(self.store.set_status, job.audit_id, JobStatus.FAILED)
+            finally:
+                self._running.pop(job.audit_id, None)
+                self._stopped.pop(job.audit_id, None)
+                stopped.set()
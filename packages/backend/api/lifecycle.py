@@ -0,0 +1,112 @@
+# lifecycle.py
+import asyncio
+import logging
+import os
+from dataclasses import dataclass
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from prisma import Prisma
+
+from api.audit import AuditService
+
+logger = logging.getLogger(__name__)
+
+def with_connection_limit(url: str, limit: int) -> str:
+    """Set Prisma's `connection_limit` pool size on a datasource URL
+    unless the URL already sets one"""
+    parts = urlsplit(url)
+    query = dict(parse_qsl(parts.query))
+    query.setdefault('connection_limit', str(limit))
+    return urlunsplit(parts._replace(query=urlencode(query)))
+
+
+@dataclass(frozen=True)
+class AuditSettings:
+    """Audit backend configuration, read from the environment"""
+    # Run audit workers in this process
+    enabled: bool = True
+    database_url: Optional[str] = None
+    # Prisma connection pool size per process
+    db_connection_limit: int = 10
+    job_store: str = 'audit_jobs.db'
+    max_concurrent_audits: int = 2
+    match_workers: int = 0
+    # Load the track index before accepting work
+    warm_track_index: bool = True
+    # Seconds to let running audits finish on shutdown; unfinished ones
+    # resume from their checkpoint on the next start
+    drain_timeout: float = 30.0
+
+    @classmethod
+    def from_env(cls) -> 'AuditSettings':
+        env = os.environ
+        return cls(
+            enabled=env.get('AUDITS_ENABLED', '1') not in ('0', 'false', 'no'),
+            database_url=env.get('DATABASE_URL') or None,
+            db_connection_limit=int(env.get('DB_CONNECTION_LIMIT', cls.db_connection_limit)),
+            job_store=env.get('AUDIT_JOB_STORE', cls.job_store),
+            max_concurrent_audits=int(env.get('MAX_CONCURRENT_AUDITS', cls.max_concurrent_audits)),
+            match_workers=int(env.get('MATCH_WORKERS', cls.match_workers)),
+            warm_track_index=env.get('WARM_TRACK_INDEX', '1') not in ('0', 'false', 'no'),
+            drain_timeout=float(env.get('DRAIN_TIMEOUT', cls.drain_timeout)),
+        )
+
+
+class AuditRuntime:
+    """Owns the shared Prisma client and AuditService for a process.
+
+    Use as an async context manager, e.g. from a FastAPI lifespan:
+    entering connects the pooled client, warms the track index and
+    starts the audit workers (resuming unfinished audits); leaving
+    drains running audits for up to `drain_timeout` seconds, then
+    interrupts the rest and disconnects.
+    """
+
+    def __init__(self, settings: Optional[AuditSettings] = None):
+        self.settings = settings or AuditSettings.from_env()
+        self.db: Optional[Prisma] = None
+        self.audits: Optional[AuditService] = None
+
+    async def __aenter__(self) -> 'AuditRuntime':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.stop()
+
+    async def start(self) -> None:
+        settings = self.settings
+        if settings.database_url:
+            self.db = Prisma(datasource={
+                'url': with_connection_limit(settings.database_url, settings.db_connection_limit)
+            })
+        else:
+            self.db = Prisma()
+        await self.db.connect()
+
+        self.audits = AuditService(
+            self.db,
+            match_workers=settings.match_workers,
+            job_store=settings.job_store,
+            max_concurrent_audits=settings.max_concurrent_audits
+        )
+        if settings.warm_track_index:
+            await self.audits.get_track_index()
+        await self.audits.start_jobs()
+
+    async def stop(self) -> None:
+        if self.audits is not None:
+            try:
+                await asyncio.wait_for(
+                    self.audits.shutdown(drain=True),
+                    self.settings.drain_timeout
+                )
+            except asyncio.TimeoutError:
+                # Cancelled jobs stay RUNNING in the job store and resume
+                # from their last checkpoint
+                logger.warning("Audit drain timed out; unfinished audits will resume on restart")
+            self.audits = None
+        if self.db is not None and self.db.is_connected():
+            await self.db.disconnect()
+        self.db = None
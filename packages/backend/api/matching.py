@@ -0,0 +1,223 @@
+# matching.py
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from enum import Enum
+from typing import AsyncIterator, Deque, Dict, List, Optional, Sequence, Tuple
+
+from api.metrics import REGISTRY
+from api.normalization import title_artist_tokens
+from api.records import RoyaltyRecord
+from api.similarity import BatchScorer
+from api.track_index import IndexedTrack, TrackIndex
+
+# Minimum token Jaccard similarity for a FUZZY match
+FUZZY_THRESHOLD = 0.8
+
+# Enum matching Prisma schema
+class MatchType(str, Enum):
+    EXACT = "EXACT"
+    FUZZY = "FUZZY"
+    MANUAL = "MANUAL"
+    ISRC = "ISRC"
+    TITLE_ARTIST = "TITLE_ARTIST"
+
+RecordMatches = List[Tuple[IndexedTrack, MatchType]]
+RecordKey = Tuple[Optional[str], str, str]
+
+# Seconds per batch spent in each audit stage: parse, index_lookup,
+# fuzzy_scoring, db_write
+STAGE_SECONDS = REGISTRY.histogram(
+    'audit_stage_seconds',
+    'Time spent per batch in each audit processing stage',
+    ['stage']
+)
+
+
+def fuzzy_match_possible(title: Optional[str], artist: Optional[str]) -> bool:
+    """Check if fuzzy matching is possible for a title/artist pair"""
+    return bool(title and artist)
+
+
+def match_record(
+    index: TrackIndex,
+    isrc: Optional[str],
+    title: str,
+    artist: str,
+    threshold: float = FUZZY_THRESHOLD
+) -> RecordMatches:
+    """Match one record against the index: ISRC, then exact title/artist, then fuzzy"""
+    matches = []
+
+    # 1. Try exact ISRC match first
+    if isrc:
+        track = index.find_by_isrc(isrc)
+        if track:
+            matches.append((track, MatchType.ISRC))
+
+    # 2. Try title + artist exact match
+    if not matches:
+        for track in index.find_by_title_artist(title, artist):
+            matches.append((track, MatchType.EXACT))
+
+    # 3. Try fuzzy matching if no exact matches
+    if not matches and fuzzy_match_possible(title, artist):
+        for track, _ in index.search_similar_tokens(title_artist_tokens(title, artist), threshold):
+            matches.append((track, MatchType.FUZZY))
+
+    return matches
+
+
+def match_records(
+    index: TrackIndex,
+    keys: Sequence[RecordKey],
+    scorer: BatchScorer,
+    timings: Optional[Dict[str, float]] = None
+) -> List[RecordMatches]:
+    """Match a batch of (isrc, title, artist) keys like `match_record`.
+
+    Records without an ISRC or exact match are fuzzy-matched together
+    through `scorer`, which scores each distinct title/artist once.
+    Seconds spent on index lookups and fuzzy scoring are added to
+    `timings` when given.
+    """
+    started = time.perf_counter()
+    results: List[RecordMatches] = []
+    fuzzy_positions = []
+    fuzzy_queries = []
+
+    for isrc, title, artist in keys:
+        matches = []
+        track = index.find_by_isrc(isrc) if isrc else None
+        if track:
+            matches.append((track, MatchType.ISRC))
+        else:
+            for track in index.find_by_title_artist(title, artist):
+                matches.append((track, MatchType.EXACT))
+        if not matches and fuzzy_match_possible(title, artist):
+            fuzzy_positions.append(len(results))
+            fuzzy_queries.append(title_artist_tokens(title, artist))
+        results.append(matches)
+    looked_up = time.perf_counter()
+
+    for position, similar in zip(fuzzy_positions, scorer.score(fuzzy_queries)):
+        results[position] = [(track, MatchType.FUZZY) for track, _ in similar]
+
+    if timings is not None:
+        timings['index_lookup'] = timings.get('index_lookup', 0.0) + looked_up - started
+        timings['fuzzy_scoring'] = timings.get('fuzzy_scoring', 0.0) + time.perf_counter() - looked_up
+    return results
+
+
+def observe_timings(timings: Dict[str, float]) -> None:
+    for stage, seconds in timings.items():
+        STAGE_SECONDS.labels(stage=stage).observe(seconds)
+
+
+# Index copy and scorer held by each worker process, set once by the
+# pool initializer
+_worker_index: Optional[TrackIndex] = None
+_worker_scorer: Optional[BatchScorer] = None
+
+
+def _init_worker(index: TrackIndex, threshold: float) -> None:
+    global _worker_index, _worker_scorer
+    _worker_index = index
+    _worker_scorer = BatchScorer(index, threshold)
+
+
+def _match_shard(keys: List[RecordKey]) -> Tuple[List[List[Tuple[str, str]]], Dict[str, float]]:
+    """Worker entry point: match a shard, returning (track id, match type)
+    pairs and stage timings, which the parent records"""
+    timings: Dict[str, float] = {}
+    pairs = [
+        [(track.id, match_type.value) for track, match_type in matches]
+        for matches in match_records(_worker_index, keys, _worker_scorer, timings)
+    ]
+    return pairs, timings
+
+
+class ParallelMatcher:
+    """Match record batches across a process pool.
+
+    Each worker receives a read-only copy of the track index when it
+    starts. Batches are split into shards of `shard_size` records; only
+    (isrc, title, artist) tuples go to the workers and only track ids
+    come back, which are resolved against the parent's index. Results
+    are yielded in input order, so they are identical to matching
+    in-process with `match_records`.
+    """
+
+    def __init__(
+        self,
+        index: TrackIndex,
+        workers: int,
+        shard_size: int = 2000,
+        threshold: float = FUZZY_THRESHOLD,
+        mp_context=None
+    ):
+        self.index = index
+        self.workers = max(1, workers)
+        self.shard_size = max(1, shard_size)
+        self.threshold = threshold
+        # Snapshot matching what the workers were given, in case the
+        # cached index changes while an audit is running
+        self._tracks = dict(index.tracks)
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=mp_context,
+            initializer=_init_worker,
+            initargs=(index, threshold)
+        )
+
+    def __enter__(self) -> 'ParallelMatcher':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    async def match_batches(
+        self,
+        batches: AsyncIterator[Sequence[RoyaltyRecord]]
+    ) -> AsyncIterator[Tuple[Sequence[RoyaltyRecord], List[RecordMatches]]]:
+        """Yield (batch, matches per record) pairs in input order"""
+        loop = asyncio.get_running_loop()
+        # Keep every worker busy without queueing the whole statement
+        max_in_flight = self.workers * 2
+        in_flight: Deque[Tuple[Sequence[RoyaltyRecord], List[asyncio.Future]]] = deque()
+        shards_in_flight = 0
+
+        async for batch in batches:
+            keys = [(record.isrc, record.title, record.artist) for record in batch]
+            futures = [
+                loop.run_in_executor(
+                    self._executor,
+                    _match_shard,
+                    keys[start:start + self.shard_size]
+                )
+                for start in range(0, len(keys), self.shard_size)
+            ]
+            in_flight.append((batch, futures))
+            shards_in_flight += len(futures)
+
+            while shards_in_flight > max_in_flight:
+                done_batch, done_futures = in_flight.popleft()
+                shards_in_flight -= len(done_futures)
+                yield done_batch, await self._collect(done_futures)
+
+        while in_flight:
+            done_batch, done_futures = in_flight.popleft()
+            yield done_batch, await self._collect(done_futures)
+
+    async def _collect(self, futures: List[asyncio.Future]) -> List[RecordMatches]:
+        tracks = self._tracks
+        results = []
+        for shard, timings in await asyncio.gather(*futures):
+            observe_timings(timings)
+            for pairs in shard:
+                results.append([(tracks[track_id], MatchType(match_type)) for track_id, match_type in pairs])
+        return results
@@ -0,0 +1,71 @@
+# normalization.py
+import re
+import unicodedata
+from functools import lru_cache
+from typing import FrozenSet, Optional
+
+# Distinct strings whose normalized tokens are kept; statements repeat
+# the same titles and artists many times over
+TOKEN_CACHE_SIZE = 1 << 16
+
+_APOSTROPHES = re.compile(r"['‘’`]")
+_AMPERSAND = re.compile(r'\s*[&+]\s*')
+_FEATURING = re.compile(r'\b(?:feat|ft|featuring)\b\.?')
+_PUNCTUATION = re.compile(r'[^\w\s]|_')
+
+# Version words that mark a recording of the same work, e.g.
+# "Song (Radio Edit)", "Song [2011 Remaster]" or "Song - Live at Wembley"
+_VERSION_WORDS = (
+    r'(?:re)?mix(?:ed)?|edit|version|remaster(?:ed)?|live|acoustic|instrumental|'
+    r'radio|extended|mono|stereo|demo|clean|explicit|dub|unplugged'
+)
+_VERSION_BRACKETS = re.compile(
+    rf'\s*[\(\[][^\)\]]*\b(?:{_VERSION_WORDS})\b[^\)\]]*[\)\]]',
+    re.IGNORECASE
+)
+_VERSION_DASH = re.compile(
+    rf'\s+[-–—]\s+[^-–—]*\b(?:{_VERSION_WORDS})\b.*$',
+    re.IGNORECASE
+)
+
+
+def fold(text: str) -> str:
+    """Casefold and strip accents, so 'Beyoncé' and 'BEYONCE' compare equal"""
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def strip_version(title: str) -> str:
+    """Drop remix/edit/remaster suffixes from a title"""
+    stripped = _VERSION_DASH.sub('', _VERSION_BRACKETS.sub('', title))
+    # Never reduce a title to nothing, e.g. a song called "(Remix)"
+    return stripped if stripped.strip() else title
+
+
+def normalize_text(text: Optional[str]) -> str:
+    """Fold a string to the space-separated word form used for fuzzy matching.
+
+    Accents and case are folded, '&'/'+' read as 'and', "feat."-style
+    markers are dropped (the featured names stay) and punctuation is
+    removed.
+    """
+    if not text:
+        return ''
+    text = fold(text)
+    text = _APOSTROPHES.sub('', text)
+    text = _AMPERSAND.sub(' and ', text)
+    text = _FEATURING.sub(' ', text)
+    text = _PUNCTUATION.sub(' ', text)
+    return ' '.join(text.split())
+
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def text_tokens(text: Optional[str]) -> FrozenSet[str]:
+    """Normalized tokens of a string"""
+    return frozenset(normalize_text(text).split())
+
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def title_artist_tokens(title: Optional[str], artist: Optional[str]) -> FrozenSet[str]:
+    """Normalized tokens of a title/artist pair, ignoring version suffixes"""
+    return text_tokens(strip_version(title or '')) | text_tokens(artist)
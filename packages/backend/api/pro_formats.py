@@ -0,0 +1,218 @@
+# pro_formats.py
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from api.records import PRO, RoyaltyRecordBatch
+
+
+@dataclass(frozen=True)
+class ColumnProfile:
+    """Header aliases for one PRO's statement layout.
+
+    Each field lists the header names it may appear under, in priority
+    order. Headers are matched case-insensitively and ignoring
+    surrounding whitespace.
+    """
+    isrc: Tuple[str, ...] = ('ISRC',)
+    title: Tuple[str, ...] = ('Title', 'Song Title', 'track_title')
+    artist: Tuple[str, ...] = ('Artist', 'Writer', 'artist_name')
+    amount: Tuple[str, ...] = ('Amount', 'Royalty', 'earnings')
+    period: Tuple[str, ...] = ('Period', 'Statement Period')
+    plays: Tuple[str, ...] = ('Plays', 'Streams')
+    # Decimal separator used in the amount column
+    decimal_separator: str = '.'
+
+    def extend(self, **aliases: Tuple[str, ...]) -> 'ColumnProfile':
+        """Return a profile with extra aliases tried before the existing ones"""
+        merged = {
+            name: tuple(values) + getattr(self, name)
+            for name, values in aliases.items()
+            if name != 'decimal_separator'
+        }
+        if 'decimal_separator' in aliases:
+            merged['decimal_separator'] = aliases['decimal_separator']
+        return ColumnProfile(**{**self.__dict__, **merged})
+
+
+@dataclass
+class ParseReject:
+    """A statement row that could not be parsed"""
+    line_number: int
+    reason: str
+    raw_offset: Optional[int] = None
+    row: List[str] = field(default_factory=list)
+
+
+GENERIC_FORMAT = ColumnProfile()
+
+PRO_FORMATS: Dict[PRO, ColumnProfile] = {
+    PRO.ASCAP: GENERIC_FORMAT.extend(
+        title=('Title Name', 'Work Title'),
+        artist=('Performer', 'Writer Name'),
+        amount=('Dollars', 'Royalty Amount'),
+        period=('Distribution Period', 'Performance Period'),
+        plays=('Performances', 'Credits')
+    ),
+    PRO.BMI: GENERIC_FORMAT.extend(
+        title=('Title Name', 'Song Name'),
+        artist=('Performer Name', 'Participant Name'),
+        amount=('Royalty Amount', 'Current Activity Amt'),
+        period=('Perf Period', 'Period Name'),
+        plays=('Perf Count', 'Performance Count')
+    ),
+    PRO.PRS: GENERIC_FORMAT.extend(
+        title=('Work Title', 'Tune Title'),
+        artist=('Work Performer', 'Performer'),
+        amount=('Amount (GBP)', 'Royalty (GBP)'),
+        period=('Distribution', 'Distribution Period'),
+        plays=('Usage Count', 'Performances')
+    ),
+    PRO.SOCAN: GENERIC_FORMAT.extend(
+        title=('Work Title',),
+        artist=('Performer',),
+        amount=('Amount (CAD)', 'Royalty Amount'),
+        period=('Distribution Period',),
+        plays=('Performances', 'Usage Count')
+    ),
+    PRO.GEMA: GENERIC_FORMAT.extend(
+        isrc=('ISRC-Code',),
+        title=('Werktitel', 'Titel'),
+        artist=('Interpret', 'Urheber'),
+        amount=('Betrag', 'Betrag (EUR)'),
+        period=('Abrechnungszeitraum', 'Zeitraum'),
+        plays=('Nutzungen', 'Aufführungen'),
+        decimal_separator=','
+    ),
+    PRO.SACEM: GENERIC_FORMAT.extend(
+        title=('Titre', "Titre de l'oeuvre"),
+        artist=('Interprète', 'Interprete'),
+        amount=('Montant', 'Montant (EUR)'),
+        period=('Période', 'Periode'),
+        plays=('Diffusions', 'Nombre de diffusions'),
+        decimal_separator=','
+    ),
+    PRO.JASRAC: GENERIC_FORMAT.extend(
+        title=('作品名', 'Work Title'),
+        artist=('アーティスト名', 'Performer'),
+        amount=('分配額', 'Amount (JPY)'),
+        period=('分配期', 'Distribution Period'),
+        plays=('利用回数', 'Usage Count')
+    ),
+    PRO.APRA: GENERIC_FORMAT.extend(
+        title=('Work Title',),
+        artist=('Performer', 'Artist Name'),
+        amount=('Royalty Amount', 'Amount (AUD)'),
+        period=('Distribution Period',),
+        plays=('Performances', 'Usage Count')
+    ),
+}
+
+
+def register_format(pro: PRO, profile: ColumnProfile) -> None:
+    """Register or replace the column profile for a PRO"""
+    PRO_FORMATS[PRO(pro)] = profile
+
+
+def get_format(pro: PRO) -> ColumnProfile:
+    """Column profile for a PRO, falling back to the generic layout"""
+    return PRO_FORMATS.get(PRO(pro), GENERIC_FORMAT)
+
+
+def parse_number(value: str, decimal_separator: str = '.') -> float:
+    """Parse an amount or count written with the given decimal separator.
+
+    The other separator (and any spaces) is read as thousands grouping,
+    so with ',' a lone '.' is never a decimal point.
+
+    >>> parse_number('$1,234.50')
+    1234.5
+    >>> parse_number('1.234', ',')
+    1234.0
+    >>> parse_number('1.000.000', ',')
+    1000000.0
+    >>> parse_number('1.234,56 €', ',')
+    1234.56
+    >>> parse_number('0,5', ',')
+    0.5
+    >>> parse_number('')
+    0.0
+    """
+    value = value.strip().strip('$£€¥').strip()
+    if not value:
+        return 0.0
+    value = value.replace(' ', '').replace('\u00a0', '')
+    if decimal_separator == ',':
+        value = value.replace('.', '').replace(',', '.')
+    else:
+        value = value.replace(',', '')
+    return float(value)
+
+
+def _header_key(name: str) -> str:
+    return name.strip().casefold()
+
+
+class CompiledColumns:
+    """Column indexes for one statement header, resolved once per file"""
+
+    def __init__(self, profile: ColumnProfile, header: Sequence[str]):
+        positions: Dict[str, int] = {}
+        for position, name in enumerate(header):
+            positions.setdefault(_header_key(name), position)
+
+        def resolve(aliases: Tuple[str, ...]) -> Tuple[int, ...]:
+            found = []
+            for alias in aliases:
+                position = positions.get(_header_key(alias))
+                if position is not None and position not in found:
+                    found.append(position)
+            return tuple(found)
+
+        self.profile = profile
+        self.isrc = resolve(profile.isrc)
+        self.title = resolve(profile.title)
+        self.artist = resolve(profile.artist)
+        self.amount = resolve(profile.amount)
+        self.period = resolve(profile.period)
+        self.plays = resolve(profile.plays)
+
+    @staticmethod
+    def _value(row: Sequence[str], positions: Tuple[int, ...]) -> str:
+        # First non-empty value among the matched columns
+        for position in positions:
+            if position < len(row) and row[position]:
+                return row[position]
+        return ''
+
+    def append_row(
+        self,
+        row: Sequence[str],
+        pro: PRO,
+        batch: RoyaltyRecordBatch,
+        raw_offset: Optional[int] = None
+    ) -> Optional[str]:
+        """Append a parsed row to the batch; return a reject reason on failure"""
+        value = self._value
+        amount_text = value(row, self.amount)
+        try:
+            amount = parse_number(amount_text, self.profile.decimal_separator)
+        except ValueError:
+            return f"invalid amount {amount_text!r}"
+
+        plays_text = value(row, self.plays).strip()
+        try:
+            plays = int(parse_number(plays_text, self.profile.decimal_separator)) if plays_text else None
+        except ValueError:
+            return f"invalid play count {plays_text!r}"
+
+        batch.append(
+            isrc=value(row, self.isrc).strip() or None,
+            title=value(row, self.title),
+            artist=value(row, self.artist),
+            pro=pro,
+            amount=amount,
+            period=value(row, self.period),
+            plays=plays,
+            raw_offset=raw_offset
+        )
+        return None
@@ -0,0 +1,220 @@
+# records.py
+import codecs
+import hashlib
+import os
+import sys
+from array import array
+from enum import Enum
+from typing import Any, BinaryIO, Iterator, List, Optional, Tuple, Union
+
+
+class PRO(str, Enum):
+    ASCAP = "ASCAP"
+    BMI = "BMI"
+    PRS = "PRS"
+    SOCAN = "SOCAN"
+    GEMA = "GEMA"
+    SACEM = "SACEM"
+    JASRAC = "JASRAC"
+    APRA = "APRA"
+    OTHER = "OTHER"
+
+# Stored in the plays column when a row has no play count
+_NO_PLAYS = -1
+
+
+class RoyaltyRecordBatch:
+    """Struct-of-arrays batch of royalty records.
+
+    Amounts, plays and source offsets live in typed `array` columns,
+    PRO values are shared enum members and periods are interned, so a
+    row costs a handful of pointers instead of a dataclass plus the raw
+    CSV dict. When the batch was parsed from a file, `source` and
+    `raw_offsets` let `read_raw` recover the original line on demand.
+    """
+
+    __slots__ = (
+        'isrcs', 'titles', 'artists', 'pros', 'periods',
+        'amounts', 'plays', 'raw_offsets', 'source'
+    )
+
+    def __init__(self, source: Optional[Union[str, os.PathLike]] = None):
+        self.isrcs: List[Optional[str]] = []
+        self.titles: List[str] = []
+        self.artists: List[str] = []
+        self.pros: List[PRO] = []
+        self.periods: List[str] = []
+        self.amounts = array('d')
+        self.plays = array('q')
+        self.raw_offsets: Optional[array] = array('q') if source is not None else None
+        self.source = source
+
+    def append(
+        self,
+        isrc: Optional[str],
+        title: str,
+        artist: str,
+        pro: PRO,
+        amount: float,
+        period: str,
+        plays: Optional[int] = None,
+        raw_offset: Optional[int] = None
+    ) -> None:
+        """Append one row to every column"""
+        pro = PRO(pro)
+        self.isrcs.append(isrc or None)
+        self.titles.append(title)
+        self.artists.append(artist)
+        self.pros.append(pro)
+        self.periods.append(sys.intern(period))
+        self.amounts.append(amount)
+        self.plays.append(_NO_PLAYS if plays is None else plays)
+        if self.raw_offsets is not None:
+            self.raw_offsets.append(-1 if raw_offset is None else raw_offset)
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def __getitem__(self, row: int) -> 'RoyaltyRecord':
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError('batch row out of range')
+        return RoyaltyRecord._view(self, row)
+
+    def __iter__(self) -> Iterator['RoyaltyRecord']:
+        view = RoyaltyRecord._view
+        for row in range(len(self)):
+            yield view(self, row)
+
+    def read_raw(self, row: int) -> Optional[str]:
+        """Re-read the source line a row starts on"""
+        if self.source is None or self.raw_offsets is None:
+            return None
+        offset = self.raw_offsets[row]
+        if offset < 0:
+            return None
+        with open(self.source, 'rb') as f:
+            f.seek(offset)
+            return f.readline().decode('utf-8-sig').rstrip('\r\n')
+
+
+class RoyaltyRecord:
+    """Represents a royalty record from external source.
+
+    A `__slots__` view over one row of a RoyaltyRecordBatch. Constructing
+    one directly wraps a single-row batch.
+    """
+
+    __slots__ = ('_batch', '_row')
+
+    def __init__(
+        self,
+        isrc: Optional[str],
+        title: str,
+        artist: str,
+        pro: PRO,
+        amount: float,
+        period: str,
+        plays: Optional[int] = None
+    ):
+        batch = RoyaltyRecordBatch()
+        batch.append(isrc, title, artist, pro, amount, period, plays)
+        self._batch = batch
+        self._row = 0
+
+    @classmethod
+    def _view(cls, batch: RoyaltyRecordBatch, row: int) -> 'RoyaltyRecord':
+        record = cls.__new__(cls)
+        record._batch = batch
+        record._row = row
+        return record
+
+    @property
+    def isrc(self) -> Optional[str]:
+        return self._batch.isrcs[self._row]
+
+    @property
+    def title(self) -> str:
+        return self._batch.titles[self._row]
+
+    @property
+    def artist(self) -> str:
+        return self._batch.artists[self._row]
+
+    @property
+    def pro(self) -> PRO:
+        return self._batch.pros[self._row]
+
+    @property
+    def amount(self) -> float:
+        return self._batch.amounts[self._row]
+
+    @property
+    def period(self) -> str:
+        return self._batch.periods[self._row]
+
+    @property
+    def plays(self) -> Optional[int]:
+        plays = self._batch.plays[self._row]
+        return None if plays == _NO_PLAYS else plays
+
+    @property
+    def raw_offset(self) -> Optional[int]:
+        offsets = self._batch.raw_offsets
+        if offsets is None or offsets[self._row] < 0:
+            return None
+        return offsets[self._row]
+
+    def read_raw(self) -> Optional[str]:
+        """Re-read the source line this record was parsed from"""
+        return self._batch.read_raw(self._row)
+
+    def fingerprint(self) -> str:
+        """Content hash of the fields that decide a record's royalty line.
+
+        Re-sent statements repeat records with the same fingerprint, so
+        their earlier match results can be reused.
+        """
+        key = '\x1f'.join((
+            self.isrc or '',
+            self.title,
+            self.artist,
+            PRO(self.pro).value,
+            self.period,
+            repr(float(self.amount))
+        ))
+        return hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _fields(self) -> Tuple[Any, ...]:
+        return (self.isrc, self.title, self.artist, self.pro, self.amount, self.period, self.plays)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, RoyaltyRecord):
+            return NotImplemented
+        return self._fields() == other._fields()
+
+    def __repr__(self) -> str:
+        return (
+            f"RoyaltyRecord(isrc={self.isrc!r}, title={self.title!r}, artist={self.artist!r}, "
+            f"pro={self.pro!r}, amount={self.amount!r}, period={self.period!r}, plays={self.plays!r})"
+        )
+
+
+class OffsetLineReader:
+    """Decode a binary stream line by line while tracking byte offsets.
+
+    `offset` is the number of bytes consumed so far, i.e. the start of
+    the next line a csv reader will pull.
+    """
+
+    def __init__(self, stream: BinaryIO, encoding: str = 'utf-8-sig'):
+        self.stream = stream
+        self.offset = 0
+        self._decoder = codecs.getincrementaldecoder(encoding)()
+
+    def __iter__(self) -> Iterator[str]:
+        decode = self._decoder.decode
+        for line in self.stream:
+            self.offset += len(line)
+            yield decode(line)
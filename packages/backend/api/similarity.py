@@ -0,0 +1,48 @@
+# similarity.py
+from collections import OrderedDict
+from typing import Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+
+class BatchScorer:
+    """Fuzzy-match a batch of token sets against a TrackIndex in one call.
+
+    Statements repeat the same title/artist many times, so each distinct
+    query is scored once and the last `cache_size` results are reused
+    across batches. Results equal `search_similar_tokens`.
+    """
+
+    def __init__(
+        self,
+        index,
+        threshold: float,
+        cache_size: int = 1 << 16
+    ):
+        self.index = index
+        self.threshold = threshold
+        self.cache_size = max(0, cache_size)
+        self._cache: 'OrderedDict[Tuple[FrozenSet[str], Optional[int]], list]' = OrderedDict()
+
+    def score(
+        self,
+        queries: Sequence[FrozenSet[str]],
+        limit: Optional[int] = None
+    ) -> List[list]:
+        """(track, score) results for each query, in query order"""
+        results: Dict[FrozenSet[str], list] = {}
+        for query in queries:
+            if query not in results:
+                results[query] = self._cached(query, limit)
+        return [results[query] for query in queries]
+
+    def _cached(self, query: FrozenSet[str], limit: Optional[int]) -> list:
+        key = (query, limit)
+        result = self._cache.get(key)
+        if result is not None:
+            self._cache.move_to_end(key)
+            return result
+        result = self.index.search_similar_tokens(query, self.threshold, limit)
+        if self.cache_size:
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
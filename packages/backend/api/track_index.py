@@ -0,0 +1,216 @@
+# track_index.py
+import hashlib
+import math
+from typing import Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from api.normalization import title_artist_tokens
+
+# Slack for float comparisons in the candidate filters; it only widens them
+_EPSILON = 1e-9
+
+
+class IndexedTrack(NamedTuple):
+    """Lightweight copy of the Track columns used for matching"""
+    id: str
+    isrc: Optional[str]
+    title: str
+    artist: str
+
+
+def normalize_isrc(isrc: Optional[str]) -> Optional[str]:
+    """Normalize an ISRC so 'us-tde-24-00123' and 'USTDE2400123' compare equal"""
+    if not isrc:
+        return None
+    key = ''.join(isrc.split()).replace('-', '').upper()
+    return key or None
+
+
+def normalize_title_artist(title: Optional[str], artist: Optional[str]) -> Tuple[str, str]:
+    """Normalize a title/artist pair for exact lookups"""
+    return (
+        ' '.join((title or '').split()).casefold(),
+        ' '.join((artist or '').split()).casefold()
+    )
+
+
+def _track_hash(track: IndexedTrack) -> int:
+    key = '\x1f'.join((track.id, track.isrc or '', track.title, track.artist))
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def jaccard(tokens1: FrozenSet[str], tokens2: FrozenSet[str]) -> float:
+    """Jaccard similarity of two token sets (0.0 when either is empty)"""
+    if not tokens1 or not tokens2:
+        return 0.0
+    return len(tokens1 & tokens2) / len(tokens1 | tokens2)
+
+
+class TrackIndex:
+    """In-memory ISRC, title/artist and token lookup tables over the Track table.
+
+    Built once with a single scan of the catalog and kept current with
+    `add`/`remove` when tracks change, so matching a royalty record needs
+    no database queries. Fuzzy lookups go through an inverted index from
+    token to track ids, so only tracks sharing a token with the query are
+    considered.
+    """
+
+    def __init__(self, tracks: Iterable[object] = ()):
+        self.tracks: Dict[str, IndexedTrack] = {}
+        self._by_isrc: Dict[str, List[str]] = {}
+        self._by_title_artist: Dict[Tuple[str, str], List[str]] = {}
+        self._tokens: Dict[str, FrozenSet[str]] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        self._sequence: Dict[str, int] = {}
+        self._next_sequence = 0
+        # XOR of the tracks' hashes, so it is independent of insertion order
+        self._content_hash = 0
+        for track in tracks:
+            self.add(track)
+
+    def __len__(self) -> int:
+        return len(self.tracks)
+
+    def __contains__(self, track_id: str) -> bool:
+        return track_id in self.tracks
+
+    @property
+    def version(self) -> str:
+        """Digest of the indexed track columns: equal for indexes over the
+        same catalog however they were built, different after any change"""
+        return f"{len(self.tracks)}-{self._content_hash:016x}"
+
+    def add(self, track: object) -> IndexedTrack:
+        """Add or replace a track (any object with id/isrc/title/artist)"""
+        if track.id in self.tracks:
+            self.remove(track.id)
+
+        indexed = IndexedTrack(
+            id=track.id,
+            isrc=track.isrc,
+            title=track.title or '',
+            artist=track.artist or ''
+        )
+        self.tracks[indexed.id] = indexed
+        self._content_hash ^= _track_hash(indexed)
+
+        isrc_key = normalize_isrc(indexed.isrc)
+        if isrc_key:
+            self._by_isrc.setdefault(isrc_key, []).append(indexed.id)
+        key = normalize_title_artist(indexed.title, indexed.artist)
+        self._by_title_artist.setdefault(key, []).append(indexed.id)
+
+        # Normalized once per track; queries reuse these
+        tokens = title_artist_tokens(indexed.title, indexed.artist)
+        self._tokens[indexed.id] = tokens
+        for token in tokens:
+            self._postings.setdefault(token, set()).add(indexed.id)
+        self._sequence[indexed.id] = self._next_sequence
+        self._next_sequence += 1
+
+        return indexed
+
+    def remove(self, track_id: str) -> bool:
+        """Drop a track from the index"""
+        indexed = self.tracks.pop(track_id, None)
+        if indexed is None:
+            return False
+        self._content_hash ^= _track_hash(indexed)
+
+        isrc_key = normalize_isrc(indexed.isrc)
+        if isrc_key:
+            self._discard(self._by_isrc, isrc_key, track_id)
+        self._discard(
+            self._by_title_artist,
+            normalize_title_artist(indexed.title, indexed.artist),
+            track_id
+        )
+
+        for token in self._tokens.pop(track_id):
+            postings = self._postings[token]
+            postings.discard(track_id)
+            if not postings:
+                del self._postings[token]
+        del self._sequence[track_id]
+        return True
+
+    def find_by_isrc(self, isrc: Optional[str]) -> Optional[IndexedTrack]:
+        """Return the first track registered under an ISRC"""
+        key = normalize_isrc(isrc)
+        if not key:
+            return None
+        ids = self._by_isrc.get(key)
+        return self.tracks[ids[0]] if ids else None
+
+    def find_by_title_artist(self, title: str, artist: str) -> List[IndexedTrack]:
+        """Return every track with the same normalized title and artist"""
+        ids = self._by_title_artist.get(normalize_title_artist(title, artist), [])
+        return [self.tracks[track_id] for track_id in ids]
+
+    def search_similar_tokens(
+        self,
+        query: FrozenSet[str],
+        threshold: float,
+        limit: Optional[int] = None
+    ) -> List[Tuple[IndexedTrack, float]]:
+        """Return tracks whose token Jaccard similarity to `query` is >= threshold.
+
+        Results are ordered by score, best first, then by index order, and
+        cut to `limit` when given. Scores are the same as `jaccard` on the
+        full token sets; the index only prunes tracks that cannot reach
+        the threshold:
+
+        - a track with similarity >= t shares at least ceil(t * |q|) of the
+          query's |q| tokens, so it must contain one of any
+          |q| - ceil(t * |q|) + 1 query tokens. Only the rarest ones are probed.
+        - its token count c must satisfy t * |q| <= c <= |q| / t.
+        """
+        if not query:
+            return []
+
+        if threshold <= 0:
+            candidates: Iterable[str] = self.tracks
+        else:
+            min_overlap = max(1, math.ceil(threshold * len(query) - _EPSILON))
+            prefix_length = len(query) - min_overlap + 1
+            probe = sorted(query, key=lambda token: len(self._postings.get(token, ())))
+            candidates = set()
+            for token in probe[:prefix_length]:
+                candidates.update(self._postings.get(token, ()))
+
+        return self.score_candidates(query, candidates, threshold, limit)
+
+    def score_candidates(
+        self,
+        query: FrozenSet[str],
+        candidates: Iterable[str],
+        threshold: float,
+        limit: Optional[int] = None
+    ) -> List[Tuple[IndexedTrack, float]]:
+        """Score candidate track ids against `query`, ordered as in `search_similar_tokens`"""
+        min_size = threshold * len(query) - _EPSILON
+        max_size = len(query) / threshold + _EPSILON if threshold > 0 else math.inf
+
+        scored = []
+        for track_id in candidates:
+            tokens = self._tokens[track_id]
+            if not min_size <= len(tokens) <= max_size:
+                continue
+            score = jaccard(tokens, query)
+            if score >= threshold:
+                scored.append((-score, self._sequence[track_id], track_id))
+
+        scored.sort()
+        if limit is not None:
+            scored = scored[:limit]
+        return [(self.tracks[track_id], -score) for score, _, track_id in scored]
+
+    @staticmethod
+    def _discard(table: Dict, key, track_id: str) -> None:
+        ids = table.get(key)
+        if not ids:
+            return
+        if track_id in ids:
+            ids.remove(track_id)
+        if not ids:
+            del table[key]
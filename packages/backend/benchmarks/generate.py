@@ -0,0 +1,192 @@
+"""
+Seeded generators for benchmark catalogs and PRO statements
+
+Statements are written with the header names and decimal separator of
+each PRO's column profile (api.pro_formats), so they go through the same
+parsing path as real files. Every knob is explicit and the output only
+depends on the seed:
+
+    python -m benchmarks.generate --tracks 100000 --rows 1000000 --pro GEMA statement.csv
+"""
+import argparse
+import csv
+import random
+import string
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional
+
+from api.pro_formats import get_format
+from api.records import PRO
+
+WORDS = (
+    'love', 'night', 'heart', 'fire', 'dream', 'city', 'midnight', 'drive', 'summer',
+    'rain', 'gold', 'light', 'dance', 'shadow', 'river', 'wild', 'blue', 'ghost',
+    'thunder', 'paradise', 'echo', 'silver', 'storm', 'velvet', 'neon', 'ocean',
+    'highway', 'sugar', 'stone', 'angel', 'crown', 'mirror', 'cherry', 'desert',
+)
+FIRST_NAMES = ('Jay', 'Ana', 'Leo', 'Mia', 'Kai', 'Zoe', 'Eli', 'Ivy', 'Max', 'Ava', 'Noa', 'Sam')
+VERSION_SUFFIXES = (' (Radio Edit)', ' - Remastered', ' (Live)', ' [Extended Mix]')
+PERIODS = ('2024Q1', '2024Q2', '2024Q3', '2024Q4')
+
+
+@dataclass(frozen=True)
+class CatalogSpec:
+    tracks: int = 10_000
+    # Share of tracks that carry an ISRC
+    isrc_coverage: float = 0.8
+    # Vocabulary size; smaller means more shared tokens between tracks
+    vocabulary: int = 5_000
+    artists: int = 2_000
+    seed: int = 1
+
+
+@dataclass(frozen=True)
+class StatementSpec:
+    rows: int = 100_000
+    pro: PRO = PRO.ASCAP
+    # Share of rows for works that are not in the catalog
+    unknown_rate: float = 0.2
+    # Share of catalog rows that keep the track's ISRC
+    isrc_rate: float = 0.6
+    # Share of catalog rows with a typo, case change or version suffix
+    fuzz_rate: float = 0.15
+    # Share of rows that repeat an earlier row (re-sent lines)
+    duplicate_rate: float = 0.1
+    seed: int = 2
+
+
+def _vocabulary(rng: random.Random, size: int) -> List[str]:
+    words = list(WORDS)
+    while len(words) < size:
+        words.append(''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))))
+    return words[:size]
+
+
+def _isrc(rng: random.Random, serial: int) -> str:
+    country = rng.choice(('US', 'GB', 'DE', 'FR', 'JP', 'CA', 'AU'))
+    registrant = ''.join(rng.choices(string.ascii_uppercase + string.digits, k=3))
+    return f"{country}{registrant}{rng.randint(0, 99):02d}{serial % 100000:05d}"
+
+
+def generate_catalog(spec: CatalogSpec) -> List[Dict[str, Optional[str]]]:
+    """Track rows as dicts with id, isrc, title and artist"""
+    rng = random.Random(spec.seed)
+    words = _vocabulary(rng, spec.vocabulary)
+    # Zipf-like word use, as in real titles
+    weights = [1.0 / (rank + 1) for rank in range(len(words))]
+    cumulative = []
+    total = 0.0
+    for weight in weights:
+        total += weight
+        cumulative.append(total)
+
+    artists = [
+        f"{rng.choice(FIRST_NAMES)} {' '.join(rng.choices(words, cum_weights=cumulative, k=1)).title()}"
+        for _ in range(spec.artists)
+    ]
+    tracks = []
+    for serial in range(spec.tracks):
+        title = ' '.join(rng.choices(words, cum_weights=cumulative, k=rng.randint(1, 4))).title()
+        tracks.append({
+            'id': f"track_{serial:08d}",
+            'isrc': _isrc(rng, serial) if rng.random() < spec.isrc_coverage else None,
+            'title': title,
+            'artist': rng.choice(artists),
+        })
+    return tracks
+
+
+def _fuzz(rng: random.Random, text: str) -> str:
+    kind = rng.random()
+    if kind < 0.4 and len(text) > 3:
+        position = rng.randrange(len(text))
+        return text[:position] + rng.choice(string.ascii_lowercase) + text[position + 1:]
+    if kind < 0.7:
+        return text.upper()
+    return text + rng.choice(VERSION_SUFFIXES)
+
+
+def _format_amount(amount: float, decimal_separator: str) -> str:
+    text = f"{amount:.2f}"
+    return text.replace('.', decimal_separator) if decimal_separator != '.' else text
+
+
+def iter_statement_rows(
+    catalog: List[Dict[str, Optional[str]]],
+    spec: StatementSpec
+) -> Iterator[List[str]]:
+    """Header row, then `spec.rows` data rows in the PRO's layout"""
+    rng = random.Random(spec.seed)
+    profile = get_format(spec.pro)
+    yield [profile.isrc[0], profile.title[0], profile.artist[0], profile.amount[0], profile.period[0], profile.plays[0]]
+
+    recent: List[List[str]] = []
+    for _ in range(spec.rows):
+        if recent and rng.random() < spec.duplicate_rate:
+            yield rng.choice(recent)
+            continue
+
+        if not catalog or rng.random() < spec.unknown_rate:
+            isrc = ''
+            title = ' '.join(rng.choices(WORDS, k=rng.randint(2, 4))).title() + f" {rng.randint(1, 10**6)}"
+            artist = f"{rng.choice(FIRST_NAMES)} Unknown"
+        else:
+            track = rng.choice(catalog)
+            isrc = track['isrc'] if track['isrc'] and rng.random() < spec.isrc_rate else ''
+            title = track['title']
+            artist = track['artist']
+            if rng.random() < spec.fuzz_rate:
+                title = _fuzz(rng, title)
+
+        amount = round(rng.lognormvariate(0, 1.5), 2)
+        row = [
+            isrc,
+            title,
+            artist,
+            _format_amount(amount, profile.decimal_separator),
+            rng.choice(PERIODS),
+            str(rng.randint(1, 50_000)),
+        ]
+        if len(recent) < 10_000:
+            recent.append(row)
+        else:
+            recent[rng.randrange(len(recent))] = row
+        yield row
+
+
+def write_statement(path: str, catalog: List[Dict[str, Optional[str]]], spec: StatementSpec) -> str:
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        for row in iter_statement_rows(catalog, spec):
+            writer.writerow(row)
+    return path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write a synthetic PRO statement')
+    parser.add_argument('output')
+    parser.add_argument('--tracks', type=int, default=CatalogSpec.tracks)
+    parser.add_argument('--isrc-coverage', type=float, default=CatalogSpec.isrc_coverage)
+    parser.add_argument('--rows', type=int, default=StatementSpec.rows)
+    parser.add_argument('--pro', default=StatementSpec.pro.value, choices=[pro.value for pro in PRO])
+    parser.add_argument('--unknown-rate', type=float, default=StatementSpec.unknown_rate)
+    parser.add_argument('--isrc-rate', type=float, default=StatementSpec.isrc_rate)
+    parser.add_argument('--fuzz-rate', type=float, default=StatementSpec.fuzz_rate)
+    parser.add_argument('--duplicate-rate', type=float, default=StatementSpec.duplicate_rate)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    catalog = generate_catalog(CatalogSpec(
+        tracks=args.tracks,
+        isrc_coverage=args.isrc_coverage,
+        seed=args.seed
+    ))
+    write_statement(args.output, catalog, StatementSpec(
+        rows=args.rows,
+        pro=PRO(args.pro),
+        unknown_rate=args.unknown_rate,
+        isrc_rate=args.isrc_rate,
+        fuzz_rate=args.fuzz_rate,
+        duplicate_rate=args.duplicate_rate,
+        seed=args.seed + 1
+    ))
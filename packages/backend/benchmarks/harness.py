@@ -0,0 +1,164 @@
+"""
+Timing helpers and the JSON result format shared by the benchmarks
+
+A results file looks like:
+
+    {
+      "suite": "audit",
+      "meta": {"commit": "...", "python": "...", "platform": "...", "started_at": "...", "seed": 1},
+      "results": [
+        {"name": "parse_royalty_file", "params": {...}, "repeat": 3,
+         "seconds": {"min": ..., "median": ..., "mean": ..., "max": ...},
+         "throughput": {"rows_per_s": ...}, "extra": {...}}
+      ]
+    }
+
+`compare` prints the change in median time between two such files.
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_metadata(seed: int) -> Dict[str, Any]:
+    return {
+        'commit': git_commit(),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'seed': seed,
+    }
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        'min': min(samples),
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'max': max(samples),
+    }
+
+
+class Suite:
+    """Collects benchmark results and writes them as JSON"""
+
+    def __init__(self, name: str, seed: int, only: Optional[List[str]] = None):
+        self.name = name
+        self.only = set(only or ())
+        self.meta = run_metadata(seed)
+        self.results: List[Dict[str, Any]] = []
+
+    def enabled(self, name: str) -> bool:
+        return not self.only or name in self.only
+
+    def record(
+        self,
+        name: str,
+        samples: List[float],
+        params: Optional[Dict[str, Any]] = None,
+        units: Optional[Dict[str, float]] = None,
+        extra: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Add a result; `units` maps e.g. 'rows' to the work done per sample"""
+        seconds = summarize(samples)
+        result = {
+            'name': name,
+            'params': params or {},
+            'repeat': len(samples),
+            'seconds': seconds,
+            'throughput': {
+                f"{unit}_per_s": count / seconds['median'] if seconds['median'] else 0.0
+                for unit, count in (units or {}).items()
+            },
+            'extra': extra or {},
+        }
+        self.results.append(result)
+        print(f"{name}: median {seconds['median']:.4f}s", file=sys.stderr)
+        return result
+
+    def skip(self, name: str, reason: str) -> None:
+        self.results.append({'name': name, 'skipped': reason})
+        print(f"{name}: skipped ({reason})", file=sys.stderr)
+
+    def to_json(self) -> str:
+        return json.dumps({'suite': self.name, 'meta': self.meta, 'results': self.results}, indent=2)
+
+    def write(self, path: Optional[str]) -> None:
+        if path:
+            with open(path, 'w') as f:
+                f.write(self.to_json() + '\n')
+        else:
+            print(self.to_json())
+
+
+def measure(
+    fn: Callable[[], Any],
+    repeat: int = 3,
+    setup: Optional[Callable[[], Any]] = None
+) -> List[float]:
+    """Time `fn` `repeat` times, running the untimed `setup` before each"""
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+async def measure_async(
+    fn: Callable[[], Awaitable[Any]],
+    repeat: int = 3,
+    setup: Optional[Callable[[], Awaitable[Any]]] = None
+) -> List[float]:
+    """Time `fn` `repeat` times, running the untimed `setup` before each"""
+    samples = []
+    for _ in range(repeat):
+        if setup is not None:
+            await setup()
+        started = time.perf_counter()
+        await fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def compare(baseline_path: str, current_path: str) -> None:
+    """Print median-time changes between two result files"""
+    with open(baseline_path) as f:
+        baseline = {result['name']: result for result in json.load(f)['results']}
+    with open(current_path) as f:
+        current = json.load(f)['results']
+
+    for result in current:
+        before = baseline.get(result['name'])
+        if 'seconds' not in result or not before or 'seconds' not in before:
+            continue
+        old = before['seconds']['median']
+        new = result['seconds']['median']
+        change = (new - old) / old * 100 if old else 0.0
+        print(f"{result['name']:<40} {old:>10.4f}s -> {new:>10.4f}s  {change:+7.1f}%")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare two benchmark result files')
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    args = parser.parse_args()
+    compare(args.baseline, args.current)
@@ -0,0 +1,112 @@
+"""
+Peak-memory check for streaming a large statement into an audit
+
+Writes a synthetic statement (5M rows by default), streams it through
+AuditService.iter_royalty_batches in a fresh Python process and reads
+that process's peak RSS. Streaming keeps one batch in memory at a time,
+so the peak should not grow with the file; the check exits non-zero
+when it is above --ceiling-mb, so it can gate a CI job:
+
+    python -m benchmarks.memory_check --rows 5000000 --ceiling-mb 160 --output memory.json
+
+Results use the benchmark JSON format (see benchmarks/harness.py), with
+the peak and the RSS before streaming started under `extra`.
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from api.records import PRO
+from benchmarks.generate import CatalogSpec, StatementSpec, generate_catalog, write_statement
+from benchmarks.harness import Suite
+
+DEFAULT_ROWS = 5_000_000
+DEFAULT_CEILING_MB = 160.0
+
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+def stream(path: str, pro: PRO) -> dict:
+    """Stream the statement in this process and report its peak RSS"""
+    # Imported before the baseline so module memory is not counted as growth
+    from benchmarks.run import _audit_service
+
+    with tempfile.TemporaryDirectory() as workdir:
+        service = _audit_service(None, workdir)
+        baseline = _peak_rss_mb()
+        records = 0
+        started = time.perf_counter()
+        for batch in service.iter_royalty_batches(path, '.csv', pro):
+            records += len(batch)
+        seconds = time.perf_counter() - started
+    return {'records': records, 'seconds': seconds, 'baseline_rss_mb': baseline, 'peak_rss_mb': _peak_rss_mb()}
+
+
+def check(args: argparse.Namespace) -> bool:
+    """Run the check; True when the peak RSS is within the ceiling"""
+    suite = Suite('memory', args.seed)
+    with tempfile.TemporaryDirectory() as workdir:
+        path = args.statement
+        if path is None:
+            catalog = generate_catalog(CatalogSpec(tracks=args.tracks, seed=args.seed))
+            path = write_statement(
+                os.path.join(workdir, 'statement.csv'),
+                catalog,
+                StatementSpec(rows=args.rows, pro=PRO(args.pro), seed=args.seed + 1)
+            )
+            del catalog
+
+        # A fresh process, so the generator's memory is not in the peak
+        child = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.memory_check', '--stream', path, '--pro', args.pro],
+            capture_output=True, text=True, check=True
+        )
+        measured = json.loads(child.stdout.strip().splitlines()[-1])
+        file_bytes = os.path.getsize(path)
+
+    within = measured['peak_rss_mb'] <= args.ceiling_mb
+    suite.record(
+        'iter_royalty_batches_peak_rss', [measured['seconds']],
+        params={'rows': args.rows if args.statement is None else None, 'pro': args.pro, 'ceiling_mb': args.ceiling_mb},
+        units={'rows': measured['records']},
+        extra={
+            'bytes': file_bytes,
+            'baseline_rss_mb': round(measured['baseline_rss_mb'], 1),
+            'peak_rss_mb': round(measured['peak_rss_mb'], 1),
+            'within_ceiling': within,
+        }
+    )
+    suite.write(args.output)
+    if not within:
+        print(
+            f"peak RSS {measured['peak_rss_mb']:.1f} MB is above the {args.ceiling_mb:.1f} MB ceiling",
+            file=sys.stderr
+        )
+    return within
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Check peak memory while streaming a large statement')
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS)
+    parser.add_argument('--tracks', type=int, default=CatalogSpec.tracks)
+    parser.add_argument('--pro', default=PRO.ASCAP.value, choices=[pro.value for pro in PRO])
+    parser.add_argument('--ceiling-mb', type=float, default=DEFAULT_CEILING_MB)
+    parser.add_argument('--statement', help='Stream this CSV instead of generating one')
+    parser.add_argument('--stream', metavar='PATH', help=argparse.SUPPRESS)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='Write results here instead of stdout')
+    args = parser.parse_args()
+
+    if args.stream:
+        print(json.dumps(stream(args.stream, PRO(args.pro))))
+    else:
+        sys.exit(0 if check(args) else 1)
@@ -0,0 +1,536 @@
+"""
+Benchmarks for the audit pipeline
+
+CPU stages (parsing, index build, matching, export encoding) run
+anywhere. Database stages run against the SQLite schema in
+benchmarks/schema.prisma and are reported as skipped when the Prisma
+client is missing or the database cannot be reached:
+
+    export BENCH_DATABASE_URL=file:./bench.db
+    prisma db push --schema benchmarks/schema.prisma
+    python -m benchmarks.run --scale small --output results.json
+
+_process_audit is also timed on 10k, 100k and 1M-row statements
+whatever the scale (process_audit_10k/100k/1m, reported in rows/s).
+Each size is its own benchmark, so `--only process_audit_10k` runs
+just the smallest.
+
+Compare two runs with `python -m benchmarks.harness before.json after.json`.
+Peak memory while streaming a 5M-row statement is checked against a
+ceiling by `python -m benchmarks.memory_check`.
+"""
+import argparse
+import asyncio
+import csv
+import itertools
+import os
+import random
+import statistics
+import tempfile
+import tracemalloc
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from api.audit_export import encode_export
+from api.matching import FUZZY_THRESHOLD, match_records
+from api.pro_formats import get_format, parse_number
+from api.records import PRO, RoyaltyRecord
+from api.similarity import BatchScorer
+from api.track_index import TrackIndex
+from benchmarks.generate import CatalogSpec, StatementSpec, generate_catalog, write_statement
+from benchmarks.harness import Suite, measure, measure_async
+
+
+@dataclass(frozen=True)
+class Scale:
+    tracks: int
+    rows: int
+    # Rows matched one at a time for the per-record baseline
+    baseline_rows: int
+    # Completed audits and unmatched rows per audit for the summary query
+    summary_audits: int
+    summary_rows: int
+
+
+SCALES = {
+    'small': Scale(tracks=10_000, rows=50_000, baseline_rows=5_000, summary_audits=10, summary_rows=5_000),
+    'medium': Scale(tracks=100_000, rows=500_000, baseline_rows=20_000, summary_audits=30, summary_rows=20_000),
+    'large': Scale(tracks=1_000_000, rows=5_000_000, baseline_rows=50_000, summary_audits=100, summary_rows=50_000),
+}
+
+EXPORT_FORMATS = ('csv', 'json', 'parquet')
+RECORD_MEMORY_BENCHMARKS = ('record_memory_columnar', 'record_memory_dataclass')
+# Rows held in memory by the record layout comparison; the dataclass
+# layout needs about 800 bytes each
+RECORD_MEMORY_ROWS = 200_000
+MATCH_BENCHMARKS = ('_find_matching_tracks', 'match_records')
+MATCH_WORKER_COUNTS = (1, 2, 4, 8)
+MATCH_WORKER_BENCHMARKS = tuple(f"match_workers_{workers}" for workers in MATCH_WORKER_COUNTS)
+# Statement sizes _process_audit is also timed at, whatever the scale
+PROCESS_AUDIT_SIZES = {'process_audit_10k': 10_000, 'process_audit_100k': 100_000, 'process_audit_1m': 1_000_000}
+DATABASE_BENCHMARKS = (
+    'db_seed_tracks', 'process_audit', *PROCESS_AUDIT_SIZES, 'process_audit_incremental', 'get_audit_summary',
+    'export_audit_results_csv', 'export_audit_results_json', 'stream_audit_results_csv',
+    'get_missing_royalties_summary'
+)
+SEED_BATCH_SIZE = 5000
+
+
+class Context:
+    """Data shared between stages, generated once per run"""
+
+    def __init__(self, scale: Scale, seed: int, workdir: str):
+        self.scale = scale
+        self.catalog = generate_catalog(CatalogSpec(tracks=scale.tracks, seed=seed))
+        self.statement = write_statement(
+            os.path.join(workdir, 'statement.csv'),
+            self.catalog,
+            StatementSpec(rows=scale.rows, pro=PRO.ASCAP, seed=seed + 1)
+        )
+        self.tracks = [SimpleNamespace(**track) for track in self.catalog]
+        self.records: List[RoyaltyRecord] = []
+        self.index: Optional[TrackIndex] = None
+
+
+def _audit_service(db: Any, workdir: str, **options):
+    # Imported here so the CPU stages run without a generated client
+    from api.audit import AuditService
+    return AuditService(db, job_store=os.path.join(workdir, 'audit_jobs.db'), **options)
+
+
+async def bench_parse(suite: Suite, ctx: Context, service, repeat: int) -> None:
+    params = {'rows': ctx.scale.rows, 'pro': PRO.ASCAP.value}
+    extra = {'bytes': os.path.getsize(ctx.statement)}
+    with open(ctx.statement, encoding='utf-8') as f:
+        content = f.read()
+
+    async def parse():
+        ctx.records = await service.parse_royalty_file(content, '.csv', PRO.ASCAP)
+
+    samples = await measure_async(parse, repeat)
+    suite.record('parse_royalty_file', samples, params=params, units={'rows': len(ctx.records)}, extra=extra)
+
+    def stream():
+        for _ in service.iter_royalty_batches(ctx.statement, '.csv', PRO.ASCAP):
+            pass
+
+    samples = measure(stream, repeat)
+    suite.record('iter_royalty_batches', samples, params=params, units={'rows': len(ctx.records)}, extra=extra)
+
+
+@dataclass
+class _DataclassRecord:
+    """The record layout before RoyaltyRecordBatch: one dataclass per row
+    holding the raw CSV dict"""
+    isrc: Optional[str]
+    title: str
+    artist: str
+    pro: PRO
+    amount: float
+    period: str
+    plays: Optional[int] = None
+    raw_data: Optional[Dict[str, Any]] = None
+
+
+def _traced_bytes(build) -> Tuple[int, int]:
+    """Bytes still allocated once `build()` returns, while its result is
+    alive, and the number of records it returned"""
+    tracemalloc.start()
+    try:
+        kept = build()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return size, sum(len(batch) for batch in kept)
+
+
+def bench_record_memory(suite: Suite, ctx: Context, service, repeat: int) -> None:
+    """Bytes per record held by columnar batches vs per-row dataclasses"""
+    rows = min(ctx.scale.rows, RECORD_MEMORY_ROWS)
+
+    def columnar():
+        batches = []
+        count = 0
+        for batch in service.iter_royalty_batches(ctx.statement, '.csv', PRO.ASCAP):
+            batches.append(batch)
+            count += len(batch)
+            if count >= rows:
+                break
+        return batches
+
+    profile = get_format(PRO.ASCAP)
+
+    def dataclass_records():
+        # One batch, so both layouts are counted the same way
+        with open(ctx.statement, newline='', encoding='utf-8') as f:
+            return [[
+                _DataclassRecord(
+                    isrc=row[profile.isrc[0]] or None,
+                    title=row[profile.title[0]],
+                    artist=row[profile.artist[0]],
+                    pro=PRO.ASCAP,
+                    amount=parse_number(row[profile.amount[0]], profile.decimal_separator),
+                    period=row[profile.period[0]],
+                    plays=int(row[profile.plays[0]]) if row[profile.plays[0]] else None,
+                    raw_data=row
+                )
+                for row in itertools.islice(csv.DictReader(f), rows)
+            ]]
+
+    for name, build in zip(RECORD_MEMORY_BENCHMARKS, (columnar, dataclass_records)):
+        if not suite.enabled(name):
+            continue
+        samples = measure(build, repeat)
+        size, records = _traced_bytes(build)
+        suite.record(
+            name, samples,
+            params={'rows': rows},
+            units={'rows': records},
+            extra={'bytes': size, 'bytes_per_record': round(size / records, 1)}
+        )
+
+
+def bench_index_build(suite: Suite, ctx: Context, repeat: int) -> None:
+    def build():
+        ctx.index = TrackIndex(ctx.tracks)
+
+    samples = measure(build, repeat)
+    suite.record(
+        'track_index_build', samples,
+        params={'tracks': ctx.scale.tracks},
+        units={'tracks': len(ctx.tracks)}
+    )
+
+
+async def bench_match(suite: Suite, ctx: Context, service, repeat: int) -> None:
+    baseline = ctx.records[:ctx.scale.baseline_rows]
+    service._track_index = ctx.index
+
+    async def find():
+        for record in baseline:
+            await service._find_matching_tracks(record)
+
+    samples = await measure_async(find, repeat)
+    suite.record(
+        '_find_matching_tracks', samples,
+        params={'tracks': ctx.scale.tracks, 'rows': len(baseline)},
+        units={'rows': len(baseline)}
+    )
+
+    keys = [(record.isrc, record.title, record.artist) for record in ctx.records]
+    results: List = []
+
+    def run():
+        # The scorer's cache lives for an audit, so build it per run
+        scorer = BatchScorer(ctx.index, FUZZY_THRESHOLD)
+        results[:] = match_records(ctx.index, keys, scorer)
+
+    samples = measure(run, repeat)
+    suite.record(
+        'match_records', samples,
+        params={'tracks': ctx.scale.tracks, 'rows': len(keys)},
+        units={'rows': len(keys)},
+        extra={'matched_rows': sum(1 for matches in results if matches)}
+    )
+
+
+async def bench_match_workers(suite: Suite, ctx: Context, workdir: str, repeat: int) -> None:
+    """Exact matching across 1/2/4/8 match_workers, including pool startup
+    and copying the index to each worker, as an audit pays for them.
+
+    Every run's matches are checked against in-process matching. Worker
+    counts above the host's CPU count are skipped: they would only
+    measure time slicing, not scaling.
+    """
+    cpus = os.cpu_count() or 1
+    keys = [(record.isrc, record.title, record.artist) for record in ctx.records]
+    serial = _match_pairs(match_records(ctx.index, keys, BatchScorer(ctx.index, FUZZY_THRESHOLD)))
+    single = None
+    for workers, name in zip(MATCH_WORKER_COUNTS, MATCH_WORKER_BENCHMARKS):
+        if not suite.enabled(name):
+            continue
+        if workers > cpus:
+            suite.skip(name, f"{workers} workers on {cpus} CPU(s) measures no scaling")
+            continue
+        service = _audit_service(None, workdir, match_workers=workers)
+        found: List = []
+
+        async def run():
+            found.clear()
+            async for _, matches in service._match_batches(ctx.index, ctx.records):
+                found.extend(matches)
+
+        samples = await measure_async(run, repeat)
+        if _match_pairs(found) != serial:
+            raise RuntimeError(f"{name}: matches differ from in-process matching")
+        median = statistics.median(samples)
+        if workers == 1:
+            single = median
+        extra: Dict[str, Any] = {
+            'matched_rows': sum(1 for matches in found if matches),
+            'same_as_serial': True,
+            'cpu_count': cpus
+        }
+        if single:
+            extra['speedup'] = round(single / median, 2)
+        suite.record(
+            name, samples,
+            params={
+                'tracks': ctx.scale.tracks, 'rows': len(ctx.records),
+                'workers': workers, 'shard_size': service.match_shard_size
+            },
+            units={'rows': len(ctx.records)},
+            extra=extra
+        )
+
+
+def _match_pairs(matches: List) -> List[List[Tuple[str, str]]]:
+    return [[(track.id, match_type.value) for track, match_type in record] for record in matches]
+
+
+def _synthetic_matches(ctx: Context, count: int, page_size: int) -> List[List[SimpleNamespace]]:
+    rng = random.Random(len(ctx.records))
+    timestamp = datetime(2024, 1, 1)
+    pages = []
+    for start in range(0, count, page_size):
+        page = []
+        for record in ctx.records[start:start + page_size]:
+            track = rng.choice(ctx.tracks) if rng.random() < 0.7 else None
+            page.append(SimpleNamespace(
+                isrc=record.isrc,
+                title=record.title,
+                artist=record.artist,
+                pro=record.pro.value,
+                amount_found=record.amount,
+                match_type='ISRC' if track else None,
+                timestamp=timestamp,
+                track_id=track.id if track else None,
+                track=track
+            ))
+        pages.append(page)
+    return pages
+
+
+async def bench_export_encoding(suite: Suite, ctx: Context, repeat: int) -> None:
+    count = min(len(ctx.records), 200_000)
+    pages = _synthetic_matches(ctx, count, 2000)
+    audit = SimpleNamespace(
+        id='bench', file_name='statement.csv', created_at=datetime(2024, 1, 1),
+        completed_at=datetime(2024, 1, 1), status='COMPLETED',
+        tracks_scanned=count, matches_found=count, missing_amount=0.0
+    )
+
+    async def page_stream() -> AsyncIterator[List[SimpleNamespace]]:
+        for page in pages:
+            yield page
+
+    for format in EXPORT_FORMATS:
+        for compress in (False, True):
+            size = 0
+
+            async def encode():
+                nonlocal size
+                size = 0
+                async for chunk in encode_export(audit, page_stream(), format, compress):
+                    size += len(chunk)
+
+            name = f"export_encode_{format}" + ('_gzip' if compress else '')
+            try:
+                samples = await measure_async(encode, repeat)
+            except ValueError as e:
+                # Parquet without pyarrow
+                suite.skip(name, str(e))
+                continue
+            suite.record(name, samples, params={'rows': count}, units={'rows': count}, extra={'bytes': size})
+
+
+async def _connect(url: Optional[str]):
+    try:
+        from prisma import Prisma
+    except ImportError as e:
+        return None, f"Prisma client not available: {e}"
+    try:
+        db = Prisma(datasource={'url': url}) if url else Prisma()
+        await db.connect()
+        # Fails here when the client was generated from another schema
+        await db.track.count()
+    except Exception as e:
+        return None, f"database unavailable: {e}"
+    return db, None
+
+
+async def _reset(db) -> None:
+    await db.trackmatch.delete_many()
+    await db.audit.delete_many()
+    await db.track.delete_many()
+    await db.user.delete_many()
+
+
+async def _insert(db, model: str, rows: List[Dict[str, Any]]) -> None:
+    for start in range(0, len(rows), SEED_BATCH_SIZE):
+        async with db.batch_() as batcher:
+            for row in rows[start:start + SEED_BATCH_SIZE]:
+                getattr(batcher, model).create(row)
+
+
+async def bench_database(suite: Suite, ctx: Context, args: argparse.Namespace, workdir: str) -> None:
+    wanted = [name for name in DATABASE_BENCHMARKS if suite.enabled(name)]
+    if not wanted:
+        return
+
+    db, reason = await _connect(args.database_url)
+    if db is None:
+        for name in wanted:
+            suite.skip(name, reason)
+        return
+
+    try:
+        await _reset(db)
+        user = await db.user.create({'email': 'bench@example.com', 'name': 'Benchmark'})
+        track_rows = [{key: value for key, value in track.items() if value is not None} for track in ctx.catalog]
+        samples = await measure_async(lambda: _insert(db, 'track', track_rows), 1)
+        suite.record('db_seed_tracks', samples, params={'tracks': len(track_rows)}, units={'tracks': len(track_rows)})
+
+        service = _audit_service(db, workdir)
+        await service.get_track_index()
+        audits: List[str] = []
+
+        async def new_audit():
+            audit = await service._create_audit_record(user.id, 'statement.csv', len(ctx.records))
+            audits.append(audit.id)
+
+        async def process():
+            await service._process_audit(audits[-1], ctx.records)
+
+        samples = await measure_async(process, args.repeat, setup=new_audit)
+        suite.record('process_audit', samples, params={'rows': len(ctx.records)}, units={'rows': len(ctx.records)})
+
+        for name, rows in PROCESS_AUDIT_SIZES.items():
+            if not suite.enabled(name):
+                continue
+            # The scale's records repeated up to the size
+            records = list(itertools.islice(itertools.cycle(ctx.records), rows))
+
+            async def process_rows():
+                await service._process_audit(audits[-1], records)
+
+            samples = await measure_async(process_rows, args.repeat, setup=new_audit)
+            suite.record(
+                name, samples,
+                params={'rows': rows, 'batch_size': service.batch_size},
+                units={'rows': rows}
+            )
+
+        # Every record is unchanged, so results are carried over
+        base_audit_id = audits[-1]
+
+        async def process_incremental():
+            await service._process_audit(audits[-1], ctx.records, base_audit_id=base_audit_id)
+
+        samples = await measure_async(process_incremental, args.repeat, setup=new_audit)
+        suite.record(
+            'process_audit_incremental', samples,
+            params={'rows': len(ctx.records)},
+            units={'rows': len(ctx.records)}
+        )
+
+        samples = await measure_async(lambda: service.get_audit_summary(base_audit_id), args.repeat)
+        suite.record('get_audit_summary', samples, params={'rows': len(ctx.records)})
+
+        for format in ('csv', 'json'):
+            samples = await measure_async(lambda: service.export_audit_results(base_audit_id, format), args.repeat)
+            suite.record(
+                f"export_audit_results_{format}", samples,
+                params={'rows': len(ctx.records)},
+                units={'rows': len(ctx.records)}
+            )
+
+        async def stream():
+            _, _, chunks = await service.stream_audit_results(base_audit_id, 'csv')
+            async for _ in chunks:
+                pass
+
+        samples = await measure_async(stream, args.repeat)
+        suite.record(
+            'stream_audit_results_csv', samples,
+            params={'rows': len(ctx.records)},
+            units={'rows': len(ctx.records)}
+        )
+
+        await bench_missing_summary(suite, ctx, db, service, args.repeat)
+    finally:
+        await db.disconnect()
+
+
+async def bench_missing_summary(suite: Suite, ctx: Context, db, service, repeat: int) -> None:
+    """Many completed audits with a large share of unmatched rows"""
+    scale = ctx.scale
+    user = await db.user.create({'email': 'summary@example.com', 'name': 'Summary'})
+    rng = random.Random(scale.summary_audits)
+    created_at = datetime.now() - timedelta(days=1)
+    for _ in range(scale.summary_audits):
+        audit = await db.audit.create({
+            'user_id': user.id,
+            'file_name': 'statement.csv',
+            'status': 'COMPLETED',
+            'tracks_scanned': scale.summary_rows,
+            'created_at': created_at,
+            'completed_at': created_at
+        })
+        await _insert(db, 'trackmatch', [
+            {
+                'audit_id': audit.id,
+                'title': record.title,
+                'artist': record.artist,
+                'pro': record.pro.value,
+                'amount_found': record.amount
+            }
+            for record in rng.sample(ctx.records, min(scale.summary_rows, len(ctx.records)))
+        ])
+
+    samples = await measure_async(lambda: service.get_missing_royalties_summary(user.id), repeat)
+    rows = scale.summary_audits * scale.summary_rows
+    suite.record(
+        'get_missing_royalties_summary', samples,
+        params={'audits': scale.summary_audits, 'unmatched_rows': rows},
+        units={'rows': rows}
+    )
+
+
+async def run(args: argparse.Namespace) -> Suite:
+    suite = Suite('audit', args.seed, args.only)
+    scale = SCALES[args.scale]
+    with tempfile.TemporaryDirectory() as workdir:
+        ctx = Context(scale, args.seed, workdir)
+        # Parsing needs no database; the service only holds the client
+        service = _audit_service(None, workdir)
+
+        # Later stages need the parsed records and index, so parsing and
+        # the index build always run; --only filters the results
+        await bench_parse(suite, ctx, service, args.repeat)
+        bench_record_memory(suite, ctx, service, args.repeat)
+        bench_index_build(suite, ctx, args.repeat)
+        if any(suite.enabled(name) for name in MATCH_BENCHMARKS):
+            await bench_match(suite, ctx, service, args.repeat)
+        if any(suite.enabled(name) for name in MATCH_WORKER_BENCHMARKS):
+            await bench_match_workers(suite, ctx, workdir, args.repeat)
+        if not suite.only or any(name.startswith('export_encode') for name in suite.only):
+            await bench_export_encoding(suite, ctx, args.repeat)
+        await bench_database(suite, ctx, args, workdir)
+
+    suite.results = [result for result in suite.results if suite.enabled(result['name'])]
+    return suite
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run the audit pipeline benchmarks')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--only', action='append', help='Benchmark name to run (repeatable)')
+    parser.add_argument('--database-url', default=os.environ.get('BENCH_DATABASE_URL'))
+    parser.add_argument('--output', help='Write results here instead of stdout')
+    args = parser.parse_args()
+    asyncio.run(run(args)).write(args.output)
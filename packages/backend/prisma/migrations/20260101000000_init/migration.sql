@@ -0,0 +1,53 @@
+-- CreateTable
+CREATE TABLE "User" (
+    "id" TEXT NOT NULL PRIMARY KEY,
+    "email" TEXT NOT NULL,
+    "name" TEXT
+);
+
+-- CreateTable
+CREATE TABLE "Track" (
+    "id" TEXT NOT NULL PRIMARY KEY,
+    "isrc" TEXT,
+    "title" TEXT NOT NULL,
+    "artist" TEXT NOT NULL
+);
+
+-- CreateTable
+CREATE TABLE "Audit" (
+    "id" TEXT NOT NULL PRIMARY KEY,
+    "user_id" TEXT NOT NULL,
+    "file_name" TEXT NOT NULL,
+    "status" TEXT NOT NULL,
+    "tracks_scanned" INTEGER NOT NULL DEFAULT 0,
+    "matches_found" INTEGER NOT NULL DEFAULT 0,
+    "missing_amount" REAL NOT NULL DEFAULT 0,
+    "created_at" DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    "completed_at" DATETIME,
+    CONSTRAINT "Audit_user_id_fkey" FOREIGN KEY ("user_id") REFERENCES "User" ("id") ON DELETE RESTRICT ON UPDATE CASCADE
+);
+
+-- CreateTable
+CREATE TABLE "TrackMatch" (
+    "id" TEXT NOT NULL PRIMARY KEY,
+    "audit_id" TEXT NOT NULL,
+    "track_id" TEXT,
+    "isrc" TEXT,
+    "title" TEXT NOT NULL,
+    "artist" TEXT NOT NULL,
+    "pro" TEXT NOT NULL,
+    "match_type" TEXT,
+    "amount_found" REAL NOT NULL,
+    "timestamp" DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT "TrackMatch_audit_id_fkey" FOREIGN KEY ("audit_id") REFERENCES "Audit" ("id") ON DELETE CASCADE ON UPDATE CASCADE,
+    CONSTRAINT "TrackMatch_track_id_fkey" FOREIGN KEY ("track_id") REFERENCES "Track" ("id") ON DELETE SET NULL ON UPDATE CASCADE
+);
+
+-- CreateIndex
+CREATE UNIQUE INDEX "User_email_key" ON "User"("email");
+
+-- CreateIndex
+CREATE INDEX "Audit_user_id_created_at_idx" ON "Audit"("user_id", "created_at");
+
+-- CreateIndex
+CREATE INDEX "TrackMatch_audit_id_track_id_idx" ON "TrackMatch"("audit_id", "track_id");
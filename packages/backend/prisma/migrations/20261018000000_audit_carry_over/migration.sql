@@ -0,0 +1,32 @@
+-- AlterTable
+ALTER TABLE "Audit" ADD COLUMN "file_hash" TEXT;
+ALTER TABLE "Audit" ADD COLUMN "track_index_version" TEXT;
+
+-- AlterTable
+ALTER TABLE "TrackMatch" ADD COLUMN "fingerprint" TEXT;
+
+-- RedefineTables
+-- Existing tracks count as updated now, so the next audit re-reads them all
+PRAGMA defer_foreign_keys=ON;
+PRAGMA foreign_keys=OFF;
+CREATE TABLE "new_Track" (
+    "id" TEXT NOT NULL PRIMARY KEY,
+    "isrc" TEXT,
+    "title" TEXT NOT NULL,
+    "artist" TEXT NOT NULL,
+    "updatedAt" DATETIME NOT NULL
+);
+INSERT INTO "new_Track" ("artist", "id", "isrc", "title", "updatedAt") SELECT "artist", "id", "isrc", "title", CURRENT_TIMESTAMP FROM "Track";
+DROP TABLE "Track";
+ALTER TABLE "new_Track" RENAME TO "Track";
+PRAGMA foreign_keys=ON;
+PRAGMA defer_foreign_keys=OFF;
+
+-- CreateIndex
+CREATE INDEX "Track_updatedAt_idx" ON "Track"("updatedAt");
+
+-- CreateIndex
+CREATE INDEX "Audit_user_id_file_hash_idx" ON "Audit"("user_id", "file_hash");
+
+-- CreateIndex
+CREATE INDEX "TrackMatch_audit_id_fingerprint_idx" ON "TrackMatch"("audit_id", "fingerprint");
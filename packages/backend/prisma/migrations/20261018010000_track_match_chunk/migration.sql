@@ -0,0 +1,2 @@
+-- AlterTable
+ALTER TABLE "TrackMatch" ADD COLUMN "chunk" INTEGER NOT NULL DEFAULT 0;